@@ -0,0 +1,39 @@
+"""
+Benchmarks for the data structures in :mod:`src.data_structures`.
+Run them from the root of the repository, like
+``python -m benchmarks.memory``.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from random import Random
+
+from src.data_structures.point import point
+
+
+def random_lines(n: int, size: float = 100, seed: int = 0) -> list:
+    """
+    Creates n random lines with endpoints on different sides of the box from
+    (0, 0) to (size, size).
+
+    :param int n: Number of lines to create
+    :param float size: Side length of the box
+    :param int seed: Seed for the random number generator
+    :return: A list of lines
+    :rtype: list[tuple[numpy.ndarray]]
+    """
+
+    rng = Random(seed)
+
+    def random_side_point(side):
+        t = rng.uniform(0, size)
+        return (point(t, 0), point(size, t), point(t, size), point(0, t))[side]
+
+    lines = []
+    for _ in range(n):
+        s1 = rng.randrange(4)
+        s2 = (s1 + rng.randrange(1, 4)) % 4
+        lines.append((random_side_point(s1), random_side_point(s2)))
+
+    return lines
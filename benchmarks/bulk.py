@@ -0,0 +1,95 @@
+"""
+Times building an arrangement with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_lines`
+against adding the lines one at a time with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_line`,
+and shows the most memory that tracemalloc saw in use while building it with
+``add_lines``.
+
+Usage: ``python -m benchmarks.bulk [number of lines ...]``
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+import sys
+import tracemalloc
+from time import perf_counter
+
+from src.data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision
+from src.data_structures.point import point
+from src.data_structures.polygonal_subdivision import BoundedPolygonalSubdivision
+
+from . import random_lines
+
+# Adding lines one at a time is quadratic in Python, so skip it past this
+MAX_INCREMENTAL = 200
+
+# The object backend makes one Python object per half edge, so skip it past this
+MAX_OBJECTS = 1000
+
+
+def build(cls, lines: list, bulk: bool) -> float:
+    """
+    :return: Seconds taken to build an arrangement of lines
+    :rtype: float
+    """
+
+    start = perf_counter()
+    bps = cls(point(0, 0), point(100, 100))
+    if bulk:
+        bps.add_lines(lines)
+    else:
+        for line in lines:
+            bps.add_line(line)
+
+    return perf_counter() - start
+
+
+def peak(cls, lines: list) -> int:
+    """
+    :return: The most bytes in use at once while building an arrangement of
+        lines with ``add_lines``. This is a separate run from the timed one,
+        since tracing allocations slows it down.
+    :rtype: int
+    """
+
+    tracemalloc.start()
+    bps = cls(point(0, 0), point(100, 100))
+    bps.add_lines(lines)
+    _, most = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return most
+
+
+def main(sizes: list):
+    print(
+        f"{'lines':>6} {'backend':>8} {'add_line':>10} {'add_lines':>10} "
+        f"{'peak MB':>8}"
+    )
+
+    for n in sizes:
+        lines = random_lines(n)
+
+        for name, cls in (
+            ("object", BoundedPolygonalSubdivision),
+            ("array", ArrayBoundedPolygonalSubdivision),
+        ):
+            if name == "object" and n > MAX_OBJECTS:
+                continue
+
+            incremental = (
+                f"{build(cls, lines, bulk=False):>9.3f}s"
+                if n <= MAX_INCREMENTAL
+                else f"{'-':>10}"
+            )
+            print(
+                f"{n:>6} {name:>8} {incremental} "
+                f"{build(cls, lines, bulk=True):>9.3f}s "
+                f"{peak(cls, lines) / 2**20:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,85 @@
+"""
+Compares the snap rounded
+:class:`src.data_structures.grid_subdivision.GridBoundedPolygonalSubdivision`
+against the floating point
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`,
+timing how long it takes to build an arrangement and counting how many
+vertices it ends up with. Lines are in a box of side 100, so a resolution of
+1 is a grid of 100 by 100 steps.
+
+Usage: ``python -m benchmarks.grid [number of lines ...]``
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+import sys
+from time import perf_counter
+
+from src.data_structures.grid_subdivision import GridBoundedPolygonalSubdivision
+from src.data_structures.point import point
+from src.data_structures.polygonal_subdivision import BoundedPolygonalSubdivision
+
+from . import random_lines
+
+# Grid points per unit to compare
+RESOLUTIONS = (1, 16, 1024)
+
+# Adding lines one at a time is quadratic in Python, so skip it past this
+MAX_INCREMENTAL = 200
+
+
+def build(make, lines: list, bulk: bool) -> tuple:
+    """
+    :return: Seconds taken to build an arrangement of lines, and the
+        arrangement
+    :rtype: tuple[float, BoundedPolygonalSubdivision]
+    """
+
+    start = perf_counter()
+    bps = make()
+    if bulk:
+        bps.add_lines(lines)
+    else:
+        for line in lines:
+            bps.add_line(line)
+
+    return perf_counter() - start, bps
+
+
+def main(sizes: list):
+    print(
+        f"{'lines':>6} {'mode':>10} {'add_line':>10} {'add_lines':>10}"
+        f" {'vertices':>9} {'faces':>7}"
+    )
+
+    corners = point(0, 0), point(100, 100)
+    modes = [("float", lambda: BoundedPolygonalSubdivision(*corners))]
+    for resolution in RESOLUTIONS:
+        modes.append(
+            (
+                f"grid {resolution}",
+                lambda r=resolution: GridBoundedPolygonalSubdivision(*corners, r),
+            )
+        )
+
+    for n in sizes:
+        lines = random_lines(n)
+
+        for name, make in modes:
+            # Grid mode rebuilds everything for each line, so it's only worth
+            # timing one at a time on small inputs
+            incremental = (
+                f"{build(make, lines, bulk=False)[0]:>9.3f}s"
+                if n <= MAX_INCREMENTAL
+                else f"{'-':>10}"
+            )
+            seconds, bps = build(make, lines, bulk=True)
+            print(
+                f"{n:>6} {name:>10} {incremental} {seconds:>9.3f}s"
+                f" {len(bps.vertices):>9} {bps.n_faces:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,100 @@
+"""
+Compares how much memory the object and struct-of-arrays backends of
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`
+need per half edge. Bytes are what tracemalloc saw allocated once the last
+line was added, so they include every Python-side index. For the array backend,
+that total is also split into the columns of
+:class:`src.data_structures.array_subdivision.HalfEdgeArrays` and the hash
+table of its :class:`src.data_structures.vertex_index.VertexIndex`, and
+whatever is left over, which is mostly room the columns have grown into but
+not used yet.
+
+Usage: ``python -m benchmarks.memory [number of lines ...]``
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+import sys
+import tracemalloc
+
+from src.data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision
+from src.data_structures.point import point
+from src.data_structures.polygonal_subdivision import BoundedPolygonalSubdivision
+
+from . import random_lines
+
+
+def count_half_edges(bps: BoundedPolygonalSubdivision) -> int:
+    """
+    :return: The number of half edges reachable from the vertices of bps
+    :rtype: int
+    """
+
+    seen = set()
+    stack = list(bps.point_dict.values())
+    while stack:
+        h = stack.pop()
+        if h not in seen:
+            seen.add(h)
+            stack.append(h.twin)
+            stack.append(h.link)
+
+    return len(seen)
+
+
+def measure(cls, lines: list) -> tuple:
+    """
+    Build an arrangement of lines with the given backend.
+
+    :return: The subdivision, the bytes allocated while building it that are
+        still in use, and the most bytes that were in use at once
+    :rtype: tuple[BoundedPolygonalSubdivision, int, int]
+    """
+
+    tracemalloc.start()
+    bps = cls(point(0, 0), point(100, 100))
+    for line in lines:
+        bps.add_line(line)
+    used, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return bps, used, peak
+
+
+def main(sizes: list):
+    print(
+        f"{'lines':>6} {'backend':>8} {'half edges':>11} {'bytes':>12} "
+        f"{'B/edge':>8} {'peak':>12}"
+    )
+
+    for n in sizes:
+        lines = random_lines(n)
+
+        for name, cls in (
+            ("object", BoundedPolygonalSubdivision),
+            ("array", ArrayBoundedPolygonalSubdivision),
+        ):
+            bps, used, peak = measure(cls, lines)
+            half_edges = count_half_edges(bps)
+            print(
+                f"{n:>6} {name:>8} {half_edges:>11} {used:>12} "
+                f"{used / half_edges:>8.1f} {peak:>12}"
+            )
+
+            if name == "array":
+                index = bps.vertices.nbytes()
+                columns = bps.store.nbytes() - index
+                for part, size in (
+                    ("columns", columns),
+                    ("index", index),
+                    ("other", used - columns - index),
+                ):
+                    print(
+                        f"{'':>6} {part:>8} {half_edges:>11} {size:>12} "
+                        f"{size / half_edges:>8.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 50, 100])
@@ -0,0 +1,74 @@
+"""
+Times taking a line out of an arrangement with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.remove_line`
+against building the arrangement again without it with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_lines`.
+Removing a line only touches its zone, and the other lines keep their ids, so
+the time depends on the size of the zone rather than on where the line is in
+the list.
+
+Usage: ``python -m benchmarks.remove [number of lines ...]``
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+import sys
+from time import perf_counter
+
+from src.data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision
+from src.data_structures.point import point
+from src.data_structures.polygonal_subdivision import BoundedPolygonalSubdivision
+
+from . import random_lines
+
+
+def remove(cls, lines: list, i: int) -> float:
+    """
+    :return: Seconds taken to remove line i from an arrangement of lines
+    :rtype: float
+    """
+
+    bps = cls(point(0, 0), point(100, 100))
+    bps.add_lines(lines)
+
+    # The first call builds the index of edges on each line, which later
+    # calls reuse, so it isn't part of the time
+    bps.edges_of_line(i)
+
+    start = perf_counter()
+    bps.remove_line(i)
+    return perf_counter() - start
+
+
+def rebuild(cls, lines: list, i: int) -> float:
+    """
+    :return: Seconds taken to build an arrangement of every line but line i
+    :rtype: float
+    """
+
+    start = perf_counter()
+    bps = cls(point(0, 0), point(100, 100))
+    bps.add_lines(lines[:i] + lines[i + 1 :])
+    return perf_counter() - start
+
+
+def main(sizes: list):
+    print(f"{'lines':>6} {'backend':>8} {'first':>10} {'last':>10} {'rebuild':>10}")
+
+    backends = [
+        ("objects", BoundedPolygonalSubdivision),
+        ("arrays", ArrayBoundedPolygonalSubdivision),
+    ]
+    for n in sizes:
+        lines = random_lines(n)
+        for name, cls in backends:
+            print(
+                f"{n:>6} {name:>8} {remove(cls, lines, 0):>9.4f}s"
+                f" {remove(cls, lines, n - 1):>9.4f}s"
+                f" {rebuild(cls, lines, 0):>9.4f}s"
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -255,32 +255,25 @@ class DrawProofInductiveCase(Scene):
         last_line_x = segment_intersection(*zone_line, *all_lines[-1])[0]
         last_line = (point(last_line_x, -MAX_Y), point(last_line_x, MAX_Y))
 
-        # Keep track of edges of rightmost polygon in the zone
-        last_polygon = self.bps.find_zone(zone_line)[-1]
-        before_add_edges = {
-            (tuple(last_polygon[i]), tuple(last_polygon[i + 1]))
-            for i in range(len(last_polygon))
-        }
-
         # Add the rightmost line
+        last_id = len(self.bps.lines)
         self.bps.add_line(last_line)
         self.play(ShowCreation(Line(*last_line)))
 
-        # Keep track of edges of rightmost polygon in the zone
-        last_polygon = self.bps.find_zone(zone_line)[-1]
-        after_add_edges = {
-            (tuple(last_polygon[i]), tuple(last_polygon[i + 1]))
-            for i in range(len(last_polygon))
-        }
-
-        # The difference in edges are the added left edges
-        for line in after_add_edges - before_add_edges:
-            # This edge is the 1 added by the line itself
-            if round(line[0][0] - line[1][0], 7) == 0:
-                self.play(ShowCreation(Line(*line, color=GREEN, stroke_width=10)))
-            # These edges are the 2 added by subdividing above and below lines
-            else:
-                self.play(ShowCreation(Line(*line, color=YELLOW, stroke_width=10)))
+        # The edge of the added line that crosses the zone line goes up, so
+        # the rightmost polygon in the zone is the face to its right. Going
+        # around that face, the edges just before and after it are the
+        # pieces of the edges the line split above and below.
+        added = next(h for h in self.bps.edges_of_line(last_id) if h.twin.point[1] >= 0)
+        self.play(
+            ShowCreation(
+                Line(added.point, added.twin.point, color=GREEN, stroke_width=10)
+            )
+        )
+        for h in (added.link, added.prev):
+            self.play(
+                ShowCreation(Line(h.point, h.twin.point, color=YELLOW, stroke_width=10))
+            )
 
         self.wait(3)
         self.clear()
@@ -81,8 +81,7 @@ class DrawBoundingEdges(Scene):
         self.play(ShowCreation(red_line))
 
         # Get min and max y points that separate polygon into left and right bounding edges
-        min_y = min(self.polygon, key=lambda p: p[1])
-        max_y = max(self.polygon, key=lambda p: p[1])
+        min_y, max_y = self.polygon.lowest, self.polygon.highest
 
         # Create horizontal lines at these points
         top_line = DashedLine(point(-MAX_X, max_y[1]), point(MAX_X, max_y[1]))
@@ -0,0 +1,499 @@
+"""
+Builds the whole DCEL of an arrangement of lines in one batch of NumPy
+operations, instead of inserting the lines one at a time like
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_line`.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from dataclasses import dataclass
+
+from numpy import arange, arctan2, argsort, array, bincount, concatenate, empty
+from numpy import errstate, flatnonzero, full, int64, lexsort, min_scalar_type
+from numpy import minimum, ndarray, ones, roll, searchsorted, where, zeros
+
+from .half_edge import BOUNDARY_LINES
+from .utils import EPSILON, line_through
+
+# Upper bound on how many line pairs to intersect in one vectorized block
+BLOCK_SIZE = 1 << 22
+
+# Faces with more half edges than this are labeled by pointer jumping, rather
+# than by walking around them
+MAX_FACE_WALK = 32
+
+# How many half edges walk around their faces at once
+FACE_WALK_BLOCK = 1 << 20
+
+
+@dataclass
+class ArrangementArrays:
+    """
+    Columns describing the DCEL of an arrangement of lines in a bounding box,
+    using the same layout as
+    :class:`src.data_structures.array_subdivision.HalfEdgeArrays`.
+    """
+
+    coords: ndarray
+    """(V,2) array of vertex coordinates"""
+
+    crossing: ndarray
+    """(V,2) array of the ids of two lines that cross at each vertex, or -1
+    for vertices on the bounding box"""
+
+    origin: ndarray
+    """Vertex each half edge comes out of"""
+
+    twin: ndarray
+    """Twin of each half edge"""
+
+    link: ndarray
+    """Next half edge in the same face as each half edge"""
+
+    prev: ndarray
+    """Previous half edge in the same face as each half edge"""
+
+    line: ndarray
+    """Index of the line each half edge lies on, or one of
+    :data:`src.data_structures.half_edge.BOUNDARY_LINES` for the sides of the
+    bounding box"""
+
+    face: ndarray
+    """Id of the face each half edge is in. The face outside of the bounding
+    box is 0."""
+
+    handle: ndarray
+    """A half edge coming out of each vertex. For vertices on the bounding box,
+    this is the boundary half edge going CCW around the box."""
+
+    face_handle: ndarray
+    """A half edge in each face"""
+
+    boundary: ndarray
+    """Vertices on the bounding box in CCW order, starting at the bottom left
+    corner"""
+
+
+def line_crossings(lines: ndarray, bottom_left: ndarray, top_right: ndarray):
+    """
+    Find every pair of lines that cross strictly inside the bounding box.
+    Pairs are intersected in vectorized blocks of rows.
+
+    :param ndarray lines: An (n,2,2) array holding the two endpoints of each
+        line, which are on the bounding box
+    :param ndarray bottom_left: bottom left point of bounding box
+    :param ndarray top_right: top right point of bounding box
+    :return: Arrays i, j, t_i, t_j, xy, where lines i and j cross at the point
+        xy, which is ``t_i`` of the way along line i and ``t_j`` of the way
+        along line j. Each xy is the same as
+        :func:`src.data_structures.utils.line_meet` of the two lines.
+    :rtype: tuple[numpy.ndarray]
+    """
+
+    p = lines[:, 0]
+    d = lines[:, 1] - lines[:, 0]
+    n = len(lines)
+
+    # Homogeneous coefficients of each line
+    z = ones((n, 1))
+    k = line_through(concatenate((p, z), axis=1), concatenate((lines[:, 1], z), axis=1))
+
+    block = max(1, BLOCK_SIZE // max(n, 1))
+    i, j, ti, tj, xy = [], [], [], [], []
+    for start in range(0, n, block):
+        rows = arange(start, min(start + block, n))
+
+        # Only look at each pair once, so a row only needs the lines from its
+        # own onwards
+        cols = arange(start, n)
+
+        # The crossing itself is the cross product of the line coefficients,
+        # the same as line_meet, so it matches the one found by add_line bit
+        # for bit
+        ki, kj = k[rows, None], k[None, start:]
+        with errstate(divide="ignore", invalid="ignore"):
+            w = ki[..., 0] * kj[..., 1] - ki[..., 1] * kj[..., 0]
+            x = (ki[..., 1] * kj[..., 2] - ki[..., 2] * kj[..., 1]) / w
+            y = (ki[..., 2] * kj[..., 0] - ki[..., 0] * kj[..., 2]) / w
+        del w
+
+        # Only keep pairs that cross inside the box
+        mask = cols[None, :] > rows[:, None]
+        mask &= (x > bottom_left[0] + EPSILON) & (x < top_right[0] - EPSILON)
+        mask &= (y > bottom_left[1] + EPSILON) & (y < top_right[1] - EPSILON)
+        r, c = mask.nonzero()
+        del mask
+
+        xy_block = empty((len(r), 2))
+        xy_block[:, 0], xy_block[:, 1] = x[r, c], y[r, c]
+        del x, y
+        r, c = rows[r], cols[c]
+
+        # Solve p_i + t_i d_i = p_j + t_j d_j with 2D cross products, only for
+        # the pairs that were kept
+        pij = p[c] - p[r]
+        denom = d[r, 0] * d[c, 1] - d[r, 1] * d[c, 0]
+        keep = denom != 0
+        with errstate(divide="ignore", invalid="ignore"):
+            ti_block = (pij[:, 0] * d[c, 1] - pij[:, 1] * d[c, 0]) / denom
+            tj_block = (pij[:, 0] * d[r, 1] - pij[:, 1] * d[r, 0]) / denom
+
+        i.append(r[keep])
+        j.append(c[keep])
+        ti.append(ti_block[keep])
+        tj.append(tj_block[keep])
+        xy.append(xy_block[keep])
+
+    if not xy:
+        no_lines = empty(0, dtype=int64)
+        return no_lines, no_lines, empty(0), empty(0), empty((0, 2))
+
+    return (
+        concatenate(i),
+        concatenate(j),
+        concatenate(ti),
+        concatenate(tj),
+        concatenate(xy),
+    )
+
+
+def _merge_close(n: int, a: ndarray, b: ndarray) -> tuple:
+    """
+    Merge points that are connected by pairs of close points, keeping the
+    lowest index of each group.
+
+    :param int n: Number of points
+    :param ndarray a: One point of each close pair
+    :param ndarray b: Other point of each close pair
+    :return: The id of each point after merging, and the index of the point
+        that each id keeps.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    label = arange(n)
+
+    # Every pair pulls both its points down to the smaller label, until all
+    # connected points agree
+    while len(a):
+        smaller = minimum(label[a], label[b])
+        minimum.at(label, a, smaller)
+        minimum.at(label, b, smaller)
+        while (label[label] != label).any():
+            label = label[label]
+
+        apart = label[a] != label[b]
+        a, b = a[apart], b[apart]
+
+    kept = flatnonzero(label == arange(n))
+    new_id = empty(n, dtype=int64)
+    new_id[kept] = arange(len(kept))
+
+    return new_id[label], kept
+
+
+def _boundary_order(coords: ndarray, bottom_left: ndarray, top_right: ndarray):
+    """
+    :return: Distance from the bottom left corner going CCW around the
+        bounding box for each point in coords, which are on the bounding box.
+    :rtype: numpy.ndarray
+    """
+
+    (x0, y0), (x1, y1) = bottom_left[:2], top_right[:2]
+    w, h = x1 - x0, y1 - y0
+    x, y = coords[:, 0], coords[:, 1]
+
+    # Same side rules as BoundedPolygonalSubdivision._boundary_position
+    key = 2 * w + h + (y1 - y)  # left side
+    top = (abs(y - y1) <= EPSILON) & (x > x0 + EPSILON)
+    right = (abs(x - x1) <= EPSILON) & (y < y1 - EPSILON)
+    bottom = (abs(y - y0) <= EPSILON) & (x < x1 - EPSILON)
+    key[top] = (w + h + (x1 - x))[top]
+    key[right] = (w + (y - y0))[right]
+    key[bottom] = (x - x0)[bottom]
+
+    return key
+
+
+def boundary_sides(coords: ndarray, bottom_left: ndarray, top_right: ndarray):
+    """
+    :return: The line id from :data:`src.data_structures.half_edge.BOUNDARY_LINES`
+        of the side of the bounding box each point in coords is on. Corners
+        are on the side that starts at them, going CCW.
+    :rtype: numpy.ndarray
+    """
+
+    (x0, y0), (x1, y1) = bottom_left[:2], top_right[:2]
+    w, h = x1 - x0, y1 - y0
+    key = _boundary_order(coords, bottom_left, top_right)
+    side = searchsorted([w, w + h, 2 * w + h], key, side="right")
+    return array(BOUNDARY_LINES, dtype=int64)[side]
+
+
+def build_arrangement(bottom_left: ndarray, top_right: ndarray, lines: list):
+    """
+    Build the DCEL of an arrangement of lines inside a bounding box.
+
+    1. Intersect all pairs of lines with :func:`line_crossings`.
+    2. Sort the crossings along each line, and the points along the bounding
+       box, which gives the edges. Points next to each other that are within
+       :data:`src.data_structures.utils.EPSILON` are merged into one vertex.
+    3. The next half edge after h is the one that comes CCW after h's twin
+       around h's destination. Where exactly two lines cross, that only
+       depends on which way they cross. At all other vertices, the half edges
+       coming out of the vertex are sorted by angle.
+
+    The result has the same faces as inserting the lines one at a time with
+    :func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_line`.
+
+    :param ndarray bottom_left: bottom left point of bounding box
+    :param ndarray top_right: top right point of bounding box
+    :param list[tuple[ndarray]] lines: Lines to add, each a tuple of two points
+        on the bounding box
+    :return: Columns of the DCEL
+    :rtype: ArrangementArrays
+    """
+
+    n = len(lines)
+    segments = array([(a[:2], b[:2]) for a, b in lines], dtype=float).reshape(n, 2, 2)
+    i, j, ti, tj, xy = line_crossings(segments, bottom_left, top_right)
+    k = len(xy)
+
+    # Points on the boundary are the corners and the line endpoints. Then
+    # come the crossings.
+    (x0, y0), (x1, y1) = bottom_left[:2], top_right[:2]
+    corners = array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], dtype=float)
+    n_boundary = 4 + 2 * n
+    points = concatenate((corners, segments.reshape(-1, 2), xy))
+
+    # Every place a line meets a point, as (line, distance along line, point),
+    # sorted by line and then by distance along the line
+    on_line = concatenate((arange(n), arange(n), i, j))
+    along = concatenate((zeros(n), ones(n), ti, tj))
+    at = concatenate(
+        (
+            arange(4, n_boundary, 2),
+            arange(5, n_boundary, 2),
+            arange(n_boundary, n_boundary + k),
+            arange(n_boundary, n_boundary + k),
+        )
+    )
+    order = argsort(along)
+    order = order[argsort(on_line[order].astype(_line_dtype(n)), kind="stable")]
+    on_line, at = on_line[order], at[order]
+    same_line = on_line[1:] == on_line[:-1]
+
+    # Arrays as long as the number of crossings are most of the memory used
+    # for a big arrangement, so each one is freed once it isn't needed
+    del along, ti, tj
+
+    # Points going CCW around the bounding box
+    boundary = arange(n_boundary)
+    boundary = boundary[
+        argsort(
+            _boundary_order(points[boundary], bottom_left, top_right), kind="stable"
+        )
+    ]
+
+    # Points that are next to each other on a line or on the boundary and
+    # within EPSILON of each other are the same vertex
+    a = concatenate((at[:-1][same_line], boundary))
+    b = concatenate((at[1:][same_line], roll(boundary, -1)))
+    close = (abs(points[a] - points[b]) <= EPSILON).all(axis=1)
+    ids, kept = _merge_close(len(points), a[close], b[close])
+    del a, b, close
+    coords = points[kept]
+    del points, xy
+    crossing = full((len(kept), 2), -1, dtype=int64)
+    inside = kept >= n_boundary
+    crossing[inside, 0] = i[kept[inside] - n_boundary]
+    crossing[inside, 1] = j[kept[inside] - n_boundary]
+
+    at = ids[at]
+    boundary = ids[boundary]
+    boundary = boundary[boundary != roll(boundary, 1)]
+    n_vertices, n_boundary_edges = len(coords), len(boundary)
+
+    # Consecutive vertices on the same line are edges. Edge m goes forward
+    # along its line from at[step[m]] to at[step[m] + 1], and edge_at[p] is
+    # the edge going forward from position p.
+    step = flatnonzero(same_line & (at[1:] != at[:-1]))
+    edge_at = full(len(at), -1, dtype=int64)
+    edge_at[step] = arange(len(step))
+    del same_line
+
+    # Half edge 2e goes forward along edge e, and half edge 2e + 1 goes back.
+    # The boundary edges come first and go CCW around the bounding box.
+    n_half_edges = 2 * (n_boundary_edges + len(step))
+    origin = empty(n_half_edges, dtype=int64)
+    origin[0 : 2 * n_boundary_edges : 2] = boundary
+    origin[1 : 2 * n_boundary_edges : 2] = roll(boundary, -1)
+    origin[2 * n_boundary_edges :: 2] = at[step]
+    origin[2 * n_boundary_edges + 1 :: 2] = at[step + 1]
+    twin = arange(n_half_edges) ^ 1
+
+    link = empty(n_half_edges, dtype=int64)
+    handle = empty(n_vertices, dtype=int64)
+
+    # Most vertices are where exactly two lines cross. Around such a vertex,
+    # which way to turn only depends on which way the lines cross, so we can
+    # find the next half edge without sorting anything.
+    degree = bincount(at, minlength=n_vertices)
+    special = degree != 2
+    special[boundary] = True
+
+    c = flatnonzero(~special[ids[n_boundary:]])
+    position = empty(len(at), dtype=int64)
+    position[order] = arange(len(at))
+    pi, pj = position[2 * n + c], position[2 * n + k + c]
+    del order, at, position, degree
+
+    forward = 2 * (n_boundary_edges + edge_at)
+    out_i, back_i = forward[pi], forward[pi - 1] + 1
+    out_j, back_j = forward[pj], forward[pj - 1] + 1
+    del forward, edge_at, pi, pj
+
+    di, dj = (
+        segments[i[c], 1] - segments[i[c], 0],
+        segments[j[c], 1] - segments[j[c], 0],
+    )
+    left = di[:, 0] * dj[:, 1] - di[:, 1] * dj[:, 0] > 0
+
+    # Arriving forward along one line turns onto the other line, and arriving
+    # backward turns the other way
+    link[back_i ^ 1] = where(left, back_j, out_j)
+    link[out_i ^ 1] = where(left, out_j, back_j)
+    link[back_j ^ 1] = where(left, out_i, back_i)
+    link[out_j ^ 1] = where(left, back_i, out_i)
+    handle[ids[n_boundary + c]] = out_i
+    del ids, c, di, dj, left, out_i, back_i, out_j, back_j
+
+    # Everywhere else, sort the half edges coming out of the vertex CCW and
+    # find the next one CCW after each half edge
+    leaving = flatnonzero(special[origin])
+    delta = coords[origin[twin[leaving]]] - coords[origin[leaving]]
+    leaving = leaving[lexsort((arctan2(delta[:, 1], delta[:, 0]), origin[leaving]))]
+
+    group = origin[leaving]
+    first = flatnonzero(concatenate(([True], group[1:] != group[:-1])))
+    last = concatenate((first[1:], [len(leaving)])) - 1
+    ccw_next = roll(leaving, -1)
+    ccw_next[last] = leaving[first]
+
+    link[twin[leaving]] = ccw_next
+    handle[group[first]] = leaving[first]
+    del leaving, delta, group, first, last, ccw_next, special
+
+    prev = empty(n_half_edges, dtype=int64)
+    prev[link] = arange(n_half_edges)
+
+    # Both halves of an edge lie on the same line. A boundary edge lies on
+    # the side its middle is on.
+    line = full(n_half_edges, -1, dtype=int64)
+    line[2 * n_boundary_edges :] = on_line[step].repeat(2)
+    del on_line, step
+    line[: 2 * n_boundary_edges] = boundary_sides(
+        (coords[boundary] + coords[roll(boundary, -1)]) / 2, bottom_left, top_right
+    ).repeat(2)
+
+    # Boundary vertices get their CCW boundary half edge as a handle
+    handle[boundary] = arange(0, 2 * n_boundary_edges, 2)
+
+    face, face_handle = label_faces(link)
+
+    return ArrangementArrays(
+        coords,
+        crossing,
+        origin,
+        twin,
+        link,
+        prev,
+        line,
+        face,
+        handle,
+        face_handle,
+        boundary,
+    )
+
+
+def label_faces(link: ndarray) -> tuple:
+    """
+    Give every face of a DCEL an id, numbering the faces in order of the
+    smallest half edge in them.
+
+    Every half edge first walks around its face one step at a time, keeping
+    the smallest half edge it passes, until it gets back to itself. Most faces
+    only have a few half edges, so this labels them in a few steps. Half edges
+    in faces longer than :data:`MAX_FACE_WALK` are labeled by pointer jumping
+    instead, taking the smaller label of themselves and the half edge
+    :math:`2^k` steps ahead of them. After k steps, each label covers the next
+    :math:`2^k` half edges around the face, so it stops changing once it
+    covers the whole face.
+
+    :param ndarray link: Next half edge in the same face as each half edge
+    :return: The face id of each half edge, and the smallest half edge in each
+        face
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    n = len(link)
+    label = empty(n, dtype=int64)
+    long_faces = []
+    for first in range(0, n, FACE_WALK_BLOCK):
+        start = arange(first, min(first + FACE_WALK_BLOCK, n))
+        smallest, ahead = start, link[start]
+        for _ in range(MAX_FACE_WALK):
+            back = ahead == start
+            label[start[back]] = smallest[back]
+            if back.all():
+                break
+
+            rest = ~back
+            start, smallest = start[rest], minimum(smallest[rest], ahead[rest])
+            ahead = link[ahead[rest]]
+        else:
+            long_faces.append(start)
+
+    if not long_faces:
+        return _number_faces(label)
+
+    # Every half edge of a face gets back to itself on the same step, so the
+    # ones left are whole faces. Renumber them 0, 1, 2, ... to jump around.
+    start = concatenate(long_faces)
+    jump = searchsorted(start, link[start])
+    smallest = start.copy()
+    while True:
+        ahead = smallest[jump]
+        if (ahead >= smallest).all():
+            break
+        minimum(smallest, ahead, out=smallest)
+        jump = jump[jump]
+
+    label[start] = smallest
+    return _number_faces(label)
+
+
+def _number_faces(label: ndarray) -> tuple:
+    """
+    :param ndarray label: The smallest half edge in the face of each half edge
+    :return: The face id of each half edge, and the smallest half edge in each
+        face
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    # The smallest half edge in a face is the only one labeled with itself.
+    # Those come out in order, so they can be numbered without sorting all
+    # the labels.
+    face_handle = flatnonzero(label == arange(len(label)))
+    number = empty(len(label), dtype=int64)
+    number[face_handle] = arange(len(face_handle))
+    return number[label], face_handle
+
+
+def _line_dtype(n: int):
+    """
+    :return: The smallest unsigned integer type that can hold n line indices,
+        which lets NumPy use a radix sort on them.
+    """
+
+    return min_scalar_type(max(n - 1, 0))
@@ -0,0 +1,473 @@
+"""
+Contains a struct-of-arrays backend for
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`.
+Instead of one Python object per
+:class:`src.data_structures.half_edge.HalfEdge`, every half edge is a row in a
+few integer columns, and every vertex is a row in one float array.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from collections.abc import Sequence
+
+from numpy import arange, array, empty, flatnonzero, full, int32, ndarray
+
+from .arrangement import ArrangementArrays
+from .half_edge import HalfEdge
+from .polygonal_subdivision import BoundedPolygonalSubdivision
+from .vertex_index import VertexIndex
+
+# Integer type used for all half edge and vertex indices
+INDEX_DTYPE = int32
+
+# Index used for pointers that haven't been set yet
+NO_INDEX = -1
+
+
+class HalfEdgeArrays:
+    """
+    Growable columns holding a whole DCEL.
+
+    Half edge :math:`i` comes out of vertex ``origin[i]``, lies on line
+    ``line[i]``, is in face ``face[i]``, and is linked to the half edges
+    ``twin[i]``, ``link[i]``, and ``prev[i]``. Vertex :math:`v` sits
+    at ``coords[v]`` and has ``handle[v]`` as one of the half edges coming out
+    of it. Face :math:`f` has ``face_handle[f]`` as one of its half edges.
+    Columns are allocated with spare capacity and doubled when full, so
+    adding a row is amortized constant time. Rows of removed half edges have
+    every column set to NO_INDEX, and are reused by the next half edges that
+    are added.
+    """
+
+    def __init__(self, capacity: int = 16):
+        """
+        Create empty columns.
+
+        :param int capacity: Number of half edges and vertices to make room for
+            up front.
+        """
+
+        self.n_half_edges = 0
+        self.free = []
+
+        self.origin = empty(capacity, dtype=INDEX_DTYPE)
+        self.twin = empty(capacity, dtype=INDEX_DTYPE)
+        self.link = empty(capacity, dtype=INDEX_DTYPE)
+        self.prev = empty(capacity, dtype=INDEX_DTYPE)
+        self.line = empty(capacity, dtype=INDEX_DTYPE)
+        self.face = empty(capacity, dtype=INDEX_DTYPE)
+
+        self.vertices = VertexIndex(capacity)
+        self.handle = empty(capacity, dtype=INDEX_DTYPE)
+
+        self.face_handle = empty(capacity, dtype=INDEX_DTYPE)
+
+    @classmethod
+    def from_arrangement(cls, arrangement: ArrangementArrays) -> "HalfEdgeArrays":
+        """
+        Create columns holding a DCEL built by
+        :func:`src.data_structures.arrangement.build_arrangement`.
+
+        :param ArrangementArrays arrangement: Columns of the DCEL
+        :return: New columns holding the same DCEL
+        :rtype: HalfEdgeArrays
+        """
+
+        store = cls(capacity=0)
+        store.n_half_edges = len(arrangement.origin)
+
+        store.origin = arrangement.origin.astype(INDEX_DTYPE)
+        store.twin = arrangement.twin.astype(INDEX_DTYPE)
+        store.link = arrangement.link.astype(INDEX_DTYPE)
+        store.prev = arrangement.prev.astype(INDEX_DTYPE)
+        store.line = arrangement.line.astype(INDEX_DTYPE)
+        store.face = arrangement.face.astype(INDEX_DTYPE)
+
+        store.vertices = VertexIndex.from_coords(
+            arrangement.coords, arrangement.crossing
+        )
+        store.handle = arrangement.handle.astype(INDEX_DTYPE)
+
+        store.face_handle = arrangement.face_handle.astype(INDEX_DTYPE)
+
+        return store
+
+    @property
+    def coords(self) -> ndarray:
+        """(V,2) array of vertex coordinates, from :attr:`vertices`"""
+
+        return self.vertices.coords
+
+    @property
+    def n_vertices(self) -> int:
+        """Number of vertices"""
+
+        return len(self.vertices)
+
+    @staticmethod
+    def _grown(column: ndarray, size: int) -> ndarray:
+        """
+        :return: A copy of column with room for at least size rows
+        :rtype: numpy.ndarray
+        """
+
+        new = empty((max(size, 2 * len(column)),) + column.shape[1:], column.dtype)
+        new[: len(column)] = column
+        return new
+
+    def add_vertex(self, x: float, y: float) -> int:
+        """
+        Get the index of the vertex at (x, y), adding it if it's new. Points
+        within EPSILON of a vertex are that vertex.
+
+        :param float x: x coordinate of the vertex
+        :param float y: y coordinate of the vertex
+        :return: Index of the vertex
+        :rtype: int
+        """
+
+        n = self.n_vertices
+        v = self.vertices.add(x, y)
+        if v == n:
+            if v == len(self.handle):
+                self.handle = self._grown(self.handle, v + 1)
+
+            self.handle[v] = NO_INDEX
+
+        return v
+
+    def add_half_edge(self, origin: int) -> int:
+        """
+        Add a new half edge coming out of a vertex. All its pointers are unset.
+
+        :param int origin: Index of the vertex the half edge comes out of
+        :return: Index of the new half edge
+        :rtype: int
+        """
+
+        if self.free:
+            i = self.free.pop()
+            self.origin[i] = origin
+            return i
+
+        i = self.n_half_edges
+        if i == len(self.origin):
+            self.origin = self._grown(self.origin, i + 1)
+            self.twin = self._grown(self.twin, i + 1)
+            self.link = self._grown(self.link, i + 1)
+            self.prev = self._grown(self.prev, i + 1)
+            self.line = self._grown(self.line, i + 1)
+            self.face = self._grown(self.face, i + 1)
+
+        self.origin[i] = origin
+        self.twin[i] = self.link[i] = self.prev[i] = NO_INDEX
+        self.line[i] = self.face[i] = NO_INDEX
+        self.n_half_edges += 1
+
+        return i
+
+    def remove_half_edge(self, i: int):
+        """
+        Remove a half edge, leaving its row free to be reused.
+
+        :param int i: Index of the half edge to remove
+        """
+
+        self.origin[i] = self.twin[i] = self.link[i] = self.prev[i] = NO_INDEX
+        self.line[i] = self.face[i] = NO_INDEX
+        self.free.append(i)
+
+    def live_rows(self) -> ndarray:
+        """
+        :return: Indices of the half edges that haven't been removed
+        :rtype: numpy.ndarray
+        """
+
+        return flatnonzero(self.origin[: self.n_half_edges] != NO_INDEX)
+
+    def nbytes(self) -> int:
+        """
+        :return: Number of bytes used by the rows that are in use, and by the
+            hash table that :attr:`vertices` finds points with
+        :rtype: int
+        """
+
+        per_half_edge = sum(
+            c.itemsize
+            for c in (
+                self.origin,
+                self.twin,
+                self.link,
+                self.prev,
+                self.line,
+                self.face,
+            )
+        )
+        per_vertex = (
+            self.coords.itemsize * 2
+            + self.vertices.lines.itemsize * 2
+            + self.handle.itemsize
+        )
+
+        n_half_edges = self.n_half_edges - len(self.free)
+        n_vertices = self.n_vertices - len(self.vertices.free)
+        return (
+            n_half_edges * per_half_edge
+            + n_vertices * per_vertex
+            + self.vertices.nbytes()
+        )
+
+
+class ArrayHalfEdge:
+    """
+    A lightweight view of one row of :class:`HalfEdgeArrays` that behaves like
+    a :class:`src.data_structures.half_edge.HalfEdge`. Views are created on
+    demand and hold nothing but the row index, so two views of the same row
+    compare equal but aren't the same object.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: HalfEdgeArrays, index: int):
+        """
+        :param HalfEdgeArrays store: Columns holding the half edge
+        :param int index: Row of the half edge in store
+        """
+
+        self.store = store
+        self.index = int(index)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ArrayHalfEdge)
+            and self.index == other.index
+            and self.store is other.store
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.index)
+
+    def __repr__(self) -> str:
+        return f"ArrayHalfEdge(index={self.index}, point={self.point})"
+
+    @property
+    def point(self) -> ndarray:
+        """Point in subdivision from which this HalfEdge originates"""
+
+        x, y = self.store.coords[self.store.origin[self.index]]
+        return array((x, y, 1.0))
+
+    @property
+    def twin(self) -> "ArrayHalfEdge":
+        """Other HalfEdge defining the same edge as this HalfEdge"""
+
+        return ArrayHalfEdge(self.store, self.store.twin[self.index])
+
+    @twin.setter
+    def twin(self, h: "ArrayHalfEdge"):
+        self.store.twin[self.index] = h.index
+
+    @property
+    def link(self) -> "ArrayHalfEdge":
+        """Next HalfEdge in same Polygon as this HalfEdge"""
+
+        return ArrayHalfEdge(self.store, self.store.link[self.index])
+
+    @link.setter
+    def link(self, h: "ArrayHalfEdge"):
+        self.store.link[self.index] = h.index
+
+    @property
+    def prev(self) -> "ArrayHalfEdge":
+        """Previous HalfEdge in same Polygon as this HalfEdge"""
+
+        return ArrayHalfEdge(self.store, self.store.prev[self.index])
+
+    @prev.setter
+    def prev(self, h: "ArrayHalfEdge"):
+        self.store.prev[self.index] = h.index
+
+    @property
+    def vertex(self) -> int:
+        """Index of the vertex this HalfEdge comes out of"""
+
+        return int(self.store.origin[self.index])
+
+    @property
+    def line(self) -> int:
+        """Index of the line this HalfEdge lies on, one of
+        :data:`src.data_structures.half_edge.BOUNDARY_LINES` for the sides of
+        the bounding box, or None if it isn't set yet"""
+
+        line = self.store.line[self.index]
+        return None if line == NO_INDEX else int(line)
+
+    @line.setter
+    def line(self, line: int):
+        self.store.line[self.index] = NO_INDEX if line is None else line
+
+    @property
+    def face(self) -> int:
+        """Id of the face this HalfEdge is in"""
+
+        face = self.store.face[self.index]
+        return None if face == NO_INDEX else int(face)
+
+    @face.setter
+    def face(self, face: int):
+        self.store.face[self.index] = NO_INDEX if face is None else face
+
+    convex_faces = HalfEdge.convex_faces
+    get_polygon = HalfEdge.get_polygon
+
+
+class ArrayHalfEdges(Sequence):
+    """
+    Sequence view of all the half edges of a :class:`HalfEdgeArrays`, where
+    item :math:`i` is the :class:`ArrayHalfEdge` of row :math:`i`, or of row
+    ``rows[i]`` if only some rows are in the view.
+    """
+
+    def __init__(self, store: HalfEdgeArrays, rows: ndarray = None):
+        """
+        :param HalfEdgeArrays store: Columns holding the half edges
+        :param ndarray rows: Rows to view, in order. By default, every row is.
+        """
+
+        self.store = store
+        self.rows = rows
+
+    def __getitem__(self, i: int) -> ArrayHalfEdge:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        return ArrayHalfEdge(self.store, i if self.rows is None else int(self.rows[i]))
+
+    def __len__(self) -> int:
+        return self.store.n_half_edges if self.rows is None else len(self.rows)
+
+
+class ArrayBoundedPolygonalSubdivision(BoundedPolygonalSubdivision):
+    """
+    A :class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`
+    that keeps its half edges in a :class:`HalfEdgeArrays` instead of as
+    separate :class:`src.data_structures.half_edge.HalfEdge` objects. It has
+    the same API, but hands out :class:`ArrayHalfEdge` views wherever the
+    object backend would hand out a HalfEdge.
+
+    A half edge costs a few integers instead of a Python object holding an
+    ndarray, which makes large arrangements fit in a small fraction of the
+    memory.
+    """
+
+    def __init__(self, bottom_left: ndarray, top_right: ndarray):
+        """
+        Given the bottom-left and top-right points defining the bounding box,
+        initialize the bounded polygonal subdivision.
+
+        :param ndarray bottom_left: bottom left point of bounding box
+        :param ndarray top_right: top right point of bounding box
+        """
+
+        self.store = HalfEdgeArrays()
+        super().__init__(bottom_left, top_right)
+
+    def _new_vertex_index(self) -> VertexIndex:
+        return self.store.vertices
+
+    def _vertex_handle(self, v: int) -> ArrayHalfEdge:
+        if v is None or v >= self.store.n_vertices or self.store.handle[v] == NO_INDEX:
+            return None
+
+        return ArrayHalfEdge(self.store, self.store.handle[v])
+
+    def _set_vertex_handle(self, v: int, h: ArrayHalfEdge):
+        self.store.handle[v] = NO_INDEX if h is None else h.index
+
+    def _handled_vertices(self) -> list:
+        handle = self.store.handle[: self.store.n_vertices]
+        return flatnonzero(handle != NO_INDEX).tolist()
+
+    def _face_handle(self, f: int) -> ArrayHalfEdge:
+        return ArrayHalfEdge(self.store, self.store.face_handle[f])
+
+    def _set_face_handle(self, f: int, h: ArrayHalfEdge):
+        if f == len(self.store.face_handle):
+            self.store.face_handle = self.store._grown(self.store.face_handle, f + 1)
+
+        self.store.face_handle[f] = h.index
+
+    def _new_half_edge(self, p: ndarray) -> ArrayHalfEdge:
+        v = self.store.add_vertex(float(p[0]), float(p[1]))
+        return ArrayHalfEdge(self.store, self.store.add_half_edge(v))
+
+    def _face_edges(self, h: ArrayHalfEdge) -> tuple:
+        # Walk the link column directly and gather coordinates in one go
+        link, origin = self.store.link, self.store.origin
+
+        indices = [h.index]
+        cur = link[h.index]
+        while cur != h.index:
+            indices.append(cur)
+            cur = link[cur]
+
+        indices = array(indices)
+        edges = empty((len(indices), 2, 3))
+        edges[:, 0, :2] = self.store.coords[origin[indices]]
+        edges[:, 1, :2] = self.store.coords[origin[link[indices]]]
+        edges[:, :, 2] = 1
+
+        return [ArrayHalfEdge(self.store, i) for i in indices], edges
+
+    def _load_arrangement(self, arrangement: ArrangementArrays):
+        # The columns are already in the right layout, so just adopt them
+        self.store = HalfEdgeArrays.from_arrangement(arrangement)
+        self.vertices = self.store.vertices
+        self.n_faces = len(arrangement.face_handle)
+        self._face_cache = dict()
+        self._index_boundary(
+            [
+                ArrayHalfEdge(self.store, h)
+                for h in arrangement.handle[arrangement.boundary]
+            ]
+        )
+
+    def _remove_half_edge(self, h: ArrayHalfEdge):
+        self.store.remove_half_edge(h.index)
+
+    def _half_edge_columns(self) -> tuple:
+        # Half edges are already numbered by their row
+        n = self.store.n_half_edges
+        if not self.store.free:
+            origin = self.store.origin[:n]
+            return (
+                ArrayHalfEdges(self.store),
+                self.store.twin[:n],
+                self.store.link[:n],
+                self.store.line[:n],
+                self.store.coords[origin],
+            )
+
+        # Unless some rows were removed, in which case the rest are numbered
+        # in order, skipping the removed ones
+        rows = self.store.live_rows()
+        number = full(n, NO_INDEX, dtype=INDEX_DTYPE)
+        number[rows] = arange(len(rows))
+        return (
+            ArrayHalfEdges(self.store, rows),
+            number[self.store.twin[rows]],
+            number[self.store.link[rows]],
+            self.store.line[rows],
+            self.store.coords[self.store.origin[rows]],
+        )
+
+    def _locator_handle(self, h: ArrayHalfEdge) -> int:
+        # The point location index stores rows rather than views
+        return h.index
+
+    def _locator_handles(self, half_edges: ArrayHalfEdges, picks: ndarray) -> list:
+        return (picks if half_edges.rows is None else half_edges.rows[picks]).tolist()
+
+    def _located_half_edge(self, handle: int) -> ArrayHalfEdge:
+        return ArrayHalfEdge(self.store, handle)
@@ -0,0 +1,186 @@
+"""
+Contains a snap rounded mode of
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`,
+where every vertex is on a fixed grid.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from dataclasses import replace
+from math import floor
+
+from numpy import array, int64, ndarray
+
+from .arrangement import ArrangementArrays
+from .half_edge import HalfEdge
+from .point import point
+from .point_location import SlabLocator
+from .polygonal_subdivision import BoundedPolygonalSubdivision
+from .snap_rounding import MAX_GRID, snap_round
+
+
+class GridHalfEdge(HalfEdge):
+    """
+    A HalfEdge of a :class:`GridBoundedPolygonalSubdivision`, whose faces
+    aren't always convex, so their polygons use the general containment tests.
+    """
+
+    __slots__ = ()
+
+    convex_faces = False
+
+
+class GridBoundedPolygonalSubdivision(BoundedPolygonalSubdivision):
+    """
+    A :class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`
+    whose vertices are all on a grid with ``resolution`` points per unit,
+    starting at the bottom left corner. Line endpoints are rounded to the
+    grid, and the arrangement is built by
+    :func:`src.data_structures.snap_rounding.snap_round`, which does all of
+    its geometry in exact integer arithmetic. Crossings that round to the
+    same grid point are one vertex, so there can be far fewer vertices than
+    with floating point coordinates.
+
+    Edges are bent to go through the grid points they pass close to, so
+    lines are paths rather than straight edges. Adding a line can bend the
+    lines that are already there, so :func:`add_line` and :func:`remove_line`
+    rebuild the whole arrangement, like :func:`add_lines`. Bent edges also mean faces aren't
+    always convex.
+    """
+
+    convex_faces = False
+    half_edge_type = GridHalfEdge
+
+    def __init__(self, bottom_left: ndarray, top_right: ndarray, resolution=1):
+        """
+        Given the bottom-left and top-right points defining the bounding box,
+        initialize the bounded polygonal subdivision.
+
+        :param ndarray bottom_left: bottom left point of bounding box
+        :param ndarray top_right: top right point of bounding box
+        :param int resolution: Number of grid points per unit of length. The
+            sides of the box must be a whole number of grid steps long.
+        """
+
+        self.resolution = resolution
+        width = (top_right[0] - bottom_left[0]) * resolution
+        height = (top_right[1] - bottom_left[1]) * resolution
+        self.grid_size = round(width), round(height)
+        """Width and height of the box in grid steps"""
+
+        if max(abs(width - self.grid_size[0]), abs(height - self.grid_size[1])) > 1e-6:
+            raise ValueError("The box must be a whole number of grid steps")
+        if max(self.grid_size) > MAX_GRID:
+            raise ValueError(f"The box can be at most {MAX_GRID} grid steps wide")
+
+        super().__init__(bottom_left, top_right)
+
+    def to_grid(self, p: ndarray) -> tuple:
+        """
+        Round a point to the nearest grid point. Halves round up.
+
+        :param ndarray p: Point to round
+        :return: Grid coordinates of the point, counted from the bottom left
+            corner of the box
+        :rtype: tuple[int, int]
+        """
+
+        return (
+            floor((p[0] - self.min_x) * self.resolution + 0.5),
+            floor((p[1] - self.min_y) * self.resolution + 0.5),
+        )
+
+    def from_grid(self, x: int, y: int) -> ndarray:
+        """
+        :param int x: x grid coordinate, counted from the left side of the box
+        :param int y: y grid coordinate, counted from the bottom of the box
+        :return: The point at grid coordinates (x, y)
+        :rtype: numpy.ndarray
+        """
+
+        return point(self.min_x + x / self.resolution, self.min_y + y / self.resolution)
+
+    def add_line(self, line: tuple):
+        """
+        Round a line's endpoints to the grid, and rebuild the arrangement
+        with it.
+
+        :param tuple[ndarray] line: A tuple of two points on the outer boundary
+        """
+
+        self.add_lines([line])
+
+    def add_lines(self, lines: list):
+        """
+        Round each line's endpoints to the grid, and rebuild the arrangement
+        with them. The rounded lines are what get kept in :attr:`lines`.
+
+        :param list[tuple[ndarray]] lines: Lines to add, each a tuple of two
+            points on the outer boundary
+        """
+
+        super().add_lines(
+            [tuple(self.from_grid(*self.to_grid(p)) for p in line) for line in lines]
+        )
+
+    def remove_line(self, i: int):
+        """
+        Take a line out, and rebuild the arrangement without it, since the
+        lines that are left may bend differently once it's gone.
+
+        :param int i: Index of the line in :attr:`lines`
+        :raises IndexError: If there is no line i, or it was already removed
+        """
+
+        if i not in self._line_ids:
+            raise IndexError(i)
+
+        del self._line_ids[i]
+        self.lines[i] = self.line_coefficients[i] = None
+
+        # Adding no lines rebuilds the arrangement from the ones that are left
+        self.add_lines([])
+
+    def _point_locator(self) -> SlabLocator:
+        """
+        :return: A :class:`src.data_structures.point_location.SlabLocator`
+            over the edges themselves, since bent edges don't lie on their
+            lines. Every change rebuilds the arrangement, so it is built again
+            the first time it's needed after one.
+        :rtype: :class:`src.data_structures.point_location.SlabLocator`
+        """
+
+        if self._locator is None:
+            half_edges, _, link, _, points = self._half_edge_columns()
+            self._locator = SlabLocator(link, points, half_edges)
+
+        return self._locator
+
+    def crossing(self, i: int, j: int) -> ndarray:
+        """
+        Find the vertex where two lines cross, which is the grid point their
+        crossing rounds to.
+
+        :param int i: Index of one line in :attr:`lines`
+        :param int j: Index of another line in :attr:`lines`
+        :return: The grid point where lines i and j cross, or None if they
+            are parallel
+        :rtype: numpy.ndarray
+        """
+
+        p = super().crossing(i, j)
+        return None if p is None else self.from_grid(*self.to_grid(p))
+
+    def _build_arrangement(self) -> ArrangementArrays:
+        segments = array(
+            [[self.to_grid(p) for p in self.lines[i]] for i in self._line_ids],
+            dtype=int64,
+        ).reshape(-1, 2, 2)
+        arrangement = snap_round(self.grid_size, segments)
+
+        # Back from grid steps to coordinates
+        coords = arrangement.coords / self.resolution
+        coords[:, 0] += self.min_x
+        coords[:, 1] += self.min_y
+        return replace(arrangement, coords=coords)
@@ -7,14 +7,15 @@ structures like
     - William Boyles (wmboyles)
 """
 
-
-from dataclasses import dataclass
 from numpy import ndarray
 
 from .polygon import Polygon
 
+# Line ids of the bottom, right, top, and left sides of the bounding box.
+# Lines that are added get ids from 0 up, and -1 means no line at all.
+BOUNDARY_LINES = (-2, -3, -4, -5)
+
 
-@dataclass
 class HalfEdge:
     """
     A HalfEdge is the most basic building block of a polygonal subdivision.
@@ -33,25 +34,76 @@ class HalfEdge:
     Going from a HalfEdge to its twin will change the current face in the
     polygonal subidvision.
 
+    HalfEdges are only equal to themselves, and hash by identity, so they can
+    be kept in sets and used as dictionary keys. Walks around faces and
+    vertices stop when they get back to the same HalfEdge, without comparing
+    any points.
+
     :Authors:
         - William Boyles (wmboyles)
     """
 
-    point: ndarray = None
-    """Point in subdivision from which this HalfEdge originates"""
-
-    twin: "HalfEdge" = None
-    """Other HalfEdge defining the same edge as this HalfEdge"""
-
-    link: "HalfEdge" = None
-    """Next HalfEdge in same Polygon as thisHalfEdge"""
+    __slots__ = {
+        "point": "Point in subdivision from which this HalfEdge originates",
+        "vertex": "Id of point in the subdivision's "
+        ":class:`src.data_structures.vertex_index.VertexIndex`",
+        "twin": "Other HalfEdge defining the same edge as this HalfEdge",
+        "link": "Next HalfEdge in same Polygon as this HalfEdge",
+        "prev": "Previous Halfedge in same Polygon as this HalfEdge",
+        "line": "Index of the line this HalfEdge lies on, or one of "
+        "BOUNDARY_LINES for the sides of the bounding box",
+        "face": "Id of the face this HalfEdge is in, which stays the same "
+        "until the face is split",
+    }
+
+    convex_faces = True
+    """Whether faces other than face 0 are convex, so :func:`get_polygon` can
+    use the convex containment tests. HalfEdges of subdivisions that bend
+    their edges turn it off, like
+    :attr:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.convex_faces`."""
+
+    def __init__(
+        self,
+        point: ndarray = None,
+        vertex: int = None,
+        twin: "HalfEdge" = None,
+        link: "HalfEdge" = None,
+        prev: "HalfEdge" = None,
+        line: int = None,
+        face: int = None,
+    ):
+        """
+        :param ndarray point: Point from which this HalfEdge originates
+        :param int vertex: Id of the point in the subdivision
+        :param HalfEdge twin: Other HalfEdge defining the same edge
+        :param HalfEdge link: Next HalfEdge in the same Polygon
+        :param HalfEdge prev: Previous HalfEdge in the same Polygon
+        :param int line: Index of the line this HalfEdge lies on
+        :param int face: Id of the face this HalfEdge is in
+        """
 
-    prev: "HalfEdge" = None
-    """Previous Halfedge in same Polygon as this HalfEdge"""
+        self.point = point
+        self.vertex = vertex
+        self.twin = twin
+        self.link = link
+        self.prev = prev
+        self.line = line
+        self.face = face
+
+    def __repr__(self) -> str:
+        # Don't follow twin, link, or prev, which would go around in circles
+        return (
+            f"HalfEdge(point={self.point}, vertex={self.vertex}, "
+            f"line={self.line}, face={self.face})"
+        )
 
     def get_polygon(self) -> Polygon:
         """
-        Gets the Polygon of this HalfEdge.
+        Gets the Polygon of this HalfEdge. Faces of a
+        :class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`
+        inside the box are convex, so the Polygon uses its convex containment
+        tests unless :attr:`convex_faces` is off. The outside of the box,
+        face 0, is not convex.
 
         :return: The polygon of which this HalfEdge defines one edge.
         :rtype: :class:`src.data_structures.polygon.Polygon`
@@ -60,8 +112,8 @@ class HalfEdge:
         pts = [self.point]
 
         h = self.link
-        while not all(h.point == self.point):
+        while h != self:
             pts.append(h.point)
             h = h.link
 
-        return Polygon(pts)
+        return Polygon(pts, convex=self.convex_faces and self.face != 0)
@@ -0,0 +1,624 @@
+"""
+Contains point location indexes for finding which face of a
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`
+contains a point: :class:`LineLocator`, which is kept up to date as lines
+are added and removed, and :class:`SlabLocator`, which works on any edges but
+has to be rebuilt after every change.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from array import array as flat
+from bisect import bisect_left, bisect_right
+from math import nan
+
+from numpy import append, arange, argsort, array, concatenate, cumsum, diff
+from numpy import errstate, flatnonzero, frombuffer, full, int64, lexsort, ndarray
+from numpy import searchsorted, unique, where
+
+# Index returned for points that aren't in any face
+NOT_FOUND = -1
+
+MAX_SLABS = 1024
+"""Most slabs whose order of lines a :class:`LineLocator` keeps at once"""
+
+
+class LineLocator:
+    """
+    Finds the face containing a point in a subdivision whose edges all lie on
+    straight lines, one of which is the bottom of the box. Between two x
+    coordinates where no two lines cross and no line starts or ends, the
+    lines are in the same order from bottom to top, so the line just below a
+    point is a binary search in the order of that slab. Each line keeps the x
+    coordinate where each of its edges starts, sorted, so the edge of that
+    line just below the point, whose face is the point's face, is a second
+    binary search.
+
+    Keeping the order of every slab would take :math:`O(n^3)` space for n
+    lines, so a slab is sorted the first time a point lands in it, which is
+    one vectorized :math:`O(n \\log n)` sort of the lines, and the orders of
+    the last :data:`MAX_SLABS` slabs that were used are kept. A point in one
+    of those slabs takes :math:`O(\\log n)` time.
+
+    Nothing is thrown away when lines change. :func:`add_line` inserts the new
+    line into the order of each kept slab, and shrinks the slab to the part
+    where the new line doesn't cross its neighbours, and the subdivision
+    tells the index about the edges it split with :func:`set_edge`.
+    :func:`remove_line` takes a line out of every order, and the edges it
+    joined are merged with :func:`join_edges`.
+
+    Edges are stored as handles, which are whatever the subdivision gives
+    :func:`set_edge`, so the index doesn't have to know how HalfEdges are
+    stored.
+    """
+
+    def __init__(self, min_x: float, max_x: float):
+        """
+        Create an index with no lines.
+
+        :param float min_x: x coordinate of the left side of the box
+        :param float max_x: x coordinate of the right side of the box
+        """
+
+        self.min_x, self.max_x = min_x, max_x
+
+        self.lines = []
+        """Id of the line in each slot. Slots of removed lines aren't reused."""
+        self.slots = dict()
+        """key: line id, value: its slot"""
+
+        self.slope, self.intercept = [], []
+        """Slope and y intercept of the line in each slot"""
+        self.start, self.end = [], []
+        """Smallest and largest x coordinate of the line in each slot, which
+        are NaN once it's removed"""
+
+        self.keys = dict()
+        """key: line id, value: sorted x coordinates where its edges start"""
+        self.edges = dict()
+        """key: line id, value: handle of the half of each of its edges going
+        left, whose face is above the edge, in the same order as its keys"""
+
+        # Slab k holds for _lo[k] <= x < _slabs[k][0], and is
+        # [end, x it was sorted at, order of slots, last time it was used]
+        self._lo = []
+        self._slabs = []
+        self._clock = 0
+
+        # The line columns as numpy arrays, until a line is added or removed
+        self._arrays = None
+
+    def add_line(
+        self,
+        line: int,
+        slope: float,
+        intercept: float,
+        start: float,
+        end: float,
+        keys: flat = None,
+        edges: list = None,
+    ):
+        """
+        Add a line that isn't vertical, and insert it into the order of each
+        kept slab it crosses.
+
+        :param int line: Id of the line
+        :param float slope: Slope of the line
+        :param float intercept: y intercept of the line
+        :param float start: Smallest x coordinate of the line
+        :param float end: Largest x coordinate of the line
+        :param array keys: Sorted x coordinates where the line's edges start,
+            like :attr:`keys`. By default, the line has no edges until they
+            are given to :func:`set_edge`.
+        :param list edges: Handles of the line's edges, like :attr:`edges`
+        """
+
+        s = len(self.lines)
+        self.lines.append(line)
+        self.slots[line] = s
+        self.slope.append(slope)
+        self.intercept.append(intercept)
+        self.start.append(start)
+        self.end.append(end)
+        self.keys[line] = flat("d") if keys is None else keys
+        self.edges[line] = [] if edges is None else edges
+        self._arrays = None
+
+        for k in reversed(range(len(self._slabs))):
+            slab = self._slabs[k]
+            lo, (hi, anchor, order, _) = self._lo[k], slab
+            if end <= lo or start >= hi:
+                continue
+            if anchor < start:
+                slab[0] = start
+                continue
+            if anchor >= end:
+                self._lo[k] = end
+                continue
+
+            # The order holds on the side of the anchor until the new line
+            # crosses a neighbour
+            r = self._rank(order, s, anchor)
+            lo, hi = max(lo, start), min(hi, end)
+            for t in order[max(r - 1, 0) : r + 1]:
+                x = self._crossing(s, t)
+                if x is not None and x > anchor:
+                    hi = min(hi, x)
+                elif x is not None:
+                    lo = max(lo, x)
+
+            if lo <= anchor < hi:
+                order.insert(r, s)
+                self._lo[k], slab[0] = lo, hi
+            else:
+                del self._lo[k], self._slabs[k]
+
+    def remove_line(self, line: int):
+        """
+        Take a line out of every kept order. Does nothing for lines that
+        were never added, like vertical ones.
+
+        :param int line: Id of the line
+        """
+
+        s = self.slots.pop(line, None)
+        if s is None:
+            return
+
+        for slab in self._slabs:
+            if self.start[s] <= slab[1] < self.end[s]:
+                slab[2].remove(s)
+
+        self.start[s] = self.end[s] = nan
+        del self.keys[line], self.edges[line]
+        self._arrays = None
+
+    def _columns(self) -> tuple:
+        """
+        :return: The slope, y intercept, start, and end of the line in each
+            slot, as arrays
+        :rtype: tuple[numpy.ndarray]
+        """
+
+        if self._arrays is None:
+            self._arrays = tuple(
+                array(c) for c in (self.slope, self.intercept, self.start, self.end)
+            )
+
+        return self._arrays
+
+    def set_edge(self, line: int, x: float, edge):
+        """
+        Record the edge of a line that starts at x, replacing the one that
+        started there before. Does nothing for lines that aren't in the
+        index.
+
+        :param int line: Id of the line
+        :param float x: x coordinate of the left end of the edge
+        :param edge: Handle of the half of the edge going left
+        """
+
+        keys = self.keys.get(line)
+        if keys is None:
+            return
+
+        k = bisect_left(keys, x)
+        if k < len(keys) and keys[k] == x:
+            self.edges[line][k] = edge
+        else:
+            keys.insert(k, x)
+            self.edges[line].insert(k, edge)
+
+    def join_edges(self, line: int, x: float):
+        """
+        Record that the edge of a line starting at x was joined onto the edge
+        before it. The half going left of the joined edge is the one of the
+        right part.
+
+        :param int line: Id of the line
+        :param float x: x coordinate of the vertex that was removed
+        """
+
+        keys = self.keys.get(line)
+        if keys is None:
+            return
+
+        k = bisect_left(keys, x)
+        if 0 < k < len(keys) and keys[k] == x:
+            edges = self.edges[line]
+            edges[k - 1] = edges[k]
+            del keys[k], edges[k]
+
+    def _crossing(self, s: int, t: int) -> float:
+        """
+        :return: x coordinate where the lines in slots s and t cross, or None
+            if they are parallel
+        :rtype: float
+        """
+
+        if self.slope[s] == self.slope[t]:
+            return None
+
+        return (self.intercept[t] - self.intercept[s]) / (self.slope[s] - self.slope[t])
+
+    def _rank(self, order: flat, s: int, x: float) -> int:
+        """
+        :return: Where the line in slot s goes in an order of slots sorted by
+            height just right of x
+        :rtype: int
+        """
+
+        slope, intercept = self.slope, self.intercept
+        key = (slope[s] * x + intercept[s], slope[s])
+
+        lo, hi = 0, len(order)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            t = order[middle]
+            if (slope[t] * x + intercept[t], slope[t]) < key:
+                lo = middle + 1
+            else:
+                hi = middle
+
+        return lo
+
+    def _sort_slab(self, x: float, left: bool = False) -> tuple:
+        """
+        Sort the lines by their height just right of x, or just left of it.
+
+        :param float x: x coordinate to sort at
+        :param bool left: If True, sort just left of x instead
+        :return: The start and end of the slab around x where the order
+            holds, and the slots in order from bottom to top
+        :rtype: tuple[float, float, array]
+        """
+
+        slope, intercept, start, end = self._columns()
+
+        if left:
+            spans = flatnonzero((start < x) & (x <= end))
+        else:
+            spans = flatnonzero((start <= x) & (x < end))
+        height = slope[spans] * x + intercept[spans]
+        order = spans[lexsort((-slope[spans] if left else slope[spans], height))]
+
+        # The order holds until two neighbours cross, or a line starts or ends
+        below, above = order[:-1], order[1:]
+        with errstate(divide="ignore", invalid="ignore"):
+            cross = (intercept[above] - intercept[below]) / (
+                slope[below] - slope[above]
+            )
+        walls = concatenate((start, end, cross))
+        lo = walls[walls <= x].max(initial=self.min_x)
+        hi = walls[walls > x].min(initial=self.max_x)
+
+        return float(lo), float(hi), flat("q", order.astype(int64).tobytes())
+
+    def _slab(self, x: float) -> tuple:
+        """
+        Find the order of the lines in the slab containing x, sorting it and
+        keeping it if it isn't kept already.
+
+        :param float x: x coordinate, which is left of the right side of the
+            box
+        :return: An x coordinate past x up to which the order holds, and the
+            slots in order from bottom to top
+        :rtype: tuple[float, array]
+        """
+
+        self._clock += 1
+        k = bisect_right(self._lo, x) - 1
+        if k >= 0 and x < self._slabs[k][0]:
+            slab = self._slabs[k]
+            slab[3] = self._clock
+            return slab[0], slab[2]
+
+        lo, hi, order = self._sort_slab(x)
+
+        # Kept slabs can be parts of this one, so keep just the part between
+        # them
+        kept_lo = max(lo, self._slabs[k][0]) if k >= 0 else lo
+        kept_hi = min(hi, self._lo[k + 1]) if k + 1 < len(self._lo) else hi
+        if kept_lo <= x < kept_hi:
+            if len(self._slabs) >= MAX_SLABS:
+                self._forget_slabs()
+
+            k = bisect_right(self._lo, x)
+            self._lo.insert(k, kept_lo)
+            self._slabs.insert(k, [kept_hi, x, order, self._clock])
+
+        return hi, order
+
+    def _forget_slabs(self):
+        """
+        Drop the half of the kept slabs that were used longest ago, so that
+        making room takes :math:`O(1)` amortized time for each slab sorted.
+        """
+
+        newest = sorted(range(len(self._slabs)), key=lambda k: self._slabs[k][3])
+        keep = sorted(newest[len(newest) // 2 :])
+        self._lo = [self._lo[k] for k in keep]
+        self._slabs = [self._slabs[k] for k in keep]
+
+    def _edge(self, line: int, x: float, left: bool = False):
+        """
+        :return: Handle of the edge of a line just right of x, or just left
+            of it
+        """
+
+        keys = self.keys[line]
+        k = (bisect_left if left else bisect_right)(keys, x) - 1
+        return self.edges[line][min(max(k, 0), len(keys) - 1)]
+
+    def locate(self, x: float, y: float):
+        """
+        Find the face containing one point.
+
+        :param float x: x coordinate of the point
+        :param float y: y coordinate of the point
+        :return: Handle of the edge whose face contains the point, or None if
+            the point is left or right of the box. Points on an edge get one
+            of the faces next to it.
+        """
+
+        if not self.min_x <= x <= self.max_x:
+            return None
+
+        # Points on the right side of the box go in the slab left of it
+        left = x == self.max_x
+        order = self._sort_slab(x, left)[2] if left else self._slab(x)[1]
+
+        # The face is above the line just below the point. Points on the
+        # bottom line go in the face above it.
+        slope, intercept = self.slope, self.intercept
+        lo, hi = 0, len(order)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            s = order[middle]
+            if slope[s] * x + intercept[s] < y:
+                lo = middle + 1
+            else:
+                hi = middle
+
+        return self._edge(self.lines[order[max(lo - 1, 0)]], x, left)
+
+    def locate_many(self, points: ndarray) -> list:
+        """
+        Find the face of many points at once. The orders of the slabs the
+        points are in are found or sorted once, and the binary searches run
+        on all of the points together.
+
+        :param ndarray points: An (N,2) or (N,3) array of points
+        :return: For each point, like :func:`locate`
+        :rtype: list
+        """
+
+        points = array(points, dtype=float).reshape(len(points), -1)
+        x, y = points[:, 0], points[:, 1]
+        found = [None] * len(points)
+
+        # There are few points on the right side, so find them one at a time
+        for i in flatnonzero(x == self.max_x).tolist():
+            found[i] = self.locate(self.max_x, float(y[i]))
+
+        inside = flatnonzero((x >= self.min_x) & (x < self.max_x))
+        if len(inside) == 0:
+            return found
+        x, y = x[inside], y[inside]
+
+        # All of the orders, one after another, and which one each point uses
+        orders, slab = self._slabs_of(x)
+        offsets = concatenate(([0], cumsum([len(order) for order in orders])))
+        entry = concatenate([frombuffer(order, dtype=int64) for order in orders])
+        slope, intercept = self._columns()[:2]
+
+        # Find the first line in the slab that isn't below the point
+        low, high = offsets[slab], offsets[slab + 1]
+        bottom = low.copy()
+        while (low < high).any():
+            searching = low < high
+            middle = (low + high) // 2
+            s = entry[middle.clip(max=len(entry) - 1)]
+            below = slope[s] * x + intercept[s] < y
+            low = where(searching & below, middle + 1, low)
+            high = where(searching & ~below, middle, high)
+        lines = array(self.lines)[entry[(low - 1).clip(min=bottom)]]
+
+        # Then the edge of that line, for the points below each line together
+        by_line = argsort(lines, kind="stable")
+        starts = flatnonzero(append(True, diff(lines[by_line]) != 0))
+        for a, b in zip(starts.tolist(), append(starts[1:], len(by_line)).tolist()):
+            picks = by_line[a:b]
+            line = int(lines[picks[0]])
+            keys = frombuffer(self.keys[line], dtype=float)
+            k = (searchsorted(keys, x[picks], side="right") - 1).clip(0, len(keys) - 1)
+            edges = self.edges[line]
+            for i, j in zip(inside[picks].tolist(), k.tolist()):
+                found[i] = edges[j]
+
+        return found
+
+    def _slabs_of(self, x: ndarray) -> tuple:
+        """
+        Find the order of the lines in the slab of each of many x coordinates,
+        sorting the slabs that aren't kept from left to right.
+
+        :param ndarray x: x coordinates, left of the right side of the box
+        :return: The orders, and which of them each x coordinate is in
+        :rtype: tuple[list[array], numpy.ndarray]
+        """
+
+        by_x = argsort(x, kind="stable")
+        xs = x[by_x]
+        slab = full(len(x), NOT_FOUND, dtype=int64)
+        orders = []
+
+        # Points in kept slabs
+        if self._lo:
+            self._clock += 1
+            his = array([s[0] for s in self._slabs])
+            k = searchsorted(array(self._lo), xs, side="right") - 1
+            hit = (k >= 0) & (xs < his[k.clip(min=0)])
+            kept, which = unique(k[hit], return_inverse=True)
+            for j in kept.tolist():
+                self._slabs[j][3] = self._clock
+                orders.append(self._slabs[j][2])
+            slab[by_x[hit]] = which
+
+        # Sort the slab of the leftmost point that isn't in one yet, which is
+        # also the slab of the points after it up to where it ends
+        missed = flatnonzero(slab[by_x] == NOT_FOUND)
+        missed_x = xs[missed]
+        i = 0
+        while i < len(missed):
+            hi, order = self._slab(float(missed_x[i]))
+            j = max(int(searchsorted(missed_x, hi)), i + 1)
+            slab[by_x[missed[i:j]]] = len(orders)
+            orders.append(order)
+            i = j
+
+        return orders, slab
+
+
+class SlabLocator:
+    """
+    Splits the plane into vertical slabs at the x coordinate of every vertex.
+    No vertex is strictly inside a slab, so the edges crossing a slab never
+    cross each other there, and can be sorted from bottom to top. Finding the
+    face of a point is then two binary searches: one for the slab, and one
+    for the edge just below the point in that slab.
+
+    Sorting every slab up front would store each edge once for every slab it
+    crosses, which is :math:`O(n^3)` space for an arrangement of n lines.
+    Instead, only the edges themselves are kept, and each call to
+    :func:`locate_many` sorts just the slabs its points are in. For E edges,
+    a batch of points in k different slabs takes :math:`O(E + kn \\log n)`
+    time and :math:`O(E + kn)` space, since a slab crosses each line at most
+    once, and then :math:`O(\\log n)` steps for each point.
+
+    Unlike :class:`LineLocator`, this works when edges don't lie on straight
+    lines, like in
+    :class:`src.data_structures.grid_subdivision.GridBoundedPolygonalSubdivision`,
+    but it has to be built again whenever the edges change.
+    """
+
+    def __init__(self, link: ndarray, points: ndarray, half_edges):
+        """
+        Find the slabs for a subdivision described as columns, like
+        :func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision._half_edge_columns`.
+        Faces are on the right of their half edges.
+
+        :param ndarray link: Next half edge in the same face as each half edge
+        :param ndarray points: (E,2) array of the point each half edge comes
+            out of
+        :param Sequence half_edges: Handle of each half edge, which is what
+            :func:`locate_many` gives back
+        """
+
+        self.half_edges = half_edges
+        """Handle of each half edge"""
+
+        start, end = points, points[link]
+
+        # The face above an edge is on the right of the half going left, so
+        # keep that half of every edge that isn't vertical
+        left = flatnonzero(end[:, 0] < start[:, 0])
+        x0, y0 = end[left, 0], end[left, 1]
+        x1, y1 = start[left, 0], start[left, 1]
+
+        self.xs = unique(points[:, 0])
+        """Sorted x coordinates of the vertices, which are the slab walls"""
+
+        self.half_edge = left
+        """Half edge of each kept edge, whose face is above it"""
+        self.first = searchsorted(self.xs, x0)
+        """First slab each kept edge crosses"""
+        self.last = searchsorted(self.xs, x1)
+        """Slab just after the last one each kept edge crosses"""
+        self.slope = (y1 - y0) / (x1 - x0)
+        """Slope of each kept edge"""
+        self.intercept = y0 - self.slope * x0
+        """y intercept of each kept edge"""
+
+    def _sort_slabs(self, slabs: ndarray) -> tuple:
+        """
+        Sort the edges crossing some of the slabs by their height in the
+        middle of each slab.
+
+        :param ndarray slabs: Sorted indices of distinct slabs
+        :return: The kept edges crossing the slabs, slab by slab from bottom
+            to top, and where the edges of each slab start, followed by the
+            total count
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+
+        # Kept edge e crosses count[e] of the slabs, starting with slabs[lo[e]]
+        lo = searchsorted(slabs, self.first)
+        count = searchsorted(slabs, self.last) - lo
+        which = arange(len(count)).repeat(count)
+        offset = arange(count.sum()) - (cumsum(count) - count).repeat(count)
+        slab = lo.repeat(count) + offset
+
+        middle = (self.xs[slabs[slab]] + self.xs[slabs[slab] + 1]) / 2
+        height = self.slope[which] * middle + self.intercept[which]
+        order = lexsort((height, slab))
+
+        return which[order], searchsorted(slab[order], arange(len(slabs) + 1))
+
+    def locate_many(self, points: ndarray) -> list:
+        """
+        Find the face of many points at once. Only the slabs the points are
+        in are sorted, and the binary search in every slab runs on all points
+        together.
+
+        :param ndarray points: An (N,2) or (N,3) array of points
+        :return: For each point, the handle of a half edge of the face
+            containing it, or None for points outside of every slab. Points on
+            an edge get one of the faces next to it.
+        :rtype: list
+        """
+
+        points = array(points, dtype=float).reshape(len(points), -1)
+        x, y = points[:, 0], points[:, 1]
+        found = full(len(points), NOT_FOUND, dtype=int64)
+
+        # Points on the rightmost wall go in the last slab
+        slab = searchsorted(self.xs, x, side="right") - 1
+        slab[x == self.xs[-1]] = len(self.xs) - 2
+        inside = flatnonzero((slab >= 0) & (slab < len(self.xs) - 1))
+        x, y = x[inside], y[inside]
+
+        slabs, slab = unique(slab[inside], return_inverse=True)
+        entry, offsets = self._sort_slabs(slabs)
+        if len(entry) == 0:
+            return [None] * len(found)
+
+        # Find the first edge in the slab that isn't below the point
+        low, high = offsets[slab], offsets[slab + 1]
+        bottom, top = low.copy(), high.copy()
+        while (low < high).any():
+            searching = low < high
+            middle = (low + high) // 2
+            edge = entry[middle.clip(max=len(entry) - 1)]
+            below = self.slope[edge] * x + self.intercept[edge] < y
+            low = where(searching & below, middle + 1, low)
+            high = where(searching & ~below, middle, high)
+
+        # The face is above the edge just below the point. Points on the
+        # bottom edge of a slab go in the face above it.
+        edge = entry[(low - 1).clip(min=bottom, max=len(entry) - 1)]
+        found[inside] = where(bottom < top, self.half_edge[edge], NOT_FOUND)
+
+        return [None if i == NOT_FOUND else self.half_edges[i] for i in found.tolist()]
+
+    def locate(self, x: float, y: float):
+        """
+        Find the face containing one point.
+
+        :param float x: x coordinate of the point
+        :param float y: y coordinate of the point
+        :return: Like :func:`locate_many`, but for one point
+        """
+
+        return self.locate_many([(x, y)])[0]
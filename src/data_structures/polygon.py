@@ -5,12 +5,60 @@ Contains the Polyogn class.
     - William Boyles (wmboyles)
 """
 
-from numpy import ndarray
-from functools import cmp_to_key
-from math import pi, atan2
+from numpy import around, array, array_equal, ascontiguousarray, asarray
+from numpy import column_stack, empty, full, ndarray, ones, roll, sign, where
 
 from .point import point
-from .utils import orient, lex_compare, segments_cross, EPSILON, PRECISION
+from .utils import orient2d, segments_cross, segments_touch
+from .utils import EPSILON, PRECISION
+
+
+def _least_rotation(sequence: list) -> int:
+    """
+    Booth's algorithm for the lexicographically smallest rotation of a
+    sequence, in :math:`O(n)` comparisons.
+
+    :param list sequence: Items that can be compared with ``<``
+    :return: Index of the item the smallest rotation starts with
+    :rtype: int
+    """
+
+    doubled = sequence + sequence
+    failure = [-1] * len(doubled)
+    start = 0
+    for j in range(1, len(doubled)):
+        item = doubled[j]
+        i = failure[j - start - 1]
+        while i != -1 and item != doubled[start + i + 1]:
+            if item < doubled[start + i + 1]:
+                start = j - i - 1
+            i = failure[i]
+
+        if item != doubled[start + i + 1]:
+            if item < doubled[start]:
+                start = j
+            failure[j - start] = -1
+        else:
+            failure[j - start] = i + 1
+
+    return start
+
+
+def _turns(a: ndarray, b: ndarray, c: ndarray) -> ndarray:
+    """
+    Row-wise orientation of 2D points, rounded like
+    :func:`src.data_structures.utils.orient2d`.
+
+    :return: 1 where c is left of a--b, -1 where it's right, and 0 where it's
+        on it
+    :rtype: numpy.ndarray
+    """
+
+    d = (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (
+        c[..., 0] - a[..., 0]
+    )
+
+    return sign(around(d, PRECISION))
 
 
 class Polygon:
@@ -18,17 +66,48 @@ class Polygon:
     A Polygon is a sequence of points in :math:`\mathbb{R}^2`.
     Edges are the convex closure of subsequent vertices.
     Each edge connects two vertices and each vertex is incident to two edges.
+
+    The points are kept in one read only (n,3) array, and the bounding box,
+    the lowest and highest points, and the orientation are each worked out
+    the first time they are needed.
+
+    A Polygon that is known to be convex, like a face of a
+    :class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`,
+    can say so when it is made. Containment tests then use a binary search
+    over the triangles fanning out from one corner, which takes
+    :math:`O(\\log n)` time instead of :math:`O(n)`.
     """
 
-    def __init__(self, points: list[ndarray]):
+    def __init__(self, points: list[ndarray], convex: bool = False):
         """
         Create a new Polygon from a list of points.
 
         :param list[numpy.ndarray] points: A list of points defining the
-            polygon.
+            polygon, or an (n,3) or (n,2) array of them. An (n,3) float64
+            array is used as is, without copying it, so it must not be changed
+            afterwards. Points with only x and y get a z of 1.
+        :param bool convex: True if the points are known to make a convex
+            polygon, which turns on the fast containment tests.
         """
 
-        self.points = points
+        points = asarray(points, dtype=float)
+        if points.size == 0:
+            points = empty((0, 3))
+        elif points.shape[1] == 2:
+            points = column_stack((points, ones(len(points))))
+
+        # A read only view, so the cached values below stay right
+        self.points = points.view()
+        """(n,3) array of the points of the polygon"""
+        self.points.setflags(write=False)
+
+        self.convex = convex
+        self._n = len(points)
+        self._fan = None
+        self._canonical = None
+        self._bbox = None
+        self._extremes = None
+        self._orientation = None
 
     def __len__(self) -> int:
         """
@@ -36,7 +115,7 @@ class Polygon:
         :rtype: int
         """
 
-        return len(self.points)
+        return self._n
 
     def __getitem__(self, index: int) -> ndarray:
         """
@@ -48,7 +127,7 @@ class Polygon:
         :rtype: numpy.ndarray
         """
 
-        return self.points[index % len(self)]
+        return self.points[index % self._n]
 
     def __iter__(self):
         """
@@ -58,10 +137,107 @@ class Polygon:
 
         return iter(self.points)
 
+    @property
+    def bbox(self) -> ndarray:
+        """
+        (2,2) array of the bottom left and top right corners of the smallest
+        box holding the polygon
+
+        :rtype: numpy.ndarray
+        """
+
+        if self._bbox is None:
+            xy = self._xy()
+            self._bbox = array((xy.min(axis=0), xy.max(axis=0)))
+            self._bbox.setflags(write=False)
+
+        return self._bbox
+
+    @property
+    def lowest(self) -> ndarray:
+        """
+        The first point with the smallest y coordinate
+
+        :rtype: numpy.ndarray
+        """
+
+        return self.points[self._extreme_y()[0]]
+
+    @property
+    def highest(self) -> ndarray:
+        """
+        The first point with the largest y coordinate
+
+        :rtype: numpy.ndarray
+        """
+
+        return self.points[self._extreme_y()[1]]
+
+    def _extreme_y(self) -> tuple:
+        """
+        :return: Indices of the lowest and highest points
+        :rtype: tuple[int, int]
+        """
+
+        if self._extremes is None:
+            y = self.points[:, 1]
+            self._extremes = int(y.argmin()), int(y.argmax())
+
+        return self._extremes
+
+    @property
+    def orientation(self) -> int:
+        """
+        1 if the points go CCW around the polygon, -1 if they go CW, and 0 if
+        the polygon has no area. This is the sign of the polygon's area from
+        the shoelace formula, rounded like
+        :func:`src.data_structures.utils.orient2d`.
+
+        :rtype: int
+        """
+
+        if self._orientation is None:
+            xy = self._xy()
+            if len(xy) < 3:
+                self._orientation = 0
+            else:
+                # Measure from the first point to keep the products small
+                x, y = (xy - xy[0]).T
+                twice_area = (x * roll(y, -1) - roll(x, -1) * y).sum()
+                self._orientation = int(sign(round(twice_area, PRECISION)))
+
+        return self._orientation
+
+    @property
+    def canonical(self) -> ndarray:
+        """
+        The points of the polygon as one read only array, rotated so that
+        the sequence of points is the lexicographically smallest of all its
+        rotations. That puts the lexicographically smallest point first, and
+        breaks ties between repeated points. Any -0.0 is replaced with 0.0.
+
+        It is found once with Booth's algorithm in :math:`O(n)` time and then
+        cached, so the points must not be changed afterwards.
+
+        :rtype: numpy.ndarray
+        """
+
+        if self._canonical is None:
+            points = self.points
+            start = _least_rotation([tuple(p) for p in points.tolist()])
+
+            # Adding 0.0 turns -0.0 into 0.0, so equal polygons hash the same
+            canonical = ascontiguousarray(roll(points, -start, axis=0)) + 0.0
+            canonical.setflags(write=False)
+            self._canonical = canonical
+
+        return self._canonical
+
     def __eq__(self, other: "Polygon") -> bool:
         """
         A two polygons A and B are equal iff their point sequences are a cyclic
-        permutation of one another.
+        permutation of one another. This compares their :attr:`canonical`
+        forms, which takes :math:`O(n)` time.
 
         :param Polygon other: Polygon to compare against
         :return: True iff this and other's points differ by a cyclic
@@ -69,31 +245,39 @@ class Polygon:
         :rtype: bool
         """
 
-        n, m = len(self), len(other)
-        if n != m:
-            return False
-        elif n == m == 0:
-            return True
+        if not isinstance(other, Polygon):
+            return NotImplemented
 
-        for i in range(len(self)):
-            j = 0
+        return array_equal(self.canonical, other.canonical)
 
-            while i < len(self) or j < len(other):
-                if all(self[i] == other[j]):
-                    i += 1
-                    j += 1
-                else:
-                    break
+    def __hash__(self) -> int:
+        """
+        :return: A hash that is the same for polygons that are equal
+        :rtype: int
+        """
 
-            if i >= len(self) and j >= len(other):
-                return True
+        return hash(self.canonical.tobytes())
 
-        return False
+    def _translated_canonical(self) -> ndarray:
+        """
+        :return: The :attr:`canonical` form moved so that its first point is
+            at the origin
+        :rtype: numpy.ndarray
+        """
+
+        canonical = self.canonical
+        if len(canonical) == 0:
+            return canonical
+
+        return (canonical - canonical[0]) + 0.0
 
     def equal_up_to_translation(self, other: "Polygon") -> bool:
         """
         A polygon :math:`A` is equal to a polygon :math:`B` up to translation
         iff there is some translation :math:`d` such that :math:`A = B + d`.
+        Translating a polygon doesn't change which rotation is its
+        :attr:`canonical` form, so this moves both canonical forms to start
+        at the origin and compares them.
 
         :param Polygon other: Polygon to compare against
         :return: True if this polygon and other are equal to to translation,
@@ -102,19 +286,16 @@ class Polygon:
         :rtype: bool
         """
 
-        if len(self) == len(other) == 0:
-            return True
-
-        # Find the leftmost point in self and other. These must correspond
-        self_leftmost = min(self.points, key=cmp_to_key(lex_compare))
-        other_leftmost = min(other.points, key=cmp_to_key(lex_compare))
+        return array_equal(self._translated_canonical(), other._translated_canonical())
 
-        # Calculate and perform the translation that's needed
-        translation = self_leftmost - other_leftmost
-        other_translated = Polygon(other.points + translation)
+    def translation_hash(self) -> int:
+        """
+        :return: A hash that is the same for polygons that are equal up to
+            translation, as in :func:`equal_up_to_translation`
+        :rtype: int
+        """
 
-        # Check if this translated polygon is the same as self
-        return self == other_translated
+        return hash(self._translated_canonical().tobytes())
 
     def __contains__(self, p: ndarray) -> bool:
         """
@@ -125,16 +306,20 @@ class Polygon:
         from our query point off to infinity in any direction crosses the
         boundary edges of the polygon an odd number of times, the point is
         inside the polygon.
+
+        Convex polygons use :func:`_fan_contains` instead, where points on
+        the boundary are inside.
         """
 
         if len(self) == 0:
             return False
+        if self.convex and len(self._corners()) >= 3:
+            return self._fan_contains(p)
         if any(all(p == pt) for pt in self.points):
             return True
 
         # Find max x and max y values in the polygon
-        max_x = max(abs(pt[0]) for pt in self.points)
-        max_y = max(abs(pt[1]) for pt in self.points)
+        max_x, max_y = abs(self.bbox).max(axis=0).tolist()
 
         # Create a far-away point we know is outside the polygon.
         # This simulates an infinite ray.
@@ -151,62 +336,258 @@ class Polygon:
 
         return inside
 
-    # Polygon is convex if walking around the polygon if both are true
-    # 1) All turns in the same direction
-    # 2) Sum of angle changes in the turn is -/+ 2pi, depending on cw or ccw walk
+    def _xy(self) -> ndarray:
+        """
+        :return: (n,2) array of the polygon's points
+        :rtype: numpy.ndarray
+        """
+
+        return self.points[:, :2]
+
+    def _distinct_xy(self) -> ndarray:
+        """
+        :return: Like :func:`_xy`, but leaving out any point that is the same
+            as the one after it
+        :rtype: numpy.ndarray
+        """
+
+        xy = self._xy()
+        return xy[(xy != roll(xy, -1, axis=0)).any(axis=1)]
+
+    def _corners(self) -> list:
+        """
+        The points where a convex polygon turns, in CCW order. Points in the
+        middle of an edge are left out, so no three corners are on a line.
+
+        :return: (x, y) tuples of the corners
+        :rtype: list[tuple[float, float]]
+        """
+
+        if self._fan is None:
+            xy = self._distinct_xy()
+            turn = _turns(roll(xy, 1, axis=0), xy, roll(xy, -1, axis=0))
+            corners = xy[turn != 0]
+            if self.orientation < 0:
+                corners = corners[::-1]
+            self._fan = [tuple(c) for c in corners.tolist()]
+
+        return self._fan
+
+    def _fan_contains(self, p: ndarray) -> bool:
+        """
+        Check if a point is in or on a convex polygon with at least 3
+        corners. The corners fan out around the first one into triangles,
+        ordered by angle, so a binary search finds the only triangle that
+        could hold p.
+
+        :param ndarray p: Point to check
+        :return: True iff p is in or on the polygon
+        :rtype: bool
+        """
+
+        corners = self._corners()
+        (ox, oy), x, y = corners[0], float(p[0]), float(p[1])
+
+        def turn(a: tuple, b: tuple) -> float:
+            d = (b[0] - a[0]) * (y - a[1]) - (b[1] - a[1]) * (x - a[0])
+            return round(d, PRECISION)
+
+        # p must be between the two edges coming out of the first corner
+        if turn(corners[0], corners[1]) < 0 or turn(corners[0], corners[-1]) > 0:
+            return False
+
+        # Find the last corner that p is left of or on the ray to
+        low, high = 1, len(corners) - 2
+        while low < high:
+            middle = (low + high + 1) // 2
+            if turn(corners[0], corners[middle]) >= 0:
+                low = middle
+            else:
+                high = middle - 1
+
+        return turn(corners[low], corners[low + 1]) >= 0
+
+    def contains_many(self, points: ndarray) -> ndarray:
+        """
+        Check which of many points are in the polygon, like
+        :func:`__contains__`. For convex polygons, the binary search over the
+        fan runs on all points together.
+
+        :param ndarray points: An (N,2) or (N,3) array of points
+        :return: For each point, True iff it is in the polygon
+        :rtype: numpy.ndarray
+        """
+
+        points = array(points, dtype=float).reshape(len(points), -1)
+        if not (self.convex and len(self._corners()) >= 3):
+            return array(
+                [point(x, y) in self for x, y in points[:, :2].tolist()], dtype=bool
+            )
+
+        corners, q = array(self._corners()), points[:, :2]
+        first = corners[0]
+
+        inside = (_turns(first, corners[1], q) >= 0) & (
+            _turns(first, corners[-1], q) <= 0
+        )
+
+        low = ones(len(q), dtype=int)
+        high = full(len(q), len(corners) - 2)
+        while (low < high).any():
+            middle = (low + high + 1) // 2
+            left = _turns(first, corners[middle], q) >= 0
+            low = where(left, middle, low)
+            high = where(left, high, middle - 1)
+
+        return inside & (_turns(corners[low], corners[low + 1], q) >= 0)
+
     def is_convex(self) -> bool:
         """
         A simple polygon is convex iff any line with both endpoints in or on
         the polygon is completely contained in the polygon.
 
+        Only signs are needed. Walking around a convex polygon, every turn
+        goes the same way, and the edges only turn around once, so the x
+        parts of the edges change sign at most twice, and so do the y parts.
+        Turning the same way more than once around, like a star does, changes
+        them more often. All of these are checked on the whole array of points
+        at once.
+
         :return: True if this polygon is convex, else False
         :rtype: bool
         """
 
         # All triangles are convex; all colinear points are convex
-        if len(self) <= 3:
+        xy = self._distinct_xy()
+        if len(xy) <= 3:
             return True
 
-        # Find the direction of the first turn
-        for i in range(len(self)):
-            orientation = orient(self[i - 1], self[i], self[i + 1])
-            if orientation != 0:
-                break
-        # if not turns then it must be convex b/c it's just a line
-        if orientation == 0:
-            return True
+        turn = _turns(roll(xy, 1, axis=0), xy, roll(xy, -1, axis=0))
+        if (turn > 0).any() and (turn < 0).any():
+            return False
 
-        prev, cur = self[-2], self[-1]
-        new_direction = atan2(cur[1] - prev[1], cur[0] - prev[0])
-        angle_sum = 0
-        for i, point in enumerate(self.points):
-            prev, cur = cur, point
-            old_direction, new_direction = new_direction, atan2(
-                cur[1] - prev[1], cur[0] - prev[0]
-            )
+        edges = roll(xy, -1, axis=0) - xy
+        for part in edges.T:
+            signs = sign(around(part, PRECISION))
+            signs = signs[signs != 0]
+            if (signs != roll(signs, 1)).sum() > 2:
+                return False
+
+        return True
+
+    def is_simple(self) -> bool:
+        """
+        A polygon is simple if none of its edges cross each other. Edges next
+        to each other may only share the point between them, so turning
+        straight back along the last edge isn't simple. Edges that aren't next
+        to each other may not share any point, even if they are colinear.
+
+        This is a Shamos-Hoey sweep, which takes :math:`O(n \\log n)`
+        comparisons. A vertical line sweeps left to right over the edges,
+        keeping the ones it crosses sorted from bottom to top. The leftmost
+        place where two edges touch comes right after they are next to each
+        other in that order, so only edges that become neighbors are checked.
+
+        :return: True iff this polygon is simple, else False.
+        :rtype: bool
+        """
 
-            # keep angle in (-pi, pi]
-            angle = new_direction - old_direction
-            if angle < -pi:
-                angle += 2 * pi
-            elif angle > pi:
-                angle -= 2 * pi
+        n = len(self)
+        if n <= 3:
+            return self._is_simple_quadratic()
 
-            # if our orientation changes, then we found a "dent" ==> not convex
-            if orientation * angle < 0:
+        # Some edges that aren't next to each other share a repeated point
+        xy = self._xy()
+        if len(set(map(tuple, xy.tolist()))) < n:
+            return False
+
+        # No edge turns straight back along the one before it
+        before, after = roll(xy, 1, axis=0), roll(xy, -1, axis=0)
+        back = ((xy - before) * (after - xy)).sum(axis=1) < 0
+        if (back & (_turns(before, xy, after) == 0)).any():
+            return False
+
+        # Every point is now the end of exactly two edges, which are next to
+        # each other. Edge i goes between points ends[i][0] and ends[i][1],
+        # left to right, or bottom to top if it is vertical.
+        points, ps = xy.tolist(), self.points
+        ends = [
+            (i, (i + 1) % n) if points[i] < points[(i + 1) % n] else ((i + 1) % n, i)
+            for i in range(n)
+        ]
+
+        # At each point, edges ending there are removed before edges starting
+        # there are added
+        events = sorted(
+            [(*points[ends[i][0]], 1, i) for i in range(n)]
+            + [(*points[ends[i][1]], 0, i) for i in range(n)]
+        )
+
+        def touch(i: int, j: int) -> bool:
+            if (i - j) % n in (1, n - 1):
                 return False
+            return segments_touch(self[i], self[i + 1], self[j], self[j + 1])
+
+        def below(j: int, i: int, starts: bool) -> int:
+            # 1 if edge j is below edge i where i is added or removed, -1 if
+            # it is above, or 0 if they touch there. Only orient2d is used,
+            # so edges are compared exactly.
+            (lj, rj), (li, ri) = ends[j], ends[i]
+            p = li if starts else ri
+            turn = orient2d(ps[lj], ps[rj], ps[p])
+            if turn:
+                return turn
+
+            # p is on edge j, which is only allowed if j is the other edge
+            # starting or ending at p. Then the edge turning right from the
+            # other one is below it.
+            if starts and lj == p:
+                return -orient2d(ps[p], ps[ri], ps[rj])
+            if not starts and rj == p:
+                return -orient2d(ps[li], ps[p], ps[lj])
+            return 0
+
+        status = []
+        for _, _, starts, i in events:
+
+            # Binary search for where i goes, or where it is
+            lo, hi, k = 0, len(status), None
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if status[mid] == i:
+                    k = mid
+                    break
+
+                turn = below(status[mid], i, starts)
+                if not turn:
+                    return False
+                if turn > 0:
+                    lo = mid + 1
+                else:
+                    hi = mid
 
-            angle_sum += angle
+            if starts:
+                k = lo
+                status.insert(k, i)
+                if k > 0 and touch(status[k - 1], i):
+                    return False
+                if k + 1 < len(status) and touch(i, status[k + 1]):
+                    return False
+            else:
+                # The edges are only out of order if two of them crossed
+                if k is None:
+                    return False
 
-        # if we turned exactly 2pi randians, then the polygon was convex
-        return abs(round(angle_sum / (2 * pi), PRECISION)) == 1
+                del status[k]
+                if 0 < k < len(status) and touch(status[k - 1], status[k]):
+                    return False
 
-    # Simple O(n^2)
-    # Look at all pairs of line segments which don't have any points in common
-    # If any cross, then the polygon isn't simple
-    def is_simple(self) -> bool:
+        return True
+
+    def _is_simple_quadratic(self) -> bool:
         """
-        A polygon is simple if none of its edges cross each other.
+        :func:`is_simple` by checking every pair of edges, which takes
+        :math:`O(n^2)` time. This is kept to check the sweep against.
 
         :return: True iff this polygon is simple, else False.
         :rtype: bool
@@ -220,19 +601,15 @@ class Polygon:
             for j in range(i + 1, n):
                 c, d = self[j], self[j + 1]
 
-                # If the points are all colinear, see if the segments overlap
-                if orient(c, d, a) == orient(c, d, b) == 0:
-                    ac = lex_compare(a, c)
-                    ad = lex_compare(a, d)
-                    bd = lex_compare(b, d)
-
-                    # if ad != bd, then d is between a and b
-                    # if ad != ac, then a is between c and d
-                    if not (ac == ad == bd):
+                # Edges next to each other share a point, so check that the
+                # second one doesn't turn back along the first
+                if j == i + 1 or (i, j) == (0, n - 1):
+                    p, q, r = (a, b, d) if j == i + 1 else (c, a, b)
+                    if orient2d(p, q, r) == 0 and (q - p)[:2] @ (r - q)[:2] < 0:
                         return False
 
-                # If we're looking at 4 distinct points, and they are mutually on different line sides
-                elif i not in {j - 1, (j + 1) % n} and segments_cross(a, b, c, d):
+                # Other edges may not touch at all
+                elif segments_touch(a, b, c, d):
                     return False
 
         return True
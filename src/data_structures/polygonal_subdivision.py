@@ -5,13 +5,121 @@ Contains the BoundedPolygonalSubdivisonClass.
     - William Boyles (wmboyles)
 """
 
-from numpy import ndarray
+from array import array as flat
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+
+from numpy import add, arange, argsort, array, ascontiguousarray, bincount
+from numpy import column_stack, concatenate, cumsum, diff, dot, flatnonzero
+from numpy import lexsort, maximum, minimum, ndarray, stack, unique, zeros
 from numpy.linalg import norm
 
 from .point import point
 from .polygon import Polygon
-from .half_edge import HalfEdge
-from .utils import EPSILON, segment_intersection, orient
+from .arrangement import ArrangementArrays, build_arrangement, label_faces
+from .half_edge import BOUNDARY_LINES, HalfEdge
+from .point_location import LineLocator
+from .utils import EPSILON, ZERO_DETERMINANT, line_meet, line_through, orient2d
+from .utils import segment_intersections
+from .vertex_index import PointDict, VertexIndex
+from .zone_cache import ZoneCache
+
+
+@dataclass
+class ZoneComplexity:
+    """
+    Counts of the faces and edges in the zone of a line, as found by
+    :func:`BoundedPolygonalSubdivision.zone_complexity`. An edge bounding two
+    faces of the zone is counted once for each face.
+    """
+
+    faces: int = 0
+    """Number of faces the zone line passes through"""
+
+    edges: int = 0
+    """Total number of edges of those faces"""
+
+    left_edges: int = 0
+    """Number of those edges that bound their face from the left"""
+
+    right_edges: int = 0
+    """Number of those edges that bound their face from the right"""
+
+
+@dataclass
+class AllZones:
+    """
+    Zones of every line in a subdivision, as found by
+    :func:`BoundedPolygonalSubdivision.all_zones`. The zone of line ``i`` has
+    one face for each of rows ``offsets[i]`` to ``offsets[i + 1]`` of
+    ``face_edges``, in order along the line.
+    """
+
+    offsets: ndarray
+    """Where the faces of each line's zone start in face_edges, followed by
+    the total number of faces"""
+
+    face_edges: ndarray
+    """Number of edges of each face"""
+
+    @property
+    def faces(self) -> ndarray:
+        """Number of faces in the zone of each line"""
+
+        return diff(self.offsets)
+
+    @property
+    def edges(self) -> ndarray:
+        """Total number of edges of the faces in the zone of each line"""
+
+        total = concatenate(([0], cumsum(self.face_edges)))
+        return total[self.offsets[1:]] - total[self.offsets[:-1]]
+
+
+@dataclass
+class Face:
+    """
+    A face of a subdivision, as cached by
+    :func:`BoundedPolygonalSubdivision.face`.
+    """
+
+    handle: HalfEdge
+    """A HalfEdge in the face, which the ring starts from"""
+
+    polygon: Polygon
+    """Points around the face, in the order of its HalfEdges"""
+
+    bbox: ndarray
+    """(2,2) array of the bottom left and top right corners of the smallest
+    box holding the face"""
+
+    edges: int
+    """Number of edges of the face"""
+
+
+@dataclass
+class FaceMetrics:
+    """
+    Measurements of every face inside the bounding box of a subdivision, as
+    found by :func:`BoundedPolygonalSubdivision.face_metrics`. Row i of each
+    array describes face ``face[i]``.
+    """
+
+    face: ndarray
+    """Id of each face"""
+
+    area: ndarray
+    """Area of each face"""
+
+    centroid: ndarray
+    """(F,2) array of the center of mass of each face"""
+
+    bbox: ndarray
+    """(F,2,2) array of the bottom left and top right corners of the smallest
+    box holding each face"""
+
+    degree: ndarray
+    """Number of edges of each face"""
 
 
 class BoundedPolygonalSubdivision:
@@ -32,6 +140,15 @@ class BoundedPolygonalSubdivision:
        within the bounding area are convex.
     """
 
+    convex_faces = True
+    """Whether every face is convex, so :func:`face` polygons can use the
+    convex containment tests. Subdivisions that bend their edges turn it off."""
+
+    half_edge_type = HalfEdge
+    """Class of the HalfEdges this subdivision makes. Its
+    :attr:`src.data_structures.half_edge.HalfEdge.convex_faces` should match
+    :attr:`convex_faces`."""
+
     def __init__(self, bottom_left: ndarray, top_right: ndarray):
         """
         Given the bottom-left and top-right points defining the bounding box,
@@ -43,20 +160,54 @@ class BoundedPolygonalSubdivision:
 
         top_left = point(bottom_left[0], top_right[1])
         bottom_right = point(top_right[0], bottom_left[1])
+        corners = [bottom_left, bottom_right, top_right, top_left]
 
-        # # points that are on the bounding box of the polygon
-        self.boundary_polygon = Polygon(
-            [bottom_left, bottom_right, top_right, top_left]
-        )
+        self.min_x, self.min_y = float(bottom_left[0]), float(bottom_left[1])
+        self.max_x, self.max_y = float(top_right[0]), float(top_right[1])
+
+        # lines that have been added, in the order they were added, and the
+        # homogeneous coefficients of each one. A line's index is its id, and
+        # removed lines are left as None so the other ids don't change.
+        self.lines = []
+        self.line_coefficients = []
+
+        # key: id of each line that hasn't been removed, in the order they
+        # were added
+        self._line_ids = dict()
+
+        # goes up every time the subdivision changes
+        self.version = 0
+
+        # recent zone query results. Set its maxsize to 0 to turn it off.
+        self.zone_cache = ZoneCache()
+
+        # point location index, built on first use and kept up to date by
+        # add_line and remove_line
+        self._locator = None
+
+        # key: line id, value: dict with one HalfEdge of each edge on that
+        # line as keys. It's None until edges_of_line or remove_line first
+        # needs it, and is kept up to date after that.
+        self._line_edges = None
+
+        # key: face id, value: Face, for faces that haven't changed since
+        # they were last asked for
+        self._face_cache = dict()
+        self._face_handles = []
+        self.n_faces = 0
+
+        # every vertex gets an id, and vertices close together share one
+        self.vertices = self._new_vertex_index()
+        self._handles = []
 
         # # key: point, value: half-edge coming out of point
-        self.point_dict = dict()
+        self.point_dict = PointDict(self)
 
         # create half edges of points around outside
         outside_edges, inside_edges = [], []
-        for polygon_point in self.boundary_polygon:
-            outside_edges.append(HalfEdge(point=polygon_point))
-            inside_edges.append(HalfEdge(point=polygon_point))
+        for polygon_point in corners:
+            outside_edges.append(self._new_half_edge(polygon_point))
+            inside_edges.append(self._new_half_edge(polygon_point))
 
         # link them all up and fill dictionary
         n = len(outside_edges)
@@ -70,7 +221,212 @@ class BoundedPolygonalSubdivision:
             outside_edges[i].twin = inside_edges[(i + 1) % n]
             inside_edges[i].twin = outside_edges[(i - 1) % n]
 
-            self.point_dict[tuple(outside_edges[i].point)] = outside_edges[i]
+            self._set_vertex_handle(outside_edges[i].vertex, outside_edges[i])
+
+            # the sides of the box are lines too
+            outside_edges[i].line = BOUNDARY_LINES[i]
+            inside_edges[(i + 1) % n].line = BOUNDARY_LINES[i]
+
+        # The face outside of the box is face 0
+        for face, edges in enumerate((outside_edges, inside_edges)):
+            for h in edges:
+                h.face = face
+            self._new_face(edges[0])
+
+        self._index_boundary(outside_edges)
+
+    def _index_boundary(self, boundary_edges: list):
+        """
+        Build the sorted index of the points on each side of the bounding box,
+        going CCW from the bottom side. Each side holds its first corner, and
+        keys increase in the CCW direction, so each side can be searched with
+        bisect in :math:`O(\\log n)` time. Each side is a plain list, so adding
+        or removing a point is still :math:`O(n)` in the number of points on
+        that side, although it is one memmove.
+
+        :param list[HalfEdge] boundary_edges: The boundary HalfEdges coming
+            out of each point on the bounding box, going CCW from the bottom
+            left corner.
+        """
+
+        self._boundary_keys = [[] for _ in range(4)]
+        self._boundary_edges = [[] for _ in range(4)]
+        for h in boundary_edges:
+            side, key = self._boundary_position(h.point)
+            self._boundary_keys[side].append(key)
+            self._boundary_edges[side].append(h)
+
+    @property
+    def boundary_polygon(self) -> Polygon:
+        """
+        The points on the bounding box of the subdivision in CCW order,
+        starting at the bottom left corner.
+
+        :rtype: :class:`src.data_structures.polygon.Polygon`
+        """
+
+        return Polygon(
+            [h.point for edges in self._boundary_edges for h in edges], convex=True
+        )
+
+    @property
+    def line_ids(self) -> list:
+        """
+        Ids of the lines in the subdivision, in the order they were added.
+        These are the indices in :attr:`lines` that aren't None.
+
+        :rtype: list[int]
+        """
+
+        return list(self._line_ids)
+
+    def _boundary_position(self, p: ndarray) -> tuple:
+        """
+        Find where a point is on the bounding box.
+
+        :param ndarray p: A point on the bounding box
+        :return: The side of the box p is on (0 bottom, 1 right, 2 top, 3
+            left), and a key for p that increases going CCW along that side.
+            Corners belong to the side they start. If p isn't on the bounding
+            box, returns (None, None).
+        :rtype: tuple[int, float]
+        """
+
+        x, y = float(p[0]), float(p[1])
+        in_x = self.min_x - EPSILON <= x <= self.max_x + EPSILON
+        in_y = self.min_y - EPSILON <= y <= self.max_y + EPSILON
+
+        if in_x and abs(y - self.min_y) <= EPSILON and x < self.max_x - EPSILON:
+            return 0, x
+        if in_y and abs(x - self.max_x) <= EPSILON and y < self.max_y - EPSILON:
+            return 1, y
+        if in_x and abs(y - self.max_y) <= EPSILON and x > self.min_x + EPSILON:
+            return 2, -x
+        if in_y and abs(x - self.min_x) <= EPSILON:
+            return 3, -y
+
+        return None, None
+
+    def _new_vertex_index(self) -> VertexIndex:
+        """
+        Create the index that gives each vertex an id. Backends that store
+        vertices differently can override this.
+
+        :return: An empty index
+        :rtype: :class:`src.data_structures.vertex_index.VertexIndex`
+        """
+
+        return VertexIndex()
+
+    def _vertex_handle(self, v: int) -> HalfEdge:
+        """
+        :param int v: Id of a vertex, or None
+        :return: A HalfEdge coming out of vertex v, or None if there isn't one
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        return self._handles[v] if v is not None and v < len(self._handles) else None
+
+    def _set_vertex_handle(self, v: int, h: HalfEdge):
+        """
+        Set the HalfEdge that is used to find edges coming out of vertex v.
+
+        :param int v: Id of a vertex
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            coming out of vertex v, or None to forget the vertex
+        """
+
+        if v >= len(self._handles):
+            self._handles.extend([None] * (v + 1 - len(self._handles)))
+
+        self._handles[v] = h
+
+    def _handled_vertices(self) -> list:
+        """
+        :return: Ids of the vertices that have a HalfEdge coming out of them
+        :rtype: list[int]
+        """
+
+        return [v for v, h in enumerate(self._handles) if h is not None]
+
+    def _face_handle(self, f: int) -> HalfEdge:
+        """
+        :param int f: Id of a face
+        :return: A HalfEdge in face f
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        return self._face_handles[f]
+
+    def _set_face_handle(self, f: int, h: HalfEdge):
+        """
+        Set the HalfEdge that is used to walk face f.
+
+        :param int f: Id of a face, which is at most :attr:`n_faces`
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            in face f
+        """
+
+        if f == len(self._face_handles):
+            self._face_handles.append(h)
+        else:
+            self._face_handles[f] = h
+
+    def _new_face(self, h: HalfEdge) -> int:
+        """
+        Give a new face the next unused id.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            in the new face
+        :return: Id of the new face
+        :rtype: int
+        """
+
+        f = self.n_faces
+        self._set_face_handle(f, h)
+        self.n_faces += 1
+
+        return f
+
+    def face(self, f: int) -> Face:
+        """
+        Get the ring of points, bounding box, and number of edges of a face.
+        Faces are only walked the first time they are asked for, and again
+        after adding a line changes them, so asking for the same face many
+        times is cheap. The returned Face is shared with later callers, so it
+        must not be changed.
+
+        :param int f: Id of a face, like the face of one of its HalfEdges
+        :return: The face with id f
+        :rtype: Face
+        """
+
+        try:
+            return self._face_cache[f]
+        except KeyError:
+            pass
+
+        h = self._face_handle(f)
+        _, edges = self._face_edges(h)
+        polygon = Polygon(
+            ascontiguousarray(edges[:, 0]), convex=self.convex_faces and f != 0
+        )
+
+        face = self._face_cache[f] = Face(h, polygon, polygon.bbox, len(polygon))
+        return face
+
+    def _new_half_edge(self, p: ndarray) -> HalfEdge:
+        """
+        Create a new HalfEdge with no links that comes out of p. Backends that
+        store HalfEdges differently can override this.
+
+        :param ndarray p: The point the new HalfEdge comes out of
+        :return: A new HalfEdge
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        v = self.vertices.add(p[0], p[1])
+        return self.half_edge_type(point=self.vertices.point(v), vertex=v)
 
     def get_handle(self, p: ndarray) -> HalfEdge:
         """
@@ -84,10 +440,7 @@ class BoundedPolygonalSubdivision:
         :rtype: :class:`src.data_structures.half_edge.HalfEdge` or None
         """
 
-        try:
-            return self.point_dict[tuple(p)]
-        except KeyError:
-            return None
+        return self._vertex_handle(self.vertices.find(p[0], p[1]))
 
     def nbrs(self, p: ndarray):
         """
@@ -104,7 +457,7 @@ class BoundedPolygonalSubdivision:
         yield start_edge.twin.point
 
         cur = start_edge.twin.link
-        while cur is not start_edge:
+        while cur != start_edge:
             yield cur.twin.point
             cur = cur.twin.link
 
@@ -125,8 +478,15 @@ class BoundedPolygonalSubdivision:
         k = h.twin
 
         # Create new half edges that comes out of p
-        x, y = HalfEdge(point=p), HalfEdge(point=p)
-        self.point_dict[tuple(p)] = y
+        x, y = self._new_half_edge(p), self._new_half_edge(p)
+        x.line = y.line = h.line
+        self._set_vertex_handle(y.vertex, y)
+
+        # x follows k and y follows h, so each is in the same face as the
+        # HalfEdge it follows. Both faces gain an edge.
+        x.face, y.face = k.face, h.face
+        self._face_cache.pop(h.face, None)
+        self._face_cache.pop(k.face, None)
 
         # First, we set all the attributes of x and y
         # x's twin is h, y's twin is k
@@ -149,16 +509,20 @@ class BoundedPolygonalSubdivision:
         # h's link is y, k's link is x
         h.link, k.link = y, x
 
-        # If we're splitting a boundary edge, we need to update the boundary polygon
-        if boundary_split:
-            # TODO: Could speed this up with a binary search?
-            n = len(self.boundary_polygon)
-            for i in range(n):
-                if all(k.point == self.boundary_polygon[i]):
-                    break
+        # The new edge is on the same line, and whichever of h and k stood
+        # for the old edge is still on the other half of it
+        if self._line_edges is not None and h.line is not None and h.line >= 0:
+            edges = self._line_edges.setdefault(h.line, dict())
+            edges[y if h in edges else x] = None
 
-            # inserts at the index before
-            self.boundary_polygon.points.insert(i, p)
+        # If we're splitting a boundary edge, we need to update the boundary
+        # index. Finding the spot is a bisect, but the inserts shift the rest
+        # of the side's lists.
+        if boundary_split:
+            side, key = self._boundary_position(p)
+            i = bisect_right(self._boundary_keys[side], key)
+            self._boundary_keys[side].insert(i, key)
+            self._boundary_edges[side].insert(i, y)
 
     def _add_edge_helper(self, a: ndarray, b: ndarray) -> HalfEdge:
         """
@@ -171,42 +535,44 @@ class BoundedPolygonalSubdivision:
         """
 
         """
-        WLOG, let's say we're finding the correct HalfEdge for a and a is left
-        of b.
-
-        There are 2 cases:
-        1) There exists a point above the line a--b
-          * Find the rightmost point above the line a--b.
-        2) There are no points above the line a--b
-          * Find the rightmost point below the line a--b
+        The new edge goes between two of the edges coming out of a, in the
+        face that a--b goes into. We want the edge that comes first CCW after
+        a--b, since the new HalfEdge going into a will link to it.
+
+        Sweeping CCW from a--b, edges left of a--b come first, then edges on
+        the right (or straight behind a), then an edge straight ahead. Within
+        the left or the right, one edge comes before another if the other is
+        CCW from it. This works no matter how many edges come out of a.
         """
 
-        max_right = None  # rightmost point below the line a--b
-        have_above = False  # are there any points above the line a--b?
-
-        for neighbor_vertex in self.nbrs(a):  # iterates in ccw order
-
-            # if there's a point above a--b
-            if orient(a, b, neighbor_vertex) == 1:
-
-                # if all points before were below the line, we found our point
-                if not have_above:
-                    h = self.get_handle(neighbor_vertex)
+        def half(q: ndarray) -> int:
+            turn = orient2d(a, b, q)
+            if turn:
+                return 0 if turn > 0 else 1
 
-                    # Need to make sure half edge actually points to a
-                    while not all(h.twin.point == a):
-                        h = h.twin.link
+            # q is on the line through a and b, either ahead of a or behind it
+            return 2 if dot(q[:2] - a[:2], b[:2] - a[:2]) > 0 else 1
 
-                    return h
-
-                have_above = True
+        best, best_half = None, None
+        start = cur = self.get_handle(a)
+        while True:
+            q = cur.twin.point
+            q_half = half(q)
+            if (
+                best is None
+                or q_half < best_half
+                or q_half == best_half < 2
+                and orient2d(a, q, best.twin.point) > 0
+            ):
+                best, best_half = cur, q_half
 
-            elif max_right is None or orient(a, max_right, neighbor_vertex) == 1:
-                max_right = neighbor_vertex
+            cur = cur.twin.link
+            if cur == start:
+                break
 
-        return self.get_handle(max_right)
+        return best.twin
 
-    def _add_edge(self, a: ndarray, b: ndarray):
+    def _add_edge(self, a: ndarray, b: ndarray, line: int = None):
         """
         Add an edge connection vertex a to vertex b.
         It is assumed that this edge can be added as a straight line from a to b.
@@ -214,12 +580,16 @@ class BoundedPolygonalSubdivision:
 
         :param ndarray a: One point of edge to add
         :param ndarray b: Other point of edge to add
+        :param int line: Index of the line the edge lies on
         """
 
         alpha, beta = self._add_edge_helper(a, b), self._add_edge_helper(b, a)
 
         # connect edges, which creates two new HalfEdges
-        x, y = HalfEdge(point=a), HalfEdge(point=b)
+        x, y = self._new_half_edge(a), self._new_half_edge(b)
+        x.line = y.line = line
+        if self._line_edges is not None and line is not None:
+            self._line_edges.setdefault(line, dict())[x] = None
         x.twin, y.twin = y, x
         x.link, y.link = beta.twin, alpha.twin
 
@@ -229,7 +599,22 @@ class BoundedPolygonalSubdivision:
 
         beta.twin.prev, alpha.twin.prev = x, y
 
-    def _slice_edge(self, a: ndarray, b: ndarray):
+        # The face is split in two. The half with y keeps the old id, and the
+        # half with x gets a new one.
+        old = alpha.twin.face
+        y.face = old
+        self._set_face_handle(old, y)
+        self._face_cache.pop(old, None)
+
+        new = self._new_face(x)
+        cur = x
+        while True:
+            cur.face = new
+            cur = cur.link
+            if cur == x:
+                break
+
+    def _slice_edge(self, a: ndarray, b: ndarray, line: int = None):
         """
         Add a straight path of edges from a to b
         Split any edge that is crossed by the line segment ab at the crossing
@@ -237,39 +622,187 @@ class BoundedPolygonalSubdivision:
 
         :param ndarray a: One endpoint of edge to slice in
         :param ndarray b: Other endpoint of edge to slice in
+        :param int line: Index of the line the edges lie on
         """
 
         # Carefully select the halfedge of the face that intersects segment ab.
-        # Since we're always connecting from the boundary points that have
-        # degree 2, we can choose the edge we want easily.
-        cur = self.get_handle(a).twin
+        # It comes out of a, in the face that a--b goes into.
+        cur = self._add_edge_helper(a, b).twin
+        a_vertex, b_vertex = self.vertices.find(a[0], a[1]), self.vertices.find(
+            b[0], b[1]
+        )
 
         # Walk around face until one segment crosses a--b
         while True:
-            cross = segment_intersection(a, b, cur.point, cur.twin.point)
-
-            # If there's an intersection that's not where we started
-            if cross is not None and not all(cross == a):
-                # If we hit the final point, we're done
-                if all(cross == b):
-                    self._add_edge(a, b)
-                    return
-
-                # If a--b crosses a vertex, recurse on that vertex
-                if self.get_handle(cross):
-                    self._add_edge(a, cross)
-                # Otherwise, create a new vertex, draw the edge, and recurse
-                else:
-                    self._split_edge(cur, cross)
-                    self._add_edge(a, cross)
+            cur, cross = self._first_crossing(
+                cur, a, b, lambda p: self.vertices.find(p[0], p[1]) == a_vertex
+            )
+
+            # Where a--b crosses another line, the crossing comes from the two
+            # lines, so it's the same every time
+            if line is not None and cur.line >= 0:
+                meet = self.crossing(line, cur.line)
+                if meet is not None:
+                    cross = meet
+            cross_vertex = self.vertices.find(cross[0], cross[1])
+
+            # If we hit the final point, we're done
+            if cross_vertex == b_vertex:
+                self._add_edge(a, b, line)
+                return
+
+            # If a--b crosses a vertex, recurse on that vertex, continuing in
+            # the face around it that a--b goes into
+            if cross_vertex is not None:
+                cross = self.vertices.point(cross_vertex)
+                self._add_edge(a, cross, line)
+                cur = self._add_edge_helper(cross, b).twin
+            # Otherwise, create a new vertex, draw the edge, and recurse
+            else:
+                self._split_edge(cur, cross)
+                self._add_edge(a, cross, line)
+                cross_vertex = self.vertices.find(cross[0], cross[1])
+                if line is not None and cur.line >= 0:
+                    self.vertices.tag(cross_vertex, line, cur.line)
+
+                # flip to new face
+                cur = cur.twin.prev.link
+
+            # have new "start" point
+            a, a_vertex = cross, cross_vertex
+
+    def crossing(self, i: int, j: int) -> ndarray:
+        """
+        Find where two of the lines cross. The point is one cross product of
+        the lines' coefficients, with
+        :func:`src.data_structures.utils.line_meet`, so the same pair always
+        gives the same coordinates. If there is already a vertex there, which
+        is one hash lookup in :attr:`vertices`, its point is returned.
+
+        :param int i: Index of one line in :attr:`lines`
+        :param int j: Index of another line in :attr:`lines`
+        :return: The point where lines i and j cross, or None if they are
+            parallel
+        :rtype: numpy.ndarray
+        """
 
-                # flip to new face, have new "start" point
-                cur = cur.twin.prev
-                a = cross
+        if i > j:
+            i, j = j, i
+        p = line_meet(self.line_coefficients[i], self.line_coefficients[j])
+        if p is None:
+            return None
+
+        v = self.vertices.find(p[0], p[1])
+        return p if v is None else self.vertices.point(v)
+
+    def edges_of_line(self, i: int) -> list:
+        """
+        Find the edges that lie on a line, in order along it. The sides of the
+        bounding box are lines too, with the ids in
+        :data:`src.data_structures.half_edge.BOUNDARY_LINES`, and their edges
+        go CCW around the box. This takes time proportional to the number of
+        edges found, after an index is built on first use.
+
+        :param int i: Index of a line in :attr:`lines`, or one of
+            :data:`src.data_structures.half_edge.BOUNDARY_LINES`
+        :return: One HalfEdge of each edge on the line, going from the line's
+            first point towards its second. A removed line has no edges.
+        :rtype: list[:class:`src.data_structures.half_edge.HalfEdge`]
+        """
+
+        if i < 0:
+            return list(self._boundary_edges[BOUNDARY_LINES.index(i)])
+        if self.lines[i] is None:
+            return []
+
+        if self._line_edges is None:
+            self._index_line_edges()
+
+        a, b = self.lines[i]
+        direction = (b[0] - a[0], b[1] - a[1])
+
+        def along(h: HalfEdge) -> float:
+            p, q = h.point, h.twin.point
+            return (q[0] - p[0]) * direction[0] + (q[1] - p[1]) * direction[1]
+
+        edges = [
+            h if along(h) >= 0 else h.twin for h in self._line_edges.get(i, dict())
+        ]
+        edges.sort(key=lambda h: dot(h.point[:2], direction))
+        return edges
+
+    def _index_line_edges(self):
+        """
+        Build :attr:`_line_edges` from scratch, keeping the first HalfEdge of
+        each edge that :func:`_half_edge_columns` numbers.
+        """
+
+        half_edges, twin, _, line, _ = self._half_edge_columns()
+        self._line_edges = dict()
+        for h in flatnonzero((line >= 0) & (arange(len(twin)) < twin)).tolist():
+            self._line_edges.setdefault(int(line[h]), dict())[half_edges[h]] = None
+
+    def lines_of_face(self, f: int) -> list:
+        """
+        Find the lines that the edges of a face lie on, in time proportional
+        to the number of edges of the face.
+
+        :param int f: Id of the face
+        :return: The line of each edge of the face, in the same order as the
+            points of :func:`face`'s polygon, so edge k goes from point k to
+            point k + 1. The sides of the bounding box are
+            :data:`src.data_structures.half_edge.BOUNDARY_LINES`.
+        :rtype: list[int]
+        """
+
+        ring, _ = self._face_edges(self._face_handle(f))
+        return [h.line for h in ring]
 
-            # move to the next edge
+    def _face_edges(self, h: HalfEdge) -> tuple:
+        """
+        Collect the HalfEdges of the face of h, in order starting from h.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            of the face to collect
+        :return: A list of the HalfEdges of the face, and an (M,2,3) array of
+            the endpoints of each of those HalfEdges.
+        :rtype: tuple[list[HalfEdge], numpy.ndarray]
+        """
+
+        ring = [h]
+        cur = h.link
+        while cur != h:
+            ring.append(cur)
             cur = cur.link
 
+        return ring, array([(e.point, e.twin.point) for e in ring], dtype=float)
+
+    def _first_crossing(self, h: HalfEdge, a: ndarray, b: ndarray, skip) -> tuple:
+        """
+        Walk around the face of h, starting at h, and find the first HalfEdge
+        that segment a--b crosses. The whole face is tested in one call to
+        :func:`src.data_structures.utils.segment_intersections`.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: HalfEdge
+            from which to start walking the face
+        :param ndarray a: One endpoint of the segment a--b
+        :param ndarray b: Other endpoint of the segment a--b
+        :param callable skip: Returns True for crossing points that should be
+            ignored, like the point where we entered the face.
+        :return: The crossed HalfEdge and the point where a--b crosses it,
+            or (None, None) if a--b doesn't leave the face.
+        :rtype: tuple[HalfEdge, numpy.ndarray]
+        """
+
+        ring, edges = self._face_edges(h)
+        mask, crosses = segment_intersections(a, b, edges)
+
+        for i in flatnonzero(mask):
+            if not skip(crosses[i]):
+                return ring[i], crosses[i]
+
+        return None, None
+
     def _find_boundary_half_edge(self, p: ndarray) -> HalfEdge:
         """
         Given a point on the boundary, find the half edge on the boundary
@@ -277,74 +810,1065 @@ class BoundedPolygonalSubdivision:
 
         :param numpy.ndarray p: Point on outer boundary of subdvision
         :return: A boundary HalfEdge `h` such that `h.point` is `p`.
-        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge` or None
         """
 
-        for i in range(len(self.boundary_polygon)):
-            if orient(self.boundary_polygon[i], p, self.boundary_polygon[i + 1]) == 0:
+        side, key = self._boundary_position(p)
+        if side is None:
+            return None
+
+        keys, edges = self._boundary_keys[side], self._boundary_edges[side]
+        i = bisect_right(keys, key + EPSILON) - 1
 
-                l = norm(self.boundary_polygon[i + 1] - self.boundary_polygon[i])
-                n1 = norm(p - self.boundary_polygon[i])
-                n2 = norm(p - self.boundary_polygon[i + 1])
+        # If p is already a boundary point, we want the edge that ends at p,
+        # unless p is the bottom left corner where the boundary starts
+        if abs(keys[i] - key) <= EPSILON and (side, i) != (0, 0):
+            if i == 0:
+                return self._boundary_edges[side - 1][-1]
+            return edges[i - 1]
 
-                # if we're between two points, we're at the right place
-                if n1 <= l and n2 <= l:
-                    return self.get_handle(self.boundary_polygon[i])
+        return edges[i]
 
     def add_line(self, line: tuple):
         """
         Given a line create the line between them in the subdivision.
 
         :param tuple[ndarray] line: A tuple of two points on the outer boundary
+        :raises ValueError: If the line runs along a side of the box, or is
+            already in the subdivision
         """
 
-        # Find the halfedges for doing edge subdivision
-        h1, h2 = self.get_handle(line[0]), self.get_handle(line[1])
-        if not h1:
-            h1 = self._find_boundary_half_edge(line[0])
-        if not h2:
-            h2 = self._find_boundary_half_edge(line[1])
+        self._check_new_line(line)
 
-        if not h1 or not h2:
-            raise Exception()
+        # Split the boundary where the line starts and ends, unless there's
+        # already a vertex there
+        for p in line:
+            if self.get_handle(p) is None:
+                h = self._find_boundary_half_edge(p)
+                if not h:
+                    raise Exception()
 
-        # Do the subdivisions
-        self._split_edge(h1, line[0], boundary_split=True)
-        self._split_edge(h2, line[1], boundary_split=True)
+                self._split_edge(h, p, boundary_split=True)
 
         # add in the line
-        self._slice_edge(*line)
+        i = len(self.lines)
+        self.line_coefficients.append(line_through(*array(line, dtype=float)))
+        self._slice_edge(*line, i)
+        self.lines.append(line)
+        self._line_ids[i] = None
+        if self._locator is not None:
+            self._locate_line(i)
+        self.version += 1
+
+    def _check_new_line(self, line: tuple):
+        """
+        Make sure a line can be added. A line whose ends are the same point,
+        or on the same side of the box, would lie along the boundary, and a
+        line with the same ends as one that was already added would lie
+        along it. Either way, no face has it as a chord.
 
-    def find_zone(self, zone_line: tuple) -> list:
+        :param tuple[ndarray] line: A tuple of two points on the outer boundary
+        :raises ValueError: If the line can't be added
         """
-        Takes a line defining a zone and returns a list of
-        :class:`src.data_structures.polygon.Polygon` that contain the zone
-        line.
 
-        :param tuple[ndarray] zone_line: A tuple of two points in the boundary.
-        :return: A list of :class:`src.data_structures.polygon.Polygon` that
-            contain some portion of the `zone_line`.
-        :rtype: list[Polygon]
+        a, b = line
+        dx, dy = abs(float(a[0]) - float(b[0])), abs(float(a[1]) - float(b[1]))
+        on_side = (
+            dx <= EPSILON
+            and min(abs(a[0] - self.min_x), abs(a[0] - self.max_x)) <= EPSILON
+        ) or (
+            dy <= EPSILON
+            and min(abs(a[1] - self.min_y), abs(a[1] - self.max_y)) <= EPSILON
+        )
+        if on_side or max(dx, dy) <= EPSILON:
+            raise ValueError(f"Line {line} runs along the boundary")
+
+        # Every line ends on the boundary, so a line ending at b that goes
+        # through a also ends at a
+        h = self.get_handle(a)
+        end = self.vertices.find(b[0], b[1])
+        if h is None or end is None:
+            return
+
+        cur = h
+        while True:
+            if cur.line is not None and cur.line >= 0:
+                ends = [self.vertices.find(q[0], q[1]) for q in self.lines[cur.line]]
+                if end in ends:
+                    raise ValueError(f"Line {line} is already line {cur.line}")
+            cur = cur.twin.link
+            if cur == h:
+                break
+
+    def remove_line(self, i: int):
+        """
+        Take a line out of the subdivision. Each of its edges is removed,
+        which merges the faces on both sides of it, and then each vertex that
+        is left with just two edges on the same line, like where it crossed
+        one other line or ended on the boundary, is removed by joining those
+        two edges. The result has the same vertices, edges, and faces as
+        adding every line but this one.
+
+        Faces are merged in time proportional to the zone of the line. Face
+        ids stay numbered from 0, so the last face takes the id of each face
+        that goes away. Line ids don't change: the line is left as None in
+        :attr:`lines`, and its id isn't given to any later line.
+
+        :param int i: Index of the line in :attr:`lines`
+        :raises IndexError: If there is no line i, or it was already removed
+        """
+
+        if i not in self._line_ids:
+            raise IndexError(i)
+
+        edges = self.edges_of_line(i)
+        along = [h.vertex for h in edges] + [h.twin.vertex for h in edges[-1:]]
+
+        # Forget where this line crosses the other lines through its vertices,
+        # and remember one other line through each, which is the line whose
+        # edges are joined if the vertex goes away
+        others = []
+        for v in along:
+            start = cur = self._vertex_handle(v)
+            other = None
+            while True:
+                if cur.line != i:
+                    other = cur.line
+                    if cur.line >= 0:
+                        self.vertices.untag(v, i, cur.line)
+                cur = cur.twin.link
+                if cur == start:
+                    break
+            others.append((other, float(self.vertices.coords[v, 0])))
+
+        for h in edges:
+            self._remove_edge(h)
+        for v in along:
+            self._join_edges(v)
+
+        if self._locator is not None:
+            self._locator.remove_line(i)
+            for v, (other, x) in zip(along, others):
+                if self._vertex_handle(v) is None:
+                    self._locator.join_edges(other, x)
+
+        self._line_edges.pop(i, None)
+        del self._line_ids[i]
+        self.lines[i] = self.line_coefficients[i] = None
+
+        self.version += 1
+
+    def _remove_edge(self, h: HalfEdge):
+        """
+        Remove the edge of h, and merge the faces on both sides of it.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            of the edge to remove, which has a different face on each side
+        """
+
+        t = h.twin
+        h.prev.link, t.link.prev = t.link, h.prev
+        t.prev.link, h.link.prev = h.link, t.prev
+
+        # Each end keeps the next HalfEdge around it as its handle
+        for e, after in ((h, t.link), (t, h.link)):
+            if self._vertex_handle(e.vertex) == e:
+                self._set_vertex_handle(e.vertex, after)
+
+        keep, gone = sorted((h.face, t.face))
+        self._merge_faces(keep, gone, h.prev)
+        self._remove_half_edge(h)
+        self._remove_half_edge(t)
+
+    def _merge_faces(self, keep: int, gone: int, h: HalfEdge):
+        """
+        Give the id keep to the ring of h, which used to be faces keep and
+        gone. The last face then takes the id gone, so face ids stay numbered
+        from 0 to :attr:`n_faces` - 1.
+
+        :param int keep: Id of the merged face
+        :param int gone: Id of the face that went away
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            of the merged face
+        """
+
+        def relabel(start: HalfEdge, f: int):
+            cur = start
+            while True:
+                cur.face = f
+                cur = cur.link
+                if cur == start:
+                    break
+            self._set_face_handle(f, start)
+
+        relabel(h, keep)
+        if gone != self.n_faces - 1:
+            relabel(self._face_handle(self.n_faces - 1), gone)
+
+        self.n_faces -= 1
+        for f in (keep, gone, self.n_faces):
+            self._face_cache.pop(f, None)
+
+    def _join_edges(self, v: int):
+        """
+        If vertex v has just two edges, and they are on the same line, replace
+        them with one edge and remove v.
+
+        :param int v: Id of a vertex
+        """
+
+        a = self._vertex_handle(v)
+        b = a.twin.link
+        if b == a or b.twin.link != a or a.line != b.line:
+            return
+
+        # x comes into v and goes on along b, and z comes into v and goes on
+        # along a. Cutting out a and b leaves x and z as twins.
+        x, z = a.twin, b.twin
+        x.link, b.link.prev = b.link, x
+        z.link, a.link.prev = a.link, z
+        x.twin, z.twin = z, x
+
+        for e, kept in ((b, x), (a, z)):
+            if self._face_handle(e.face) == e:
+                self._set_face_handle(e.face, kept)
+            self._face_cache.pop(e.face, None)
+
+        if a.line < 0:
+            side, key = self._boundary_position(self.vertices.point(v))
+            j = bisect_left(self._boundary_keys[side], key)
+            del self._boundary_keys[side][j]
+            del self._boundary_edges[side][j]
+        elif self._line_edges is not None:
+            edges = self._line_edges[a.line]
+            for e in (a, b, x, z):
+                edges.pop(e, None)
+            edges[x] = None
+
+        self._set_vertex_handle(v, None)
+        self.vertices.remove(v)
+        self._remove_half_edge(a)
+        self._remove_half_edge(b)
+
+    def _remove_half_edge(self, h: HalfEdge):
+        """
+        Forget a HalfEdge that is no longer linked to anything. HalfEdges are
+        objects, so they're just dropped. Backends that store HalfEdges
+        differently can override this.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: The
+            HalfEdge to forget
+        """
+
+    def add_lines(self, lines: list):
+        """
+        Add many lines at once. Rather than walking the zone of each line like
+        :func:`add_line`, all pairs of lines are intersected and the whole
+        subdivision is wired up in one batch by
+        :func:`src.data_structures.arrangement.build_arrangement`. The result
+        has the same faces as adding the lines one at a time.
+
+        Lines that were already added are rebuilt along with the new ones, so
+        HalfEdges from before this call are no longer part of the subdivision.
+
+        Time and memory grow with the number of crossings, which is up to
+        about :math:`n^2/2` for n lines. This class makes a Python object for
+        every half edge, so it's meant for up to about 1,000 lines, which
+        take a few seconds and about 300 MB. For more, use
+        :class:`src.data_structures.array_subdivision.ArrayBoundedPolygonalSubdivision`,
+        which builds 2,500 random lines in about 3 seconds and 600 MB, and
+        5,000 in about 15 seconds and 2 GB.
+
+        :param list[tuple[ndarray]] lines: Lines to add, each a tuple of two
+            points on the outer boundary
+        """
+
+        if lines:
+            ends = array(lines, dtype=float)
+            self.line_coefficients.extend(line_through(ends[:, 0], ends[:, 1]))
+        first = len(self.lines)
+        self.lines.extend(lines)
+        self._line_ids.update(dict.fromkeys(range(first, len(self.lines))))
+        self._locator = None
+        self._line_edges = None
+        self.version += 1
+        self._load_arrangement(self._with_line_ids(self._build_arrangement()))
+
+    def _build_arrangement(self) -> ArrangementArrays:
+        """
+        Build the DCEL of all of the lines at once with
+        :func:`src.data_structures.arrangement.build_arrangement`.
+        Subdivisions that place their vertices differently can override this.
+
+        :return: Columns of the DCEL of the lines in :attr:`line_ids`, where
+            each line is numbered by its place in that list
+        :rtype: ArrangementArrays
+        """
+
+        return build_arrangement(
+            point(self.min_x, self.min_y),
+            point(self.max_x, self.max_y),
+            [self.lines[i] for i in self._line_ids],
+        )
+
+    def _with_line_ids(self, arrangement: ArrangementArrays) -> ArrangementArrays:
+        """
+        Number the lines of a DCEL from :func:`_build_arrangement` by their
+        ids, rather than by their place in :attr:`line_ids`, which is
+        different once lines have been removed.
+
+        :param ArrangementArrays arrangement: Columns of the DCEL
+        :return: The same DCEL, with its lines numbered by id
+        :rtype: ArrangementArrays
+        """
+
+        if len(self._line_ids) == len(self.lines):
+            return arrangement
+
+        ids = array(self.line_ids, dtype=arrangement.line.dtype)
+        line, crossing = arrangement.line.copy(), arrangement.crossing.copy()
+        line[line >= 0] = ids[line[line >= 0]]
+        crossing[crossing >= 0] = ids[crossing[crossing >= 0]]
+        return replace(arrangement, line=line, crossing=crossing)
+
+    def _load_arrangement(self, arrangement: ArrangementArrays):
+        """
+        Replace the contents of the subdivision with a DCEL built by
+        :func:`src.data_structures.arrangement.build_arrangement`. Backends
+        that store HalfEdges differently can override this.
+
+        :param ArrangementArrays arrangement: Columns of the new DCEL
+        """
+
+        self.vertices = VertexIndex.from_coords(
+            arrangement.coords, arrangement.crossing
+        )
+        points = [point(x, y) for x, y in arrangement.coords.tolist()]
+        half_edges = [
+            self.half_edge_type(point=points[v], vertex=v)
+            for v in arrangement.origin.tolist()
+        ]
+
+        # Go through the columns a chunk of rows at a time, so they aren't all
+        # whole lists of Python ints at once
+        chunk = 1 << 16
+        for start in range(0, len(half_edges), chunk):
+            rows = slice(start, start + chunk)
+            for h, twin, link, prev, line, face in zip(
+                half_edges[rows],
+                arrangement.twin[rows].tolist(),
+                arrangement.link[rows].tolist(),
+                arrangement.prev[rows].tolist(),
+                arrangement.line[rows].tolist(),
+                arrangement.face[rows].tolist(),
+            ):
+                h.twin, h.link, h.prev = (
+                    half_edges[twin],
+                    half_edges[link],
+                    half_edges[prev],
+                )
+                h.line = line
+                h.face = face
+
+        self._handles = [half_edges[h] for h in arrangement.handle.tolist()]
+        self._face_handles = [half_edges[h] for h in arrangement.face_handle.tolist()]
+        self.n_faces = len(self._face_handles)
+        self._face_cache = dict()
+
+        self._index_boundary(
+            [half_edges[h] for h in arrangement.handle[arrangement.boundary]]
+        )
+
+    def iter_zone(self, zone_line: tuple, ray: bool = False):
+        """
+        Takes a line defining a zone and lazily yields one HalfEdge in each
+        face that contains the zone line, in order from the first point of the
+        line to the second. No :class:`src.data_structures.polygon.Polygon` is
+        made, so callers that only need some of the faces, or only need to
+        walk them, can stop early or call
+        :func:`src.data_structures.half_edge.HalfEdge.get_polygon` on just the
+        ones they need.
+
+        The zone line can be any segment starting in the bounding box. If its
+        first point isn't on the boundary, the walk starts from the face found
+        by :func:`locate` instead of walking in from the boundary, so only the
+        faces the segment crosses are walked. The index :func:`locate` uses is
+        kept up to date as lines are added, so finding that face takes
+        :math:`O(\\log n)` time for n lines, or one sort of the lines the
+        first time a point is in its slab, rather than a pass over every edge.
+        A segment that goes past the boundary is cut off where it leaves the
+        bounding box, like a ray.
+
+        :param tuple[ndarray] zone_line: A tuple of two points. The first one
+            must be in or on the boundary.
+        :param bool ray: If True, the zone line starts at its first point and
+            goes through its second point until it reaches the boundary.
+        :return: A generator of HalfEdges, one in each face of the zone, where
+            each is the HalfEdge the zone line leaves that face through. If
+            the zone line ends inside a face, the last one is just some
+            HalfEdge of that face.
+        :rtype: Iterator[HalfEdge]
+        :raises ValueError: If the zone line starts outside of the bounding
+            box, or it is a ray whose two points are the same.
         """
 
         a, b = zone_line
-        cur = self._find_boundary_half_edge(a).twin
+        bx, by = float(b[0]), float(b[1])
+        outside = not (
+            self.min_x <= bx <= self.max_x and self.min_y <= by <= self.max_y
+        )
+        if ray or outside:
+            b = self._ray_exit(a, b)
+
+        cur = self._zone_start(a, b)
+        if cur is None:
+            raise ValueError(f"{a} is outside of the bounding box")
 
-        zone = []
         while True:
-            cross = segment_intersection(a, b, cur.point, cur.twin.point)
+            crossed, cross = self._first_crossing(
+                cur, a, b, lambda p: norm(p - a) <= EPSILON
+            )
+
+            # If we didn't leave the face, the zone line ends inside it
+            if crossed is None:
+                yield cur
+                return
+
+            yield crossed
+
+            # If we hit the final point, we're done
+            if norm(cross - b) <= EPSILON:
+                return
+
+            # Recurse on cross point. If it's a vertex, the next face is the
+            # one around it that the zone line goes into. Otherwise, since
+            # we're not subdividing edges like in slice_edge, we don't need
+            # to do cur.twin.prev
+            v = self.vertices.find(cross[0], cross[1])
+            if v is not None:
+                a = self.vertices.point(v)
+                cur = self._face_ahead(self._vertex_handle(v), b)
+            else:
+                a = cross
+                cur = crossed.twin.link
 
-            if cross is not None and not norm(cross - a) <= EPSILON:
-                zone.append(cur.get_polygon())
+    def _zone_start(self, a: ndarray, b: ndarray) -> HalfEdge:
+        """
+        Find the face a zone line going from a towards b starts in.
 
-                # If we hit the final point, we're done
-                if norm(cross - b) <= EPSILON:
-                    return zone
+        :param ndarray a: First point of the zone line
+        :param ndarray b: Second point of the zone line
+        :return: A HalfEdge of the first face of the zone, or None if a is
+            outside of the bounding box
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
 
-                # Recurse on cross point
-                a = cross
-                # Since we're not subdividing edges like in slice_edge, we
-                # don't need to do cur.twin.prev
-                cur = cur.twin
+        h = self.get_handle(a)
+        if h is not None:
+            return self._face_ahead(h, b)
+
+        h = self._find_boundary_half_edge(a)
+        if h is not None:
+            return h.twin
+
+        h = self.locate(a)
+        if h is None:
+            return None
+
+        # If a is on an edge, the zone line might go into the face on the
+        # other side of it. Like at a vertex, take the face on the right of
+        # the zone line if it runs along the edge.
+        cur = h
+        while True:
+            p, q = cur.point, cur.twin.point
+            if orient2d(p, q, a) == 0 and dot(p[:2] - a[:2], q[:2] - a[:2]) < 0:
+                turn = orient2d(p, q, b)
+                if turn > 0 or turn == 0 and dot(q[:2] - p[:2], b[:2] - a[:2]) < 0:
+                    return cur.twin
+                return cur
 
             cur = cur.link
+            if cur == h:
+                return h
+
+    def _face_ahead(self, h: HalfEdge, b: ndarray) -> HalfEdge:
+        """
+        Find the face around a vertex that a segment leaving the vertex goes
+        into. If the segment runs along an edge, this is the face on the right
+        of the segment, unless that is the outside of the box.
+
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+            coming out of the vertex p
+        :param ndarray b: The other end of the segment p--b
+        :return: The HalfEdge coming out of p whose face p--b goes into, or
+            None if p--b leaves the bounding box
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        p = h.point
+        cur, found = h, None
+        while True:
+            # The face of cur is on its right, between it and the edge before
+            # it going CW around p, which comes back from cur.prev
+            if cur.face != 0:
+                after, before = cur.twin.point, cur.prev.point
+                before_turn = orient2d(p, before, b)
+                right_of_after = orient2d(p, after, b) <= 0
+                if orient2d(p, before, after) >= 0:
+                    inside = before_turn >= 0 and right_of_after
+                else:
+                    inside = before_turn >= 0 or right_of_after
+
+                # Along an edge, the faces on both sides of it have p--b in
+                # them. Take the one on the right of p--b, so the same face
+                # is found whichever HalfEdge we start from.
+                if inside:
+                    if before_turn or dot(before[:2] - p[:2], b[:2] - p[:2]) < 0:
+                        return cur
+                    found = cur
+
+            cur = cur.twin.link
+            if cur == h:
+                return found
+
+    def _ray_exit(self, a: ndarray, b: ndarray) -> ndarray:
+        """
+        :return: Where the ray starting at a and going through b leaves the
+            bounding box
+        :rtype: numpy.ndarray
+        :raises ValueError: If a and b are the same point, so there is no ray
+        """
+
+        (ax, ay), (bx, by) = a[:2].tolist(), b[:2].tolist()
+        dx, dy = bx - ax, by - ay
+        if not (dx or dy):
+            raise ValueError(f"The ray from {a} through {b} has no direction")
+
+        # How far along the ray we can go before leaving each pair of sides
+        steps = []
+        if dx:
+            steps.append(((self.max_x if dx > 0 else self.min_x) - ax) / dx)
+        if dy:
+            steps.append(((self.max_y if dy > 0 else self.min_y) - ay) / dy)
+
+        t = min(steps)
+        return point(ax + t * dx, ay + t * dy)
+
+    def zone_complexity(self, zone_line: tuple) -> ZoneComplexity:
+        """
+        Takes a line defining a zone and counts the faces and edges in it,
+        which is the quantity bounded by the zone theorem. The faces are the
+        same ones :func:`find_zone` finds, but no
+        :class:`src.data_structures.polygon.Polygon` is made and no points are
+        copied. Each face is walked once with plain float arithmetic, so this
+        is fast enough to call for every line of a large arrangement.
+
+        With the zone line going from its first point to its second, an edge
+        is left bounding if its face is ahead of it, and right bounding if its
+        face is behind it. Edges parallel to the zone line are neither.
+
+        Results are kept in :attr:`zone_cache` until a line is added.
+
+        :param tuple[ndarray] zone_line: A tuple of two points in the boundary.
+        :return: Number of faces and edges in the zone
+        :rtype: ZoneComplexity
+        """
+
+        key = ZoneCache.key("zone_complexity", zone_line, False, self.version)
+        complexity = self.zone_cache.get(key)
+        if complexity is None:
+            complexity = self._zone_complexity(zone_line)
+            self.zone_cache.put(key, complexity)
+
+        return replace(complexity)
+
+    def _zone_complexity(self, zone_line: tuple) -> ZoneComplexity:
+        """
+        :func:`zone_complexity` without the cache.
+
+        :param tuple[ndarray] zone_line: A tuple of two points in the boundary.
+        :return: Number of faces and edges in the zone
+        :rtype: ZoneComplexity
+        """
+
+        a, b = zone_line
+        ax, ay, bx, by = float(a[0]), float(a[1]), float(b[0]), float(b[1])
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+
+        # How far along the zone line EPSILON is, with a at 0 and b at 1
+        step = EPSILON / length**0.5
+        zero = float(ZERO_DETERMINANT)
+
+        def side(x: float, y: float) -> float:
+            s = dx * (y - ay) - dy * (x - ax)
+            return s if abs(s) > zero else 0.0
+
+        complexity = ZoneComplexity()
+        cur, t_in = self._zone_start(a, b), 0.0
+
+        while cur is not None:
+            complexity.faces += 1
+
+            # Walk the face from the edge we came in through. The zone line
+            # leaves through the point of the face farthest along it, which is
+            # either inside an edge whose endpoints are on opposite sides of
+            # it, or a vertex on it.
+            h, (px, py) = cur, cur.point[:2].tolist()
+            p_side = side(px, py)
+            leave, leave_t, at_vertex = None, t_in + step, False
+            while True:
+                nxt = h.link
+                qx, qy = nxt.point[:2].tolist()
+                q_side = side(qx, qy)
+
+                # Faces are on the right of their HalfEdges, so the face is
+                # ahead of an edge when the zone line turns right from it
+                turn = (qx - px) * dy - (qy - py) * dx
+                complexity.edges += 1
+                if turn < -EPSILON:
+                    complexity.left_edges += 1
+                elif turn > EPSILON:
+                    complexity.right_edges += 1
+
+                if p_side < 0 < q_side or q_side < 0 < p_side:
+                    s = p_side / (p_side - q_side)
+                    x, y = px + s * (qx - px), py + s * (qy - py)
+                    t = ((x - ax) * dx + (y - ay) * dy) / length
+                    if t > leave_t:
+                        leave, leave_t, at_vertex = h, t, False
+                elif q_side == 0:
+                    t = ((qx - ax) * dx + (qy - ay) * dy) / length
+                    if t > leave_t:
+                        leave, leave_t, at_vertex = nxt, t, True
+
+                h, px, py, p_side = nxt, qx, qy, q_side
+                if h == cur:
+                    break
+
+            # If we left through the final point, we're done
+            if leave is None or leave_t >= 1 - step:
+                return complexity
+
+            # Through a vertex, the next face is the one around it that the
+            # zone line goes into
+            if at_vertex:
+                cur = self._face_ahead(leave, b)
+            else:
+                cur = leave.twin
+            t_in = leave_t
+
+        return complexity
+
+    def _half_edge_columns(self) -> tuple:
+        """
+        Number every HalfEdge in the subdivision and describe them as columns.
+        Backends that already store HalfEdges in columns can override this.
+
+        :return: A sequence of the HalfEdges, arrays of the twin, link, and
+            line of each of them, where the sides of the bounding box are
+            :data:`src.data_structures.half_edge.BOUNDARY_LINES`, and
+            an (E,2) array of the point each of them comes out of.
+        :rtype: tuple
+        """
+
+        # Every HalfEdge comes out of exactly one vertex, so going around
+        # every vertex finds each of them once
+        half_edges = []
+        for v in self._handled_vertices():
+            start = cur = self._vertex_handle(v)
+            while True:
+                half_edges.append(cur)
+                cur = cur.twin.link
+                if cur == start:
+                    break
+
+        index = {h: i for i, h in enumerate(half_edges)}
+        twin = array([index[h.twin] for h in half_edges], dtype=int)
+        link = array([index[h.link] for h in half_edges], dtype=int)
+        line = array([-1 if h.line is None else h.line for h in half_edges], int)
+        points = array([h.point[:2] for h in half_edges], dtype=float)
+
+        return half_edges, twin, link, line, points.reshape(-1, 2)
+
+    def iter_faces(self, outer: bool = False):
+        """
+        Lazily yield every face of the subdivision once, in :math:`O(E)` time
+        for E HalfEdges. Every HalfEdge is numbered by
+        :func:`_half_edge_columns` and marked off in a visited bitmap as its
+        face is walked, so no face is walked twice and no polygons are
+        compared. The points of all the faces are gathered into one array, and
+        each face gets a view of its part of it.
+
+        :param bool outer: If True, also yield the outside of the bounding
+            box, which is face 0, going CCW around the box.
+        :return: A generator of pairs of a HalfEdge in each face, and a view
+            of an (M,2) array of the points around that face, starting at that
+            HalfEdge. The views share memory, so they must not be changed.
+        :rtype: Iterator[tuple[HalfEdge, numpy.ndarray]]
+        """
+
+        half_edges, order, starts, rings = self._face_rings()
+        for start, end in zip(starts.tolist(), starts[1:].tolist()):
+            h = half_edges[order[start]]
+            if outer or h.face != 0:
+                yield h, rings[start:end]
+
+    def _face_rings(self) -> tuple:
+        """
+        Walk every face once, marking off HalfEdges in a visited bitmap.
+
+        :return: The HalfEdges numbered like :func:`_half_edge_columns`, the
+            HalfEdges in order around each face one face after another, where
+            the faces start in that order, followed by the total number of
+            HalfEdges, and an (E,2) array of the points the HalfEdges in that
+            order come out of.
+        :rtype: tuple
+        """
+
+        half_edges, _, link, _, points = self._half_edge_columns()
+        link = link.tolist()
+
+        visited = bytearray(len(link))
+        order, starts = [], [0]
+        for i in range(len(link)):
+            if visited[i]:
+                continue
+
+            while not visited[i]:
+                visited[i] = 1
+                order.append(i)
+                i = link[i]
+            starts.append(len(order))
+
+        order = array(order, dtype=int)
+        return half_edges, order, array(starts), points[order].reshape(-1, 2)
+
+    def face_metrics(self) -> FaceMetrics:
+        """
+        Measure every face inside the bounding box at once. The points of all
+        faces are gathered into one array by :func:`_face_rings`, and each
+        measure is a vectorized sum or min or max over each face's part of it
+        with ``reduceat``.
+
+        :return: Area, centroid, bounding box, and degree of each face, in
+            order of face id
+        :rtype: FaceMetrics
+        """
+
+        half_edges, order, starts, rings = self._face_rings()
+        first, degree = starts[:-1], diff(starts)
+
+        # Measure from the first point of each face, which keeps the products
+        # small for faces far from the origin
+        origin = rings[first]
+        local = rings - origin.repeat(degree, axis=0)
+
+        # The next point around the face, wrapping around at the end
+        following = arange(len(rings)) + 1
+        following[starts[1:] - 1] = first
+        x, y = local[:, 0], local[:, 1]
+        nx, ny = x[following], y[following]
+        cross = x * ny - nx * y
+
+        # Faces are CW, so their shoelace sums are negative
+        signed = add.reduceat(cross, first) / 2
+        centroid = (
+            column_stack(
+                (
+                    add.reduceat((x + nx) * cross, first),
+                    add.reduceat((y + ny) * cross, first),
+                )
+            )
+            / (6 * signed[:, None])
+            + origin
+        )
+        bbox = stack(
+            (minimum.reduceat(rings, first), maximum.reduceat(rings, first)), axis=1
+        )
+
+        face = array([half_edges[h].face for h in order[first].tolist()], dtype=int)
+        inside = flatnonzero(face != 0)
+        inside = inside[argsort(face[inside])]
+
+        return FaceMetrics(
+            face[inside],
+            -signed[inside],
+            centroid[inside],
+            bbox[inside],
+            degree[inside],
+        )
+
+    def all_zones(self) -> AllZones:
+        """
+        Find the zone of every line that has been added, in one pass over all
+        HalfEdges, which is :math:`O(n^2)` for n lines. Lines that were
+        removed have empty zones.
+
+        The zone of a line is taken in the arrangement of all the other lines,
+        so it is what :func:`zone_complexity` would find if that line were
+        added last. Each edge of the line splits one face of that zone in two,
+        so the zone has one face for each edge of the line. The face has the
+        edges of the faces on both sides, except for the edge of the line
+        itself. Where the line crosses just one other line or a side of the
+        box, that edge is counted once instead of as two pieces. Where other
+        lines meet at the same point, or at a corner, the point stays a vertex
+        without the line, and the pieces stay separate edges. Lines are
+        assumed to be different from each other.
+
+        :return: Number of faces and edges in each line's zone
+        :rtype: AllZones
+        """
+
+        _, twin, link, line, points = self._half_edge_columns()
+
+        face, _ = label_faces(link)
+        face_size = bincount(face)[face]
+
+        # Removed lines have no edges, so their rows are never looked at
+        starts = zeros((len(self.lines), 2))
+        ends = zeros((len(self.lines), 2))
+        for i in self._line_ids:
+            starts[i], ends[i] = self.lines[i][0][:2], self.lines[i][1][:2]
+        direction = ends - starts
+
+        # Keep the half of each edge on a line that goes the same way as the
+        # line, and put them in order along their lines
+        on_line = flatnonzero(line >= 0)
+        step = points[link[on_line]] - points[on_line]
+        forward = on_line[(step * direction[line[on_line]]).sum(axis=1) > 0]
+        along = (
+            (points[forward] - starts[line[forward]]) * direction[line[forward]]
+        ).sum(axis=1)
+        forward = forward[lexsort((along, line[forward]))]
+
+        # Without the line, a vertex it makes goes away when only two edges
+        # are left there, unless they are the sides of the box at a corner.
+        # The line has one edge at a point on the boundary and two elsewhere.
+        _, vertex, degree = unique(
+            points, axis=0, return_inverse=True, return_counts=True
+        )
+        vertex = vertex.reshape(-1)
+        x, y = points[:, 0], points[:, 1]
+        on_x = (abs(x - self.min_x) <= EPSILON) | (abs(x - self.max_x) <= EPSILON)
+        on_y = (abs(y - self.min_y) <= EPSILON) | (abs(y - self.max_y) <= EPSILON)
+        joined = (degree[vertex] - 2 + (on_x | on_y) == 2) & ~(on_x & on_y)
+
+        # Both faces have the line's edge, and both have a piece of each
+        # edge that joins back together at its ends
+        face_edges = (
+            face_size[forward]
+            + face_size[twin[forward]]
+            - 2
+            - joined[forward]
+            - joined[twin[forward]]
+        )
+        offsets = concatenate(
+            ([0], cumsum(bincount(line[forward], minlength=len(self.lines))))
+        )
+
+        return AllZones(offsets, face_edges)
+
+    def _point_locator(self) -> LineLocator:
+        """
+        :return: The point location index, which is built the first time it's
+            needed. :func:`add_line` and :func:`remove_line` keep it up to
+            date, and :func:`add_lines` builds it again, since every HalfEdge
+            is new.
+        :rtype: :class:`src.data_structures.point_location.LineLocator`
+        """
+
+        if self._locator is None:
+            self._locator = self._build_locator()
+
+        return self._locator
+
+    def _build_locator(self) -> LineLocator:
+        """
+        Build a :class:`src.data_structures.point_location.LineLocator` of the
+        bottom of the box and the lines that aren't vertical, from
+        :func:`_half_edge_columns`.
+
+        :return: The new index
+        :rtype: :class:`src.data_structures.point_location.LineLocator`
+        """
+
+        locator = LineLocator(self.min_x, self.max_x)
+        half_edges, _, link, line, points = self._half_edge_columns()
+        x0, x1 = points[link, 0], points[:, 0]
+
+        # The face above an edge is on the right of the half going left, so
+        # keep that half of every edge, sorted by line and then along it
+        keep = flatnonzero((x0 < x1) & ((line >= 0) | (line == BOUNDARY_LINES[0])))
+        keep = keep[lexsort((x0[keep], line[keep]))]
+        starts = flatnonzero(concatenate(([True], diff(line[keep]) != 0)))
+
+        for a, b in zip(starts.tolist(), starts[1:].tolist() + [len(keep)]):
+            picks = keep[a:b]
+            i = int(line[picks[0]])
+            slope, intercept = self._slope_intercept(i)
+            locator.add_line(
+                i,
+                slope,
+                intercept,
+                float(x0[picks[0]]),
+                float(x1[picks].max()),
+                flat("d", x0[picks].tobytes()),
+                self._locator_handles(half_edges, picks),
+            )
+
+        return locator
+
+    def _slope_intercept(self, i: int) -> tuple:
+        """
+        :param int i: Id of a line that isn't vertical, or the bottom of the
+            box
+        :return: The slope and y intercept of the line
+        :rtype: tuple[float, float]
+        """
+
+        if i == BOUNDARY_LINES[0]:
+            return 0.0, float(self.min_y)
+
+        a, b, c = self.line_coefficients[i].tolist()
+        return -a / b, -c / b
+
+    def _locate_line(self, i: int):
+        """
+        Add line i, which was just added, to the point location index. Its
+        edges and the edges it split all come out of its vertices, so going
+        around each of them finds everything that changed.
+
+        :param int i: Index of the line in :attr:`lines`
+        """
+
+        locator = self._locator
+        h, last = (self.get_handle(p) for p in self.lines[i])
+        x0, x1 = sorted((float(h.point[0]), float(last.point[0])))
+        if x0 < x1:
+            locator.add_line(i, *self._slope_intercept(i), x0, x1)
+
+        back = None
+        while h is not None:
+            ahead = None
+            cur = h
+            while True:
+                x, y = float(cur.point[0]), float(cur.twin.point[0])
+                if y < x:
+                    locator.set_edge(cur.line, y, self._locator_handle(cur))
+                elif x < y:
+                    locator.set_edge(cur.line, x, self._locator_handle(cur.twin))
+
+                if cur.line == i and cur != back:
+                    ahead = cur
+                cur = cur.twin.link
+                if cur == h:
+                    break
+
+            # Go on to the next vertex along the line
+            h = back = None if ahead is None else ahead.twin
+
+    def _locator_handle(self, h: HalfEdge):
+        """
+        :param :class:`src.data_structures.half_edge.HalfEdge` h: A HalfEdge
+        :return: What the point location index stores for h. HalfEdges are
+            objects, so it's h itself. Backends that store HalfEdges
+            differently can override this, along with
+            :func:`_locator_handles` and :func:`_located_half_edge`.
+        """
+
+        return h
+
+    def _locator_handles(self, half_edges, picks: ndarray) -> list:
+        """
+        :param Sequence half_edges: HalfEdges from :func:`_half_edge_columns`
+        :param ndarray picks: Indices of some of them
+        :return: What the point location index stores for each picked
+            HalfEdge, like :func:`_locator_handle`
+        :rtype: list
+        """
+
+        return [half_edges[j] for j in picks.tolist()]
+
+    def _located_half_edge(self, handle) -> HalfEdge:
+        """
+        :param handle: Something the point location index stores, from
+            :func:`_locator_handle`
+        :return: The HalfEdge it stands for
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        return handle
+
+    def locate(self, p: ndarray) -> HalfEdge:
+        """
+        Find the face containing a point, using the
+        :class:`src.data_structures.point_location.LineLocator` of the
+        subdivision, which is built on first use and kept up to date as lines
+        are added and removed. A point in a slab the index has kept takes
+        :math:`O(\\log n)` time for n lines. The first point in any other
+        slab sorts the lines at that x coordinate, which is vectorized
+        :math:`O(n \\log n)` time.
+
+        :param ndarray p: A point
+        :return: A HalfEdge of the face containing p, or None if p is outside
+            of the bounding box. If p is on an edge, this is one of the faces
+            next to it.
+        :rtype: :class:`src.data_structures.half_edge.HalfEdge`
+        """
+
+        x, y = float(p[0]), float(p[1])
+        if not self.min_y <= y <= self.max_y:
+            return None
+
+        handle = self._point_locator().locate(x, y)
+        return None if handle is None else self._located_half_edge(handle)
+
+    def locate_many(self, points: ndarray) -> list:
+        """
+        Find the faces containing many points at once, like :func:`locate`.
+        Each slab the points are in is found or sorted once for all of them,
+        and all the points are searched for together in vectorized steps.
+
+        :param ndarray points: An (N,2) or (N,3) array of points
+        :return: A HalfEdge of the face containing each point, or None for
+            points outside of the bounding box
+        :rtype: list[HalfEdge]
+        """
+
+        points = array(points, dtype=float).reshape(len(points), -1)
+        y = points[:, 1]
+        found = self._point_locator().locate_many(points)
+        outside = ((y < self.min_y) | (y > self.max_y)).tolist()
+
+        return [
+            None if out or h is None else self._located_half_edge(h)
+            for h, out in zip(found, outside)
+        ]
+
+    def find_zone(self, zone_line: tuple, ray: bool = False) -> list:
+        """
+        Takes a line defining a zone and returns a list of
+        :class:`src.data_structures.polygon.Polygon` that contain the zone
+        line. Like :func:`iter_zone`, the zone line can be any segment or ray
+        starting in the bounding box. The polygons come from :func:`face`, so
+        finding a zone again only walks the faces that changed in between.
+        Until a line is added, asking for the same zone again is a lookup in
+        :attr:`zone_cache`.
+
+        :param tuple[ndarray] zone_line: A tuple of two points. The first one
+            must be in or on the boundary.
+        :param bool ray: If True, the zone line starts at its first point and
+            goes through its second point until it reaches the boundary.
+        :return: A list of :class:`src.data_structures.polygon.Polygon` that
+            contain some portion of the `zone_line`.
+        :rtype: list[Polygon]
+        """
+
+        key = ZoneCache.key("find_zone", zone_line, ray, self.version)
+        zone = self.zone_cache.get(key)
+        if zone is None:
+            zone = [self.face(h.face).polygon for h in self.iter_zone(zone_line, ray)]
+            self.zone_cache.put(key, zone)
+
+        return list(zone)
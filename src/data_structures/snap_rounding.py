@@ -0,0 +1,355 @@
+"""
+Builds the DCEL of an arrangement of lines on an integer grid, like
+:func:`src.data_structures.arrangement.build_arrangement`, but with every
+vertex snap rounded to the grid. All of the geometry is done in exact int64
+arithmetic, so no orientation test or crossing ever needs a tolerance.
+
+Snap rounding follows the usual hot pixel rules. The pixel of a grid point
+:math:`(x, y)` is the unit square :math:`[x - \\frac{1}{2}, x + \\frac{1}{2})
+\\times [y - \\frac{1}{2}, y + \\frac{1}{2})` around it. A pixel is hot if it
+has the endpoint of a segment or a crossing of two segments in it. Every
+segment is then replaced by the path through the centers of all the hot
+pixels it passes through, in order along the segment. Those paths only meet
+at the centers of hot pixels, so they form a planar graph.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from math import isqrt
+
+from numpy import arange, arctan2, argsort, array, clip, concatenate, cumsum
+from numpy import empty, errstate, flatnonzero, floor, full, int64
+from numpy import maximum, minimum, ndarray, nonzero, repeat, roll, searchsorted
+from numpy import sign, unique, where
+
+from .arrangement import ArrangementArrays, label_faces
+from .half_edge import BOUNDARY_LINES
+
+# Largest width or height of the grid. Crossings are found with products of
+# three coordinates, which must fit in an int64.
+MAX_GRID = 1 << 20
+
+# Upper bound on how many pairs to test in one vectorized block
+BLOCK_SIZE = 1 << 22
+
+
+def grid_orient(a: ndarray, b: ndarray, c: ndarray) -> ndarray:
+    """
+    Exact version of :func:`src.data_structures.utils.orient2d` for points on
+    an integer grid. Arrays of points are broadcast together.
+
+    :param ndarray a: One point on the line a--b, as int64 (x, y)
+    :param ndarray b: Another point on the line a--b
+    :param ndarray c: Point to classify against a--b
+    :return: 1 if c is left of a--b, -1 if c is right of a--b, and 0 if c is
+        on a--b, for each point
+    :rtype: numpy.ndarray
+    """
+
+    ab, ac = b - a, c - a
+    return sign(ab[..., 0] * ac[..., 1] - ab[..., 1] * ac[..., 0])
+
+
+def grid_crossings(segments: ndarray) -> tuple:
+    """
+    Find every pair of segments that cross at a point inside both of them,
+    and round each crossing to the nearest grid point. Halves round up.
+
+    :param ndarray segments: An (n,2,2) int64 array holding the two endpoints
+        of each segment
+    :return: Arrays i, j, xy, where segments i and j cross in the pixel of the
+        grid point xy
+    :rtype: tuple[numpy.ndarray]
+    """
+
+    p, q = segments[:, 0], segments[:, 1]
+    n = len(segments)
+
+    block = max(1, BLOCK_SIZE // max(n, 1))
+    found = []
+    for start in range(0, n, block):
+        rows = arange(start, min(start + block, n))
+        pr, qr = p[rows, None], q[rows, None]
+
+        # Same test as segments_cross, without any rounding
+        mask = arange(n)[None, :] > rows[:, None]
+        mask &= grid_orient(pr, qr, p[None, :]) * grid_orient(pr, qr, q[None, :]) < 0
+        mask &= (
+            grid_orient(p[None, :], q[None, :], pr)
+            * grid_orient(p[None, :], q[None, :], qr)
+            < 0
+        )
+
+        r, c = nonzero(mask)
+        found.append((rows[r], c))
+
+    if not found:
+        return empty(0, dtype=int64), empty(0, dtype=int64), empty((0, 2), int64)
+
+    i, j = (concatenate(column) for column in zip(*found))
+
+    # Homogeneous coefficients of each line, and the crossing as their cross
+    # product, like line_through and line_meet
+    k = empty((n, 3), dtype=int64)
+    k[:, 0], k[:, 1] = p[:, 1] - q[:, 1], q[:, 0] - p[:, 0]
+    k[:, 2] = p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1]
+    ki, kj = k[i], k[j]
+    w = ki[:, 0] * kj[:, 1] - ki[:, 1] * kj[:, 0]
+    xw = ki[:, 1] * kj[:, 2] - ki[:, 2] * kj[:, 1]
+    yw = ki[:, 2] * kj[:, 0] - ki[:, 0] * kj[:, 2]
+
+    # Round x = xw / w to the nearest integer with floor division
+    s = sign(w)
+    w, xw, yw = w * s, xw * s, yw * s
+    xy = empty((len(i), 2), dtype=int64)
+    xy[:, 0] = (2 * xw + w) // (2 * w)
+    xy[:, 1] = (2 * yw + w) // (2 * w)
+
+    return i, j, xy
+
+
+def pixel_hits(p: ndarray, q: ndarray, centers: ndarray) -> ndarray:
+    """
+    Check if each closed segment p--q passes through the pixel of a grid
+    point. Pixels are half open, so each point of the plane is in exactly one
+    pixel, the one it rounds to.
+
+    :param ndarray p: (M,2) int64 array of one endpoint of each segment
+    :param ndarray q: (M,2) int64 array of the other endpoint of each segment
+    :param ndarray centers: (M,2) int64 array of grid points
+    :return: A boolean array of M values, true where the segment passes
+        through the pixel
+    :rtype: numpy.ndarray
+    """
+
+    # Double everything so the pixel edges are on the grid too. Then the
+    # segment is P + tD for t in [0, 1], and the pixel is [low, high) on each
+    # axis.
+    P, D = 2 * p, 2 * (q - p)
+    low, high = 2 * centers - 1, 2 * centers + 1
+
+    # Each bound on t is a fraction (numerator, denominator > 0, closed?)
+    hit = full(len(p), True)
+    lower = [(0, 1, True)]
+    upper = [(1, 1, True)]
+    for axis in range(2):
+        d, start = D[:, axis], P[:, axis]
+        lo, hi = low[:, axis] - start, high[:, axis] - start
+        forward, flat = d > 0, d == 0
+
+        # Standing still along this axis, the segment is in the pixel's range
+        # the whole time or never
+        hit &= ~flat | ((lo <= 0) & (0 < hi))
+
+        # Moving forward, the segment enters at lo and leaves before hi.
+        # Moving backward, it enters after hi and leaves at lo.
+        size = where(flat, 1, abs(d))
+        lower.append((where(flat, 0, where(forward, lo, -hi)), size, forward | flat))
+        upper.append((where(flat, 1, where(forward, hi, -lo)), size, ~forward))
+
+    # The bounds leave some t if every lower bound is before every upper
+    # bound, or at the same time when both include that time
+    for n1, d1, closed1 in lower:
+        for n2, d2, closed2 in upper:
+            compare = n1 * d2 - n2 * d1
+            hit &= (compare < 0) | ((compare == 0) & closed1 & closed2)
+
+    return hit
+
+
+def _spread(counts: ndarray) -> tuple:
+    """
+    :return: For groups with the given sizes, the group of each item and the
+        position of each item in its group
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    group = repeat(arange(len(counts)), counts)
+    first = cumsum(counts) - counts
+    return group, arange(len(group)) - first[group]
+
+
+def _sort_within(group: ndarray, key: ndarray) -> ndarray:
+    """
+    Same as ``lexsort((key, group))``, but sorting the groups with a stable
+    sort on their own, which is a lot faster for big arrays.
+
+    :return: Indices that sort by group, and then by key
+    :rtype: numpy.ndarray
+    """
+
+    order = argsort(key)
+    return order[argsort(group[order], kind="stable")]
+
+
+def _segment_hits(segments: ndarray, centers: ndarray, size: tuple) -> tuple:
+    """
+    Find every hot pixel that each segment passes through. The centers are
+    bucketed into square cells, each segment only looks at the centers in
+    the cells it passes near, and :func:`pixel_hits` checks those exactly.
+
+    :param ndarray segments: An (n,2,2) int64 array of segments
+    :param ndarray centers: An (H,2) int64 array of hot pixel centers
+    :param tuple[int, int] size: Width and height of the box holding
+        everything
+    :return: Arrays s, h, where segment s passes through the pixel of center h
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    # Cells are sized so there are about as many cells as centers
+    w, h = size
+    cell = max(1, -(-max(w, h) // max(isqrt(len(centers)), 1)))
+    columns, rows = w // cell + 1, h // cell + 1
+    bucket = centers[:, 0] // cell * rows + centers[:, 1] // cell
+    by_bucket = argsort(bucket, kind="stable")
+    starts = searchsorted(bucket[by_bucket], arange(columns * rows + 1))
+
+    # A segment can only pass through the pixel of a center that is within
+    # 1/2 of it on both axes. Widen that to 1, so the floating point slopes
+    # below can't miss anything. First find the columns of cells that are
+    # close enough to each segment.
+    p, q = segments[:, 0].astype(float), segments[:, 1].astype(float)
+    x_min, x_max = minimum(p[:, 0], q[:, 0]), maximum(p[:, 0], q[:, 0])
+    first = clip(floor((x_min - 1) / cell), 0, columns - 1).astype(int64)
+    last = clip(floor((x_max + 1) / cell), 0, columns - 1).astype(int64)
+    s, i = _spread(last - first + 1)
+    column = first[s] + i
+
+    # Then the rows of cells near where the segment crosses each column
+    left = maximum(x_min[s], column * cell - 1)
+    right = minimum(x_max[s], (column + 1) * cell + 1)
+    d = q[s] - p[s]
+    with errstate(divide="ignore", invalid="ignore"):
+        slope = d[:, 1] / d[:, 0]
+        y_left = where(d[:, 0] == 0, p[s, 1], p[s, 1] + (left - p[s, 0]) * slope)
+        y_right = where(d[:, 0] == 0, q[s, 1], p[s, 1] + (right - p[s, 0]) * slope)
+    first = clip(floor((minimum(y_left, y_right) - 1) / cell), 0, rows - 1)
+    last = clip(floor((maximum(y_left, y_right) + 1) / cell), 0, rows - 1)
+    t, i = _spread(maximum(last - first + 1, 0).astype(int64))
+    s, near = s[t], column[t] * rows + first[t].astype(int64) + i
+
+    # Every center in those cells is a candidate
+    t, i = _spread(starts[near + 1] - starts[near])
+    s, c = s[t], by_bucket[starts[near[t]] + i]
+
+    exact = pixel_hits(segments[s, 0], segments[s, 1], centers[c])
+    return s[exact], c[exact]
+
+
+def snap_round(size: tuple, segments: ndarray) -> ArrangementArrays:
+    """
+    Build the snap rounded DCEL of segments inside the box from (0, 0) to
+    ``size``, using the same layout as
+    :func:`src.data_structures.arrangement.build_arrangement`.
+
+    1. Find the hot pixels: the corners of the box, the endpoints of the
+       segments, and every crossing, rounded with :func:`grid_crossings`.
+    2. Route each segment, and each side of the box, through the centers of
+       the hot pixels it passes through. Each step between two centers is an
+       edge, and steps shared by several segments are one edge.
+    3. Sort the half edges coming out of each vertex CCW, and link each half
+       edge to the one that comes CCW after its twin around its destination.
+
+    :param tuple[int, int] size: Width and height of the box in grid units
+    :param ndarray segments: An (n,2,2) int64 array of the endpoints of each
+        segment, which are on the sides of the box
+    :return: Columns of the DCEL, with coordinates in grid units
+    :rtype: ArrangementArrays
+    """
+
+    w, h = size
+    n = len(segments)
+    corners = array([(0, 0), (w, 0), (w, h), (0, h)], dtype=int64)
+    sides = concatenate((corners[:, None], roll(corners, -1, axis=0)[:, None]), axis=1)
+
+    i, j, xy = grid_crossings(segments)
+    n_boundary = 4 + 2 * n
+
+    # Each hot pixel is one vertex
+    hot = concatenate((corners, segments.reshape(-1, 2), xy))
+    _, kept, vertex = unique(
+        hot[:, 0] * (h + 1) + hot[:, 1], return_index=True, return_inverse=True
+    )
+    grid = hot[kept]
+    n_vertices = len(grid)
+
+    # The lines that cross at each vertex, keeping the first pair
+    crossing = full((n_vertices, 2), -1, dtype=int64)
+    crossing[vertex[n_boundary:][::-1], 0] = i[::-1]
+    crossing[vertex[n_boundary:][::-1], 1] = j[::-1]
+
+    # Walk each side of the box and each segment through its hot pixels.
+    # Sides come first and lie on the BOUNDARY_LINES.
+    paths = concatenate((sides, segments))
+    s, v = _segment_hits(paths, grid, size)
+    along = ((grid[v] - paths[s, 0]) * (paths[s, 1] - paths[s, 0])).sum(axis=1)
+    order = _sort_within(s, along)
+    s, v = s[order], v[order]
+    step = flatnonzero((s[1:] == s[:-1]) & (v[1:] != v[:-1]))
+    u, v, s = v[step], v[step + 1], s[step]
+    on = where(s < 4, array(BOUNDARY_LINES)[minimum(s, 3)], s - 4)
+
+    # The sides of the box visit the boundary vertices in CCW order, starting
+    # at the bottom left corner
+    on_side = on < 0
+    boundary = u[on_side]
+    n_boundary_edges = len(boundary)
+
+    # Steps of segments that run along the box, or along each other, are
+    # the same edge. Keep one copy, on the boundary or the lowest line.
+    key = minimum(u, v) * n_vertices + maximum(u, v)
+    order = argsort(key * (n + 5) + on + 5)
+    first = order[concatenate(([True], key[order][1:] != key[order][:-1]))]
+    inner = first[~on_side[first]]
+
+    # Half edge 2e goes forward along edge e, and half edge 2e + 1 goes back.
+    # The boundary edges come first and go CCW around the box.
+    n_half_edges = 2 * (n_boundary_edges + len(inner))
+    origin = empty(n_half_edges, dtype=int64)
+    origin[0 : 2 * n_boundary_edges : 2] = boundary
+    origin[1 : 2 * n_boundary_edges : 2] = roll(boundary, -1)
+    origin[2 * n_boundary_edges :: 2] = u[inner]
+    origin[2 * n_boundary_edges + 1 :: 2] = v[inner]
+    twin = arange(n_half_edges) ^ 1
+
+    line = empty(n_half_edges, dtype=int64)
+    line[: 2 * n_boundary_edges] = on[on_side].repeat(2)
+    line[2 * n_boundary_edges :] = on[inner].repeat(2)
+
+    # Sort the half edges coming out of each vertex CCW, and find the next
+    # one CCW after each half edge. Directions between grid points are
+    # small integer vectors, so their angles are far enough apart to sort.
+    delta = grid[origin[twin]] - grid[origin]
+    leaving = _sort_within(origin, arctan2(delta[:, 1], delta[:, 0]))
+    group = origin[leaving]
+    start = flatnonzero(concatenate(([True], group[1:] != group[:-1])))
+    last = concatenate((start[1:], [n_half_edges])) - 1
+    ccw_next = roll(leaving, -1)
+    ccw_next[last] = leaving[start]
+
+    link = empty(n_half_edges, dtype=int64)
+    link[twin[leaving]] = ccw_next
+    prev = empty(n_half_edges, dtype=int64)
+    prev[link] = arange(n_half_edges)
+
+    # Boundary vertices get their CCW boundary half edge as a handle
+    handle = empty(n_vertices, dtype=int64)
+    handle[group[start]] = leaving[start]
+    handle[boundary] = arange(0, 2 * n_boundary_edges, 2)
+
+    face, face_handle = label_faces(link)
+
+    return ArrangementArrays(
+        grid.astype(float),
+        crossing,
+        origin,
+        twin,
+        link,
+        prev,
+        line,
+        face,
+        handle,
+        face_handle,
+        boundary,
+    )
@@ -6,7 +6,11 @@ structure. The might be used accross several data structures.
     - William Boyles (wmboyles)
 """
 
-from numpy import array, ndarray, sign, vstack
+from dataclasses import dataclass
+from fractions import Fraction
+
+from numpy import abs as np_abs, all as np_all, array, atleast_2d, cross
+from numpy import errstate, flatnonzero, full, nan, ndarray, sign
 from numpy.linalg import det
 
 from .point import point
@@ -15,6 +19,47 @@ from .point import point
 PRECISION = 9
 EPSILON = 10 ** -PRECISION
 
+# Orientation determinants smaller than this round to 0
+ZERO_DETERMINANT = Fraction(1, 2 * 10**PRECISION)
+
+# Relative error of one floating point operation
+_MACHINE_EPSILON = 2.0**-53
+
+# Bounds on the error of the 2D determinant, relative to the sum of the sizes
+# of its two products (Shewchuk's ccwerrboundA), and of the full 3x3
+# determinant, relative to the sum of the sizes of its six products. A little
+# extra covers the error in ZERO_DETERMINANT as a float.
+_PLANAR_ERROR = (3 + 16 * _MACHINE_EPSILON) * _MACHINE_EPSILON
+_HOMOGENEOUS_ERROR = 8 * _MACHINE_EPSILON
+_ZERO = float(ZERO_DETERMINANT)
+_ZERO_ERROR = 4 * _MACHINE_EPSILON * _ZERO
+
+
+@dataclass
+class PredicateCounts:
+    """
+    How many orientation tests were decided each way, in
+    :data:`orient_counts`.
+    """
+
+    fast: int = 0
+    """Tests decided from the floating point determinant"""
+
+    exact: int = 0
+    """Tests that were too close to call, and were decided with exact
+    rational arithmetic"""
+
+    def reset(self):
+        """
+        Set both counts back to 0.
+        """
+
+        self.fast = self.exact = 0
+
+
+# Counts of every orientation test so far
+orient_counts = PredicateCounts()
+
 
 def orient(*points: ndarray) -> int:
     """
@@ -26,9 +71,139 @@ def orient(*points: ndarray) -> int:
     :rtype: int
     """
 
+    # The 2D case is by far the most common, so skip building a matrix for it
+    if len(points) == 3 and len(points[0]) == 3:
+        return orient2d(*points)
+
     return sign(round(det(array(points)), PRECISION))
 
 
+def orient2d(a: ndarray, b: ndarray, c: ndarray) -> int:
+    """
+    Checks if c is left of (1), right of (-1), or colinear with (0) the
+    directed line a--b. This gives the same answer as
+    :func:`src.data_structures.utils.orient` on three points, but evaluates the
+    determinant in closed form on plain floats instead of calling
+    :func:`numpy.linalg.det`.
+
+    Points are colinear when the determinant is at most
+    :data:`ZERO_DETERMINANT` away from 0. Along with the determinant, a bound
+    on its rounding error is worked out. Only if that error could change the
+    answer is the determinant worked out again exactly with
+    :class:`fractions.Fraction`, so the answer never depends on rounding, and
+    the same three points give the same answer in any order.
+
+    :param ndarray a: One point on the line a--b
+    :param ndarray b: Another point on the line a--b
+    :param ndarray c: Point to classify against a--b
+    :returns: -1, 0, or 1 depending on orientation of points.
+    :rtype: int
+    """
+
+    ax, ay, az = a.tolist()
+    bx, by, bz = b.tolist()
+    cx, cy, cz = c.tolist()
+
+    if az == bz == cz == 1:
+        # Ordinary points, so the determinant is just a 2D cross product
+        left, right = (bx - ax) * (cy - ay), (by - ay) * (cx - ax)
+        d = left - right
+        error = _PLANAR_ERROR * (abs(left) + abs(right))
+    else:
+        # Some point is at infinity, so expand the full 3x3 determinant
+        d = (
+            ax * (by * cz - bz * cy)
+            - ay * (bx * cz - bz * cx)
+            + az * (bx * cy - by * cx)
+        )
+        error = _HOMOGENEOUS_ERROR * (
+            abs(ax) * (abs(by * cz) + abs(bz * cy))
+            + abs(ay) * (abs(bx * cz) + abs(bz * cx))
+            + abs(az) * (abs(bx * cy) + abs(by * cx))
+        )
+
+    size, error = abs(d), error + _ZERO_ERROR
+    if size - error > _ZERO or size + error < _ZERO:
+        orient_counts.fast += 1
+        return ((d > 0) - (d < 0)) if size > _ZERO else 0
+
+    return _exact_orient((ax, ay, az), (bx, by, bz), (cx, cy, cz))
+
+
+def _exact_orient(a: tuple, b: tuple, c: tuple) -> int:
+    """
+    :func:`src.data_structures.utils.orient2d` with the determinant worked
+    out exactly.
+
+    :meta private:
+    """
+
+    orient_counts.exact += 1
+
+    (ax, ay, az), (bx, by, bz), (cx, cy, cz) = (map(Fraction, p) for p in (a, b, c))
+    d = ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)
+
+    if abs(d) <= ZERO_DETERMINANT:
+        return 0
+    return 1 if d > 0 else -1
+
+
+def orient_many(a: ndarray, b: ndarray, pts: ndarray) -> ndarray:
+    """
+    Vectorized version of :func:`src.data_structures.utils.orient2d` that
+    classifies many points against the same directed line a--b at once.
+
+    :param ndarray a: One point on the line a--b
+    :param ndarray b: Another point on the line a--b
+    :param ndarray pts: An (N,3) array of points to classify against a--b
+    :returns: An array of N values, each -1, 0, or 1 like
+        :func:`src.data_structures.utils.orient2d`.
+    :rtype: numpy.ndarray
+    """
+
+    return _orient_rows(a, b, array(pts, dtype=float).reshape(-1, 3))
+
+
+def _orient_rows(a: ndarray, b: ndarray, c: ndarray) -> ndarray:
+    """
+    Row-wise :func:`src.data_structures.utils.orient2d`. Any of a, b, c may be a
+    single point or an (N,3) array of points; they are broadcast together.
+
+    :meta private:
+    """
+
+    a, b, c = atleast_2d(a, b, c)
+
+    if (a[:, 2] == 1).all() and (b[:, 2] == 1).all() and (c[:, 2] == 1).all():
+        left = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+        right = (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        d = left - right
+        error = _PLANAR_ERROR * (np_abs(left) + np_abs(right))
+    else:
+        # det([a; b; c]) is the triple product c . (a x b)
+        d = (c * cross(a, b)).sum(axis=1)
+        error = _HOMOGENEOUS_ERROR * (
+            np_abs(c)
+            * (
+                np_abs(a[:, [1, 2, 0]] * b[:, [2, 0, 1]])
+                + np_abs(a[:, [2, 0, 1]] * b[:, [1, 2, 0]])
+            )
+        ).sum(axis=1)
+
+    # Same filter as orient2d, on every row at once
+    result = (d > _ZERO).astype(int) - (d < -_ZERO)
+    unsure = np_abs(np_abs(d) - _ZERO) <= error + _ZERO_ERROR
+    orient_counts.fast += len(d)
+    if unsure.any():
+        unsure = flatnonzero(unsure)
+        orient_counts.fast -= len(unsure)
+        a, b, c = (p.repeat(len(d), axis=0) if len(p) == 1 else p for p in (a, b, c))
+        for i in unsure.tolist():
+            result[i] = _exact_orient(a[i].tolist(), b[i].tolist(), c[i].tolist())
+
+    return result
+
+
 def lex_compare(p1: ndarray, p2: ndarray) -> int:
     """
     Compare two points lexiographically. (0,0) < (0,1) < (1,0) < (1,1).
@@ -61,7 +236,39 @@ def segments_cross(a: ndarray, b: ndarray, c: ndarray, d: ndarray) -> bool:
     :rtype: bool
     """
 
-    return orient(a, b, c) != orient(a, b, d) and orient(c, d, a) != orient(c, d, b)
+    return orient2d(a, b, c) != orient2d(a, b, d) and orient2d(c, d, a) != orient2d(
+        c, d, b
+    )
+
+
+def segments_touch(a: ndarray, b: ndarray, c: ndarray, d: ndarray) -> bool:
+    """
+    Checks if segment a--b and segment c--d have any point in common,
+    including their endpoints. Unlike
+    :func:`src.data_structures.utils.segments_cross`, colinear segments only
+    touch if they overlap or meet end to end.
+
+    :param ndarray a: One endpoint of segment a--b
+    :param ndarray b: Other endpoint of segment a--b
+    :param ndarray c: One endpoint of segment c--d
+    :param ndarray d: Other endpoint of segment c--d
+    :return: True iff the segments share at least one point, else False
+    :rtype: bool
+    """
+
+    if segments_cross(a, b, c, d):
+        return True
+
+    # Otherwise they can only touch where an endpoint of one is on the other
+    for p, (q, r) in ((c, (a, b)), (d, (a, b)), (a, (c, d)), (b, (c, d))):
+        if (
+            orient2d(q, r, p) == 0
+            and min(q[0], r[0]) <= p[0] <= max(q[0], r[0])
+            and min(q[1], r[1]) <= p[1] <= max(q[1], r[1])
+        ):
+            return True
+
+    return False
 
 
 def segment_intersection(a: ndarray, b: ndarray, c: ndarray, d: ndarray) -> ndarray:
@@ -91,17 +298,14 @@ def segment_intersection(a: ndarray, b: ndarray, c: ndarray, d: ndarray) -> ndar
     if all(vab == vcd):
         return None
 
-    # Using a point (0,0,1) makes doing the derminant easier
-    zero = point(0, 0)
-
     # Line equations
     # -(vab.y)x + (vab.x)y = C1
     # -(vcd.y)x + (vcd.x)y = C2
-    C1, C2, C3 = (
-        det(vstack((zero, vab, a))),
-        det(vstack((zero, vcd, c))),
-        det(vstack((zero, vcd, vab))),
-    )
+    # Each constant is a determinant with the point (0,0,1) as its first row,
+    # which reduces to a 2D cross product.
+    C1 = vab[0] * a[1] - vab[1] * a[0]
+    C2 = vcd[0] * c[1] - vcd[1] * c[0]
+    C3 = vcd[0] * vab[1] - vcd[1] * vab[0]
 
     # If you put the line equations in slope-intercept form (y = mx + b),
     # solve for x then backsolve for y, you get this.
@@ -110,3 +314,89 @@ def segment_intersection(a: ndarray, b: ndarray, c: ndarray, d: ndarray) -> ndar
     y = (C2 * vab[1] - C1 * vcd[1]) / C3
 
     return point(x, y)
+
+
+def segment_intersections(a: ndarray, b: ndarray, edges: ndarray) -> tuple:
+    """
+    Vectorized version of :func:`src.data_structures.utils.segment_intersection`
+    that intersects one segment a--b with many segments c--d at once. Ties are
+    broken the same way: if a crossing segment shares an endpoint with a--b,
+    the crossing point is b if possible, otherwise a.
+
+    :param ndarray a: One endpoint of segment a--b
+    :param ndarray b: Other endpoint of segment a--b
+    :param ndarray edges: An (M,2,3) array, where ``edges[i]`` holds the two
+        endpoints c, d of the i-th segment
+    :return: A boolean array of M values, true where a--b crosses the segment,
+        and an (M,3) array of crossing points. Rows of the points where there
+        is no crossing are filled with nan.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+
+    edges = array(edges, dtype=float).reshape(-1, 2, 3)
+    c, d = edges[:, 0], edges[:, 1]
+
+    # Same test as segments_cross, but for every edge at once
+    mask = (_orient_rows(a, b, c) != _orient_rows(a, b, d)) & (
+        _orient_rows(c, d, a) != _orient_rows(c, d, b)
+    )
+
+    hit_b = np_all(c == b, axis=1) | np_all(d == b, axis=1)
+    hit_a = ~hit_b & (np_all(c == a, axis=1) | np_all(d == a, axis=1))
+
+    # vab and vcd are the direction vectors of the lines
+    vab, vcd = (b - a), (d - c)
+    mask &= hit_a | hit_b | ~np_all(vcd == vab, axis=1)
+
+    # Same closed form as segment_intersection
+    C1 = vab[0] * a[1] - vab[1] * a[0]
+    C2 = vcd[:, 0] * c[:, 1] - vcd[:, 1] * c[:, 0]
+    C3 = vcd[:, 0] * vab[1] - vcd[:, 1] * vab[0]
+
+    points = full((len(edges), 3), nan)
+    with errstate(divide="ignore", invalid="ignore"):
+        points[:, 0] = (C2 * vab[0] - C1 * vcd[:, 0]) / C3
+        points[:, 1] = (C2 * vab[1] - C1 * vcd[:, 1]) / C3
+    points[:, 2] = 1
+
+    points[hit_a] = a
+    points[hit_b] = b
+    points[~mask] = nan
+
+    return mask, points
+
+
+def line_through(a: ndarray, b: ndarray) -> ndarray:
+    """
+    Homogeneous coefficients of the line through two points. A point p is on
+    the line l exactly when the dot product of l and p is 0, so
+    :math:`(l_0, l_1, l_2)` is the line :math:`l_0 x + l_1 y + l_2 = 0`.
+
+    :param ndarray a: One point on the line, or an (N,3) array of points
+    :param ndarray b: Another point on the line, or an (N,3) array of points
+    :return: The cross product a x b, which has one row per line
+    :rtype: numpy.ndarray
+    """
+
+    return cross(a, b)
+
+
+def line_meet(l: ndarray, m: ndarray) -> ndarray:
+    """
+    Find where two lines with homogeneous coefficients cross. Like
+    :func:`line_through`, this is one cross product, since the point where
+    two lines meet is the point that is on both of them.
+
+    :param ndarray l: Coefficients of one line
+    :param ndarray m: Coefficients of the other line
+    :return: The point where l and m cross, or None if they are parallel
+    :rtype: numpy.ndarray or None
+    """
+
+    # Same products as numpy.cross, without its overhead for a single pair
+    (l0, l1, l2), (m0, m1, m2) = l.tolist(), m.tolist()
+    w = l0 * m1 - l1 * m0
+    if w == 0:
+        return None
+
+    return point((l1 * m2 - l2 * m1) / w, (l2 * m0 - l0 * m2) / w)
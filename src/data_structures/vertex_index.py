@@ -0,0 +1,396 @@
+"""
+Contains VertexIndex, which gives the vertices of a polygonal subdivision
+integer ids and remembers which lines cross at each one, and PointDict, which
+looks up HalfEdges by point through it.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from array import array as flat
+from collections.abc import MutableMapping
+from math import floor
+
+from numpy import (
+    array,
+    empty,
+    flatnonzero,
+    floor as floor_,
+    frombuffer,
+    full,
+    int64,
+    isnan,
+    nan,
+    ndarray,
+    ones,
+    sort,
+    unique,
+)
+
+from .point import point
+from .utils import EPSILON
+
+_CELL = 2.0**-20
+"""Width of the grid cells that vertices are hashed by. It's about a
+thousand times EPSILON, so the points that match a point are nearly always in
+the same cell as it."""
+
+_EMPTY = -1
+"""Slot of :attr:`VertexIndex.table` that has never held a vertex"""
+
+_REMOVED = -2
+"""Slot of :attr:`VertexIndex.table` whose vertex was removed"""
+
+# Odd multipliers that spread neighbouring cells over the table. Hashes keep
+# their low 62 bits, which are the same whether numpy wraps the products to 64
+# bits or Python doesn't.
+_HASH_X = 0x9E3779B1
+_HASH_Y = 0x85EBCA77
+_HASH_BITS = 2**62 - 1
+
+
+class VertexIndex:
+    """
+    Gives every distinct point an integer id, in the order they are added.
+    Points within :data:`src.data_structures.utils.EPSILON` of each other in
+    both coordinates are the same vertex, so a point that is computed twice
+    with slightly different rounding still gets the same id.
+
+    Points are snapped to a grid of cells, and any point close enough to
+    match is in the same cell or, rarely, one next to it. Vertices are hashed by
+    their cell into :attr:`table`, an open addressing hash table of vertex
+    ids, so the index is a few flat arrays rather than a Python object per
+    vertex, and a lookup only compares against a handful of points.
+
+    A vertex where two lines cross can be tagged with the ids of those lines,
+    in the :attr:`lines` column.
+
+    Ids of removed vertices are given to the next new vertices, so adding and
+    removing lines over and over doesn't keep growing the index.
+    """
+
+    def __init__(self, capacity: int = 16):
+        """
+        Create an empty index.
+
+        :param int capacity: Number of vertices to make room for up front.
+        """
+
+        self.coords = empty((capacity, 2), dtype=float)
+        """(V,2) array of the coordinates of each vertex. Rows past the number
+        of vertices are unused."""
+
+        self.lines = full((capacity, 2), -1, dtype=int64)
+        """(V,2) array of the ids of the two lines that cross at each vertex,
+        smallest first, or -1 for vertices that aren't tagged"""
+
+        self.free = []
+        """Ids of removed vertices, which new vertices reuse"""
+
+        self.keys = flat("q")
+        """Hash of the grid cell each vertex is in"""
+
+        self._n = 0
+        self._table = flat("q", [_EMPTY]) * 16
+        self._filled = 0
+        self._points = dict()
+
+    @classmethod
+    def from_coords(cls, coords: ndarray, lines: ndarray = None) -> "VertexIndex":
+        """
+        Create an index of points that are already known to be distinct.
+
+        :param ndarray coords: (V,2) array of the coordinates of each vertex
+        :param ndarray lines: (V,2) array of the ids of the lines that cross
+            at each vertex, like :attr:`lines`. By default, no vertex is
+            tagged.
+        :return: A new index where vertex i is at ``coords[i]``
+        :rtype: VertexIndex
+        """
+
+        index = cls(capacity=0)
+        index.coords = array(coords, dtype=float).reshape(-1, 2)
+        index._n = len(index.coords)
+        index.lines = full((index._n, 2), -1, dtype=int64)
+        index.keys = flat("q", bytes(8 * index._n))
+        if lines is not None:
+            index.lines[:] = sort(lines, axis=1)
+
+        # Hashing a big arrangement is slow, so wait until someone looks up a
+        # point by its coordinates
+        index._table = None
+
+        return index
+
+    def __len__(self) -> int:
+        """Number of rows of :attr:`coords` in use, including removed
+        vertices whose ids are in :attr:`free`"""
+
+        return self._n
+
+    @property
+    def table(self) -> flat:
+        """
+        Open addressing hash table of the ids of the vertices, hashed by
+        :attr:`keys`. Each vertex is in the first slot at or after its hash
+        that was free when it was added. Other slots are -1 if they have
+        never been used or -2 if their vertex was removed.
+        """
+
+        if self._table is None:
+            self._rehash()
+
+        return self._table
+
+    def _rehash(self):
+        """
+        Rebuild :attr:`table` from the vertices that haven't been removed,
+        with room to add as many again before it has to be rebuilt.
+        """
+
+        coords = self.coords[: self._n]
+        ids = flatnonzero(~isnan(coords[:, 0]))
+        self._filled = len(ids)
+        cells = floor_(coords[ids] / _CELL).astype(int64)
+        keys = frombuffer(self.keys, dtype=int64)
+        keys[ids] = (cells[:, 0] * _HASH_X + cells[:, 1] * _HASH_Y) & _HASH_BITS
+
+        size = 16
+        while size < 4 * self._filled:
+            size *= 2
+        table = full(size, _EMPTY, dtype=int64)
+        slots = keys[ids] & (size - 1)
+
+        # Place every vertex whose slot is free, the first one where several
+        # want the same slot, then move the rest on by one slot and repeat
+        while len(ids):
+            (free,) = (table[slots] == _EMPTY).nonzero()
+            _, first = unique(slots[free], return_index=True)
+            placed = free[first]
+            table[slots[placed]] = ids[placed]
+
+            waiting = ones(len(ids), dtype=bool)
+            waiting[placed] = False
+            ids, slots = ids[waiting], (slots[waiting] + 1) & (size - 1)
+
+        self._table = flat("q", table.tobytes())
+
+    @staticmethod
+    def _key(i: int, j: int) -> int:
+        """
+        :return: Hash of grid cell (i, j)
+        :rtype: int
+        """
+
+        return (i * _HASH_X + j * _HASH_Y) & _HASH_BITS
+
+    def nbytes(self) -> int:
+        """
+        :return: Number of bytes used by the hash table and the hash of each
+            vertex, the part of the index that isn't a column of the vertices
+        :rtype: int
+        """
+
+        table = 0 if self._table is None else len(self._table) * 8
+        return table + len(self.keys) * 8
+
+    def find(self, x: float, y: float) -> int:
+        """
+        Find the vertex at (x, y).
+
+        :param float x: x coordinate of the point
+        :param float y: y coordinate of the point
+        :return: Id of the vertex within EPSILON of (x, y), or None if there
+            isn't one
+        :rtype: int
+        """
+
+        x, y = float(x), float(y)
+        table = self._table if self._table is not None else self.table
+        mask = len(table) - 1
+        keys, coords = self.keys, self.coords
+
+        # The cells that points within EPSILON of (x, y) can be in
+        i0, i1 = floor((x - EPSILON) / _CELL), floor((x + EPSILON) / _CELL)
+        j0, j1 = floor((y - EPSILON) / _CELL), floor((y + EPSILON) / _CELL)
+
+        for i in (i0,) if i0 == i1 else (i0, i1):
+            for j in (j0,) if j0 == j1 else (j0, j1):
+                key = (i * _HASH_X + j * _HASH_Y) & _HASH_BITS
+                slot = key & mask
+                while (v := table[slot]) != _EMPTY:
+                    if v >= 0 and keys[v] == key:
+                        vx, vy = coords[v].tolist()
+                        if abs(vx - x) <= EPSILON and abs(vy - y) <= EPSILON:
+                            return v
+                    slot = (slot + 1) & mask
+
+        return None
+
+    def add(self, x: float, y: float) -> int:
+        """
+        Get the id of the vertex at (x, y), adding it if it's new.
+
+        :param float x: x coordinate of the point
+        :param float y: y coordinate of the point
+        :return: Id of the vertex
+        :rtype: int
+        """
+
+        v = self.find(x, y)
+        if v is not None:
+            return v
+
+        x, y = float(x), float(y)
+        if self.free:
+            v = self.free.pop()
+            self.coords[v] = x, y
+            self._insert(v, x, y)
+            return v
+
+        v = self._n
+        if v == len(self.coords):
+            grown = empty((max(v + 1, 2 * v), 2), dtype=float)
+            grown[:v] = self.coords
+            self.coords = grown
+
+            grown = full((len(grown), 2), -1, dtype=int64)
+            grown[:v] = self.lines[:v]
+            self.lines = grown
+
+        self.coords[v] = x, y
+        self.keys.append(0)
+        self._n += 1
+        self._insert(v, x, y)
+
+        return v
+
+    def _insert(self, v: int, x: float, y: float):
+        """Put vertex v, which is at (x, y), in :attr:`table`"""
+
+        # find already built the table, so it isn't None here
+        table = self._table
+        if 2 * (self._filled + 1) > len(table):
+            # Also hashes v, since its coordinates are set
+            self._rehash()
+            return
+
+        mask = len(table) - 1
+        key = self.keys[v] = self._key(floor(x / _CELL), floor(y / _CELL))
+        slot = key & mask
+        while table[slot] >= 0:
+            slot = (slot + 1) & mask
+
+        if table[slot] == _EMPTY:
+            self._filled += 1
+        table[slot] = v
+
+    def tag(self, v: int, i: int, j: int):
+        """
+        Record that lines i and j cross at vertex v. A vertex keeps the first
+        pair it was tagged with.
+
+        :param int v: Id of a vertex
+        :param int i: Id of one line through v
+        :param int j: Id of another line through v
+        """
+
+        if self.lines[v, 0] < 0:
+            self.lines[v] = (i, j) if i < j else (j, i)
+
+    def remove(self, v: int):
+        """
+        Forget vertex v, so no point finds it anymore. Its coordinates become
+        NaN until the next new vertex reuses its id.
+
+        :param int v: Id of a vertex
+        """
+
+        if self._table is not None:
+            table = self._table
+            mask = len(table) - 1
+            slot = self.keys[v] & mask
+            while table[slot] != v:
+                slot = (slot + 1) & mask
+
+            # Later vertices may have probed past this slot, so it can't go
+            # back to empty
+            table[slot] = _REMOVED
+        self.lines[v] = -1
+        self.coords[v] = nan
+        self._points.pop(v, None)
+        self.free.append(v)
+
+    def untag(self, v: int, i: int, j: int):
+        """
+        Forget that lines i and j cross at vertex v.
+
+        :param int v: Id of a vertex
+        :param int i: Id of one line through v
+        :param int j: Id of another line through v
+        """
+
+        pair = (i, j) if i < j else (j, i)
+        if tuple(self.lines[v].tolist()) == pair:
+            self.lines[v] = -1
+
+    def point(self, v: int) -> ndarray:
+        """
+        :param int v: Id of a vertex
+        :return: The point where vertex v is. Every HalfEdge coming out of v
+            shares this array, so it must not be changed in place.
+        :rtype: numpy.ndarray
+        """
+
+        try:
+            return self._points[v]
+        except KeyError:
+            x, y = self.coords[v].tolist()
+            p = self._points[v] = point(x, y)
+            return p
+
+
+class PointDict(MutableMapping):
+    """
+    Dictionary view of the vertex handles of a
+    :class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`,
+    which is its
+    :attr:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.point_dict`.
+    Keys are point tuples like ``(x, y, 1)``, and are looked up in the
+    subdivision's :class:`VertexIndex`, so points within EPSILON of a vertex
+    find that vertex. Values are HalfEdges coming out of each point.
+    """
+
+    def __init__(self, subdivision):
+        """
+        :param BoundedPolygonalSubdivision subdivision: Subdivision to view
+        """
+
+        self.subdivision = subdivision
+
+    def __getitem__(self, key: tuple):
+        h = self.subdivision._vertex_handle(
+            self.subdivision.vertices.find(key[0], key[1])
+        )
+        if h is None:
+            raise KeyError(key)
+
+        return h
+
+    def __setitem__(self, key: tuple, h):
+        v = self.subdivision.vertices.add(key[0], key[1])
+        self.subdivision._set_vertex_handle(v, h)
+
+    def __delitem__(self, key: tuple):
+        self[key]  # raises KeyError if missing
+        v = self.subdivision.vertices.find(key[0], key[1])
+        self.subdivision._set_vertex_handle(v, None)
+
+    def __iter__(self):
+        coords = self.subdivision.vertices.coords
+        for v in self.subdivision._handled_vertices():
+            x, y = coords[v].tolist()
+            yield (x, y, 1.0)
+
+    def __len__(self) -> int:
+        return len(self.subdivision._handled_vertices())
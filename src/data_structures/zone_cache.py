@@ -0,0 +1,122 @@
+"""
+Contains ZoneCache, a least recently used cache for zone queries on a
+:class:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision`.
+
+:Authors:
+    - William Boyles (wmboyles)
+"""
+
+from collections import OrderedDict
+
+from .utils import PRECISION
+
+
+class ZoneCache:
+    """
+    Remembers the results of the most recent zone queries. Keys include the
+    :attr:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.version`
+    of the subdivision, so results from before a line was added are never
+    handed out again, and just wait to be evicted.
+
+    When the cache is full, the entry that was used longest ago is evicted.
+    A cache with a size of 0 stores nothing.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """
+        :param int maxsize: Most results to keep at once
+        """
+
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+
+        self.hits = 0
+        """Number of lookups that found a result"""
+
+        self.misses = 0
+        """Number of lookups that didn't find a result"""
+
+        self.evictions = 0
+        """Number of results thrown out to make room"""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def maxsize(self) -> int:
+        """Most results to keep at once. Shrinking it evicts right away."""
+
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int):
+        self._maxsize = maxsize
+        self._evict()
+
+    @staticmethod
+    def key(query: str, zone_line: tuple, ray: bool, version: int) -> tuple:
+        """
+        Make a key for a zone query. Coordinates are rounded to
+        :data:`src.data_structures.utils.PRECISION` places, so points that
+        only differ by rounding error share a key.
+
+        :param str query: Name of the query, like ``"find_zone"``
+        :param tuple[ndarray] zone_line: The zone line of the query
+        :param bool ray: Whether the zone line is a ray
+        :param int version: Version of the subdivision being queried
+        :return: A hashable key
+        :rtype: tuple
+        """
+
+        coords = tuple(round(float(c), PRECISION) for p in zone_line for c in p[:2])
+        return query, coords, bool(ray), version
+
+    def get(self, key: tuple):
+        """
+        Look up a result, and mark it as the most recently used.
+
+        :param tuple key: Key from :func:`key`
+        :return: The cached result, or None if there isn't one
+        """
+
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._entries[key]
+
+    def put(self, key: tuple, result):
+        """
+        Store a result as the most recently used one, evicting the least
+        recently used result if the cache is full.
+
+        :param tuple key: Key from :func:`key`
+        :param result: Result to store, which must not be None
+        """
+
+        if self._maxsize <= 0:
+            return
+
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def clear(self):
+        """
+        Throw out every result. The counters are kept.
+        """
+
+        self._entries.clear()
+
+    def _evict(self):
+        """
+        Throw out the least recently used results until there are at most
+        :attr:`maxsize` left.
+        """
+
+        while len(self._entries) > max(self._maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
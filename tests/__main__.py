@@ -4,4 +4,15 @@ sys.path.append("src/")  # Python packages are weird
 
 # Just add any tests you want to run here
 import test_add_line
-import test_find_zone
\ No newline at end of file
+import test_find_zone
+import test_utils
+import test_array_subdivision
+import test_add_lines
+import test_point_location
+import test_vertex_index
+import test_faces
+import test_zone_cache
+import test_polygon
+import test_grid_subdivision
+import test_line_edges
+import test_remove_line
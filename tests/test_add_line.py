@@ -31,4 +31,57 @@ actual_points = half_edges[0].get_polygon()
 del expected_points[-1]
 
 for p in expected_points:
-    assert any(all(p == actual_points, axis=1))
\ No newline at end of file
+    assert any(all(p == actual_points, axis=1))
+
+# The boundary should list every point on the bounding box in CCW order
+boundary = around(array(lines.boundary_polygon.points)).astype(int)
+expected_boundary = [bottom_left, point(5, 0), point(10, 0), point(10, 5), top_right, point(5, 10), point(0, 10), point(0, 5)]
+assert len(boundary) == len(expected_boundary)
+assert all(boundary == array(expected_boundary))
+
+# Boundary lookups find the boundary edge that the point would split
+h = lines._find_boundary_half_edge(point(7, 10))
+assert all(h.point == top_right) and all(h.twin.point == point(5, 10))
+h = lines._find_boundary_half_edge(point(0, 2))
+assert all(h.point == point(0, 5)) and all(h.twin.point == bottom_left)
+assert lines._find_boundary_half_edge(point(3, 3)) is None
+
+# Lines can go through vertices that are already there, and can share
+# endpoints on the boundary
+lines = BPS(bottom_left, top_right)
+lines.add_line((point(0, 5), point(10, 5)))
+lines.add_line((point(5, 0), point(5, 10)))
+lines.add_line((point(0, 1), point(10, 9)))
+lines.add_line((point(0, 1), point(10, 3)))
+
+assert len(list(lines.nbrs(point(5, 5)))) == 6
+assert len(list(lines.nbrs(point(0, 1)))) == 4
+assert len(lines.point_dict) == 13
+
+# Points within EPSILON of a vertex are that vertex
+assert lines.get_handle(point(5 + 1e-10, 5 - 1e-10)) == lines.get_handle(point(5, 5))
+assert lines.get_handle(point(5 + 1e-6, 5)) is None
+
+# HalfEdges are only equal to themselves, so they can go in sets
+h = lines.get_handle(point(5, 5))
+assert h == h and h != h.twin.twin.link
+assert len({h, h.twin, h.twin.twin}) == 2
+assert "HalfEdge" in repr(h)
+assert not hasattr(h, "__dict__")
+
+# Lines along a side of the box, or along a line that was already added, have
+# no face to cut, so they can't be added
+version = lines.version
+for line in (
+    (point(0, 1), point(0, 9)),
+    (point(3, 10), point(8, 10)),
+    (point(5, 0), point(5, 0)),
+    (point(10, 9), point(0, 1)),
+    (point(5, 10), point(5, 0)),
+):
+    try:
+        lines.add_line(line)
+        assert False
+    except ValueError:
+        pass
+assert lines.version == version and len(lines.point_dict) == 13
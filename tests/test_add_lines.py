@@ -0,0 +1,107 @@
+"""
+Test class for adding many lines at once with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.add_lines`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.arrangement import MAX_FACE_WALK, label_faces
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from numpy import array, around
+from numpy.random import default_rng
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 1), point(9, 10)),
+]
+
+one_at_a_time = BPS(bottom_left, top_right)
+for line in lines:
+    one_at_a_time.add_line(line)
+
+extra_line = (point(0, 9), point(10, 2))
+with_extra = BPS(bottom_left, top_right)
+for line in lines + [extra_line]:
+    with_extra.add_line(line)
+
+for cls in (BPS, ABPS):
+    # Add some lines one at a time, then the rest all at once
+    bps = cls(bottom_left, top_right)
+    bps.add_line(lines[0])
+    bps.add_lines(lines[1:])
+
+    assert len(bps.lines) == len(lines)
+    assert len(bps.point_dict) == len(one_at_a_time.point_dict)
+
+    # Every vertex should have the same neighbors
+    for p in one_at_a_time.point_dict:
+        expected = sorted(map(tuple, around(array(list(one_at_a_time.nbrs(p))), 6)))
+        assert sorted(map(tuple, around(array(list(bps.nbrs(p))), 6))) == expected
+
+    # The boundary should be in the same order
+    expected = around(array(one_at_a_time.boundary_polygon), 6)
+    assert (around(array(bps.boundary_polygon), 6) == expected).all()
+
+    # Zones should be the same
+    zone_line = (point(0, 5), point(10, 5))
+    assert bps.find_zone(zone_line) == one_at_a_time.find_zone(zone_line)
+
+    # Adding lines one at a time should still work afterwards
+    bps.add_line(extra_line)
+    zone_line = (point(5, 0), point(5, 10))
+    assert bps.find_zone(zone_line) == with_extra.find_zone(zone_line)
+
+# Four lines through the same point should make 8 faces around it
+bps = BPS(bottom_left, top_right)
+bps.add_lines(
+    [
+        (point(0, 5), point(10, 5)),
+        (point(5, 0), point(5, 10)),
+        (point(0, 1), point(10, 9)),
+        (point(0, 9), point(10, 1)),
+    ]
+)
+assert len(list(bps.nbrs(point(5, 5)))) == 8
+assert len(bps.find_zone((point(0, 4.5), point(10, 4.5)))) == 4
+
+# Crossings are the cross products of the lines' coefficients, so adding lines
+# one at a time or all at once puts every crossing at the exact same point
+rng = default_rng(3)
+sides = [lambda t: point(0, t), lambda t: point(t, 10), lambda t: point(10, t)]
+random_lines = [
+    (sides[0](t), sides[rng.integers(1, 3)](u))
+    for t, u in rng.uniform(0.5, 9.5, (12, 2)).tolist()
+]
+for cls in (BPS, ABPS):
+    one_by_one, batch = cls(bottom_left, top_right), cls(bottom_left, top_right)
+    for line in random_lines:
+        one_by_one.add_line(line)
+    batch.add_lines(random_lines)
+
+    tagged = one_by_one.vertices.lines[: len(one_by_one.vertices)]
+    assert (tagged[:, 0] >= 0).sum() == (batch.vertices.lines[:, 0] >= 0).sum() > 0
+    for v in (tagged[:, 0] >= 0).nonzero()[0].tolist():
+        i, j = tagged[v].tolist()
+        p = one_by_one.vertices.point(v)
+        assert p.tobytes() == batch.crossing(i, j).tobytes()
+        assert p is one_by_one.crossing(j, i)
+
+# Faces too long to walk around are labeled too, and faces are numbered in
+# order of their smallest half edge
+n = MAX_FACE_WALK + 10
+link = array([1, 2, 0, 2 + n] + list(range(3, 2 + n)) + [4 + n, 3 + n])
+face, face_handle = label_faces(link)
+assert face.tolist() == [0] * 3 + [1] * n + [2] * 2
+assert face_handle.tolist() == [0, 3, 3 + n]
@@ -0,0 +1,68 @@
+"""
+Test class for the struct-of-arrays backend
+:class:`src.data_structures.array_subdivision.ArrayBoundedPolygonalSubdivision`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from numpy import all, any, array, around
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+]
+
+objects, arrays = BPS(bottom_left, top_right), ABPS(bottom_left, top_right)
+for line in lines:
+    objects.add_line(line)
+    arrays.add_line(line)
+
+# Both backends should have the same vertices
+assert len(arrays.point_dict) == len(objects.point_dict)
+for p in objects.point_dict:
+    assert arrays.get_handle(p) is not None
+
+# Every vertex should have the same neighbors in the same order
+for p in objects.point_dict:
+    expected = around(array(list(objects.nbrs(p))), 6)
+    actual = around(array(list(arrays.nbrs(p))), 6)
+    assert (expected == actual).all()
+
+# Zones should be the same as with the object backend
+zone = arrays.find_zone((point(0, 5), point(10, 5)))
+assert len(zone) == 1
+
+expected_points = (point(0, 6), point(2, 8), point(8, 8), point(10, 6), point(10, 4), point(9, 3), point(1, 3), point(0, 4))
+actual_points = around(array(zone[0].points)).astype(int)
+
+assert len(actual_points) == 8
+for p in expected_points:
+    assert any(all(p == actual_points, axis=1))
+
+zone_line = (point(0, 10), point(10, 1))
+for expected, actual in zip(objects.find_zone(zone_line), arrays.find_zone(zone_line)):
+    assert expected == actual
+
+# The columns should hold exactly the half edges that were created
+store = arrays.store
+n = store.n_half_edges
+assert (store.twin[store.twin[:n]] == range(n)).all()
+assert (store.prev[store.link[:n]] == range(n)).all()
+
+# Both backends should know which line each edge lies on
+expected, actual = objects.all_zones(), arrays.all_zones()
+assert (expected.offsets == actual.offsets).all()
+assert (expected.face_edges == actual.face_edges).all()
@@ -0,0 +1,150 @@
+"""
+Test class for the face ids and cached faces of
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.face`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from numpy import roll
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 0), point(10, 10)),
+]
+
+
+def check_faces(bps):
+    """Every face id names exactly one ring of HalfEdges"""
+
+    half_edges, _, _, _, _ = bps._half_edge_columns()
+    rings = dict()
+    for h in half_edges:
+        assert h.face == h.link.face
+        rings.setdefault(h.face, h)
+
+    assert sorted(rings) == list(range(bps.n_faces))
+    for f, h in rings.items():
+        face = bps.face(f)
+        assert face.handle.face == f
+        assert face.polygon == h.get_polygon()
+        assert face.edges == len(face.polygon)
+        for p in face.polygon:
+            assert (face.bbox[0] <= p[:2]).all() and (p[:2] <= face.bbox[1]).all()
+
+
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+
+    # The outside of the box is face 0, and the inside is face 1
+    assert bps.n_faces == 2
+    assert bps.face(1).edges == 4
+    assert (bps.face(1).bbox == [[0, 0], [10, 10]]).all()
+    check_faces(bps)
+
+    # Each line adds one face for every face it splits
+    for line in lines:
+        zone = len(bps.find_zone(line))
+        n_faces = bps.n_faces
+        bps.add_line(line)
+        assert bps.n_faces == n_faces + zone
+        check_faces(bps)
+
+    # Asking again gives back the same cached faces
+    zone_line = (point(0, 5), point(10, 5))
+    assert all(
+        a is b for a, b in zip(bps.find_zone(zone_line), bps.find_zone(zone_line))
+    )
+
+    # Faces away from a new line are still cached, and split faces aren't
+    away = bps.locate(point(1, 9)).face
+    split = bps.locate(point(5, 1)).face
+    cached_away, cached_split = bps.face(away), bps.face(split)
+    bps.add_line((point(0, 1), point(10, 1)))
+    assert bps.face(away) is cached_away
+    assert bps.face(split) is not cached_split
+    check_faces(bps)
+
+    # Building all at once numbers the same faces
+    batch = cls(bottom_left, top_right)
+    batch.add_lines(lines + [(point(0, 1), point(10, 1))])
+    assert batch.n_faces == bps.n_faces
+    check_faces(batch)
+
+# iter_faces finds each face once, and the faces tile the box
+for cls in (BPS, ABPS):
+    for build in ("add_line", "add_lines"):
+        bps = cls(bottom_left, top_right)
+        if build == "add_line":
+            for line in lines:
+                bps.add_line(line)
+        else:
+            bps.add_lines(lines)
+
+        faces = list(bps.iter_faces())
+        assert len(faces) == bps.n_faces - 1
+        assert sorted(h.face for h, _ in faces) == list(range(1, bps.n_faces))
+
+        area = 0
+        for h, ring in faces:
+            assert ring.shape == (bps.face(h.face).edges, 2)
+            assert (ring == [p[:2] for p in h.get_polygon()]).all()
+
+            # Faces are CW, so their signed areas are negative
+            x, y = ring[:, 0], ring[:, 1]
+            area -= (x * roll(y, -1) - roll(x, -1) * y).sum() / 2
+        assert abs(area - 100) < 1e-9
+
+        # The outside is face 0, going CCW around the box
+        outside = [(h, ring) for h, ring in bps.iter_faces(outer=True) if h.face == 0]
+        assert len(outside) == 1
+        assert len(outside[0][1]) == len(bps.boundary_polygon)
+
+# face_metrics measures every face inside the box at once
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+    metrics = bps.face_metrics()
+    assert metrics.face.tolist() == [1]
+    assert metrics.area.tolist() == [100]
+    assert metrics.centroid.tolist() == [[5, 5]]
+    assert metrics.bbox.tolist() == [[[0, 0], [10, 10]]]
+    assert metrics.degree.tolist() == [4]
+
+    bps.add_lines(lines)
+    metrics = bps.face_metrics()
+    assert metrics.face.tolist() == list(range(1, bps.n_faces))
+    assert abs(metrics.area.sum() - 100) < 1e-9
+    assert (metrics.area > 0).all()
+
+    # The centroids of the faces, weighted by area, average to the middle
+    middle = (metrics.centroid * metrics.area[:, None]).sum(axis=0) / 100
+    assert (abs(middle - 5) < 1e-9).all()
+
+    for f, bbox, degree, centroid in zip(
+        metrics.face, metrics.bbox, metrics.degree, metrics.centroid
+    ):
+        face = bps.face(f)
+        assert (bbox == face.bbox).all()
+        assert degree == face.edges
+        assert (bbox[0] < centroid).all() and (centroid < bbox[1]).all()
+
+    # The triangle in the bottom left corner
+    bps = cls(bottom_left, top_right)
+    bps.add_line((point(0, 4), point(4, 0)))
+    metrics = bps.face_metrics()
+    corner = bps.locate(point(1, 1)).face
+    i = metrics.face.tolist().index(corner)
+    assert abs(metrics.area[i] - 8) < 1e-9
+    assert (abs(metrics.centroid[i] - 4 / 3) < 1e-9).all()
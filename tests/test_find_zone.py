@@ -7,6 +7,7 @@ Test class for finding the zone of a
 """
 
 
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
 from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
 from data_structures.point import point
 
@@ -111,4 +112,185 @@ actual_points = around(array(zone[0].points)).astype(int)
 assert len(actual_points) == 8
 
 for p in expected_points:
-    assert any(all(p == actual_points, axis=1))
\ No newline at end of file
+    assert any(all(p == actual_points, axis=1))
+
+# iter_zone should lazily walk the same faces as find_zone
+zone_line = (point(0, 9), point(10, 1))
+faces = lines.iter_zone(zone_line)
+assert next(faces).get_polygon() == lines.find_zone(zone_line)[0]
+assert [h.get_polygon() for h in lines.iter_zone(zone_line)] == lines.find_zone(
+    zone_line
+)
+
+# zone_complexity should count the same faces and edges as find_zone
+complexity = lines.zone_complexity((point(0, 5), point(10, 5)))
+assert complexity.faces == 1
+assert complexity.edges == 8
+# The edges at y = 3 and y = 8 are parallel to the zone line
+assert complexity.left_edges == 3
+assert complexity.right_edges == 3
+
+complexity = lines.zone_complexity(zone_line)
+zone = lines.find_zone(zone_line)
+assert complexity.faces == len(zone)
+assert complexity.edges == sum(len(polygon) for polygon in zone)
+assert complexity.left_edges + complexity.right_edges == complexity.edges
+
+# all_zones should find the zone each line would have if it were added last
+added = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 9), point(10, 1)),
+]
+lines.add_line(added[-1])
+
+zones = lines.all_zones()
+assert len(zones.faces) == len(added)
+assert zones.offsets[-1] == len(zones.face_edges)
+
+for i, line in enumerate(added):
+    others = BPS(bottom_left, top_right)
+    for other in added[:i] + added[i + 1 :]:
+        others.add_line(other)
+
+    complexity = others.zone_complexity(line)
+    assert zones.faces[i] == complexity.faces
+    assert zones.edges[i] == complexity.edges
+
+    # Faces are in order along the line
+    zone = others.find_zone(line)
+    face_edges = zones.face_edges[zones.offsets[i] : zones.offsets[i + 1]]
+    assert list(face_edges) == [len(polygon) for polygon in zone]
+
+# Zone lines can start and end inside the bounding box
+lines = BPS(bottom_left, top_right)
+for line in added[:-1]:
+    lines.add_line(line)
+
+octagon = lines.find_zone((point(0, 5), point(10, 5)))[0]
+assert lines.find_zone((point(4, 5), point(6, 5))) == [octagon]
+
+zone = lines.find_zone((point(3, 5), point(3, 9)))
+assert len(zone) == 2
+assert zone[0] == octagon
+assert point(3, 9) in zone[1]
+
+# Rays go until they reach the boundary
+zone = lines.find_zone((point(3, 5), point(3, 6)), ray=True)
+assert len(zone) == 3
+assert zone[0] == octagon
+assert point(3, 10) in zone[2]
+
+# Zone lines starting on an edge go into the face on their side of it
+above = lines.locate(point(3, 8.5)).face
+below = lines.locate(point(3, 7)).face
+assert next(lines.iter_zone((point(3, 8), point(3, 10)))).face == above
+assert next(lines.iter_zone((point(3, 8), point(3, 0)))).face == below
+
+# Segments that leave the bounding box are cut off at the boundary
+assert lines.find_zone((point(3, 5), point(3, 20))) == lines.find_zone(
+    (point(3, 5), point(3, 10))
+)
+
+# Zones that start outside the bounding box can't be found, and rays need a
+# direction
+for zone_line, ray in (
+    ((point(-1, 5), point(5, 5)), False),
+    ((point(3, 5), point(3, 5)), True),
+):
+    try:
+        lines.find_zone(zone_line, ray)
+        assert False
+    except ValueError:
+        pass
+
+# Adding lines between interior zones keeps the index their first face is
+# found with, and the zones are the same as in a subdivision built at once
+for cls in (BPS, ABPS):
+    lines = cls(bottom_left, top_right)
+    lines.add_line(added[0])
+    lines.find_zone((point(4, 5), point(6, 5)))
+    locator = lines._locator
+
+    for i in range(1, len(added)):
+        lines.add_line(added[i])
+        zone_line = (point(4, 5), point(6, 5.5))
+        zone = lines.find_zone(zone_line)
+        assert lines._locator is locator
+
+        at_once = cls(bottom_left, top_right)
+        at_once.add_lines(added[: i + 1])
+        assert zone == at_once.find_zone(zone_line)
+
+# Zone lines can go through vertices and start at corners, and they carry on
+# into the face ahead of them
+for cls in (BPS, ABPS):
+    lines = cls(bottom_left, top_right)
+    lines.add_line((bottom_left, top_right))
+    assert [h.face for h in lines.iter_zone((bottom_left, point(10, 5)))] == [
+        lines.locate(point(5, 1)).face
+    ]
+    assert [h.face for h in lines.iter_zone((bottom_left, point(5, 10)))] == [
+        lines.locate(point(1, 5)).face
+    ]
+
+    lines.add_line((point(0, 10), point(10, 0)))
+    for zone_line, inside in (
+        ((point(0, 5), point(10, 5)), (point(1, 5), point(9, 5))),
+        ((point(10, 5), point(0, 5)), (point(9, 5), point(1, 5))),
+        ((point(5, 0), point(5, 10)), (point(5, 1), point(5, 9))),
+        ((point(0, 2), point(10, 8)), (point(1, 3), point(9, 7))),
+    ):
+        faces = [h.face for h in lines.iter_zone(zone_line)]
+        assert faces == [lines.locate(p).face for p in inside]
+
+# zone_complexity follows zone lines through vertices and from corners the same
+# way
+for cls in (BPS, ABPS):
+    lines = cls(bottom_left, top_right)
+    lines.add_line((bottom_left, top_right))
+    for zone_line in ((bottom_left, point(10, 5)), (bottom_left, top_right)):
+        complexity = lines.zone_complexity(zone_line)
+        assert (complexity.faces, complexity.edges) == (1, 3)
+
+    lines.add_line((point(0, 10), point(10, 0)))
+    for zone_line in (
+        (point(0, 5), point(10, 5)),
+        (point(5, 0), point(5, 10)),
+        (point(0, 2), point(10, 8)),
+        (bottom_left, top_right),
+        (point(0, 10), point(10, 0)),
+        (point(0, 1), point(10, 9)),
+    ):
+        complexity = lines.zone_complexity(zone_line)
+        zone = lines.find_zone(zone_line)
+        assert complexity.faces == len(zone) == 2
+        assert complexity.edges == sum(len(polygon) for polygon in zone)
+
+# all_zones handles lines that meet at the same point, share an endpoint, or
+# end at a corner
+degenerate = [
+    (bottom_left, top_right),
+    (point(0, 10), point(10, 0)),
+    (point(0, 5), point(10, 5)),
+    (point(5, 0), point(5, 10)),
+    (point(0, 5), point(10, 8)),
+    (bottom_left, point(4, 10)),
+]
+for cls in (BPS, ABPS):
+    lines = cls(bottom_left, top_right)
+    lines.add_lines(degenerate)
+    zones = lines.all_zones()
+
+    for i, line in enumerate(degenerate):
+        others = cls(bottom_left, top_right)
+        others.add_lines(degenerate[:i] + degenerate[i + 1 :])
+
+        zone = others.find_zone(line)
+        face_edges = zones.face_edges[zones.offsets[i] : zones.offsets[i + 1]]
+        assert list(face_edges) == [len(polygon) for polygon in zone]
+        assert zones.edges[i] == others.zone_complexity(line).edges
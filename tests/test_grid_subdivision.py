@@ -0,0 +1,151 @@
+"""
+Test class for the snap rounded
+:class:`src.data_structures.grid_subdivision.GridBoundedPolygonalSubdivision`
+and the integer geometry in :mod:`src.data_structures.snap_rounding`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from fractions import Fraction
+from math import floor
+
+from data_structures.grid_subdivision import GridBoundedPolygonalSubdivision as GBPS
+from data_structures.point import point
+from data_structures.polygon import Polygon
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.snap_rounding import grid_crossings, grid_orient, pixel_hits
+from data_structures.utils import orient2d
+from numpy import array, int64, mgrid
+from numpy.random import default_rng
+
+rng = default_rng(0)
+
+# Integer orientation agrees with the floating point one on small points
+for _ in range(200):
+    a, b, c = rng.integers(-50, 50, (3, 2))
+    assert grid_orient(a, b, c) == orient2d(point(*a), point(*b), point(*c))
+
+# Crossings on the biggest grid don't overflow, and round the same as exact
+# fractions would
+big = 1 << 20
+segments = rng.integers(0, big, (20, 2, 2))
+segments[:10, :, 0] = [0, big]
+segments[10:, :, 1] = [0, big]
+for i, j, (x, y) in zip(*grid_crossings(segments)):
+    (a, b), (c, d) = segments[i].tolist(), segments[j].tolist()
+    t = Fraction(
+        (c[0] - a[0]) * (d[1] - c[1]) - (c[1] - a[1]) * (d[0] - c[0]),
+        (b[0] - a[0]) * (d[1] - c[1]) - (b[1] - a[1]) * (d[0] - c[0]),
+    )
+    assert floor(a[0] + t * (b[0] - a[0]) + Fraction(1, 2)) == x
+    assert floor(a[1] + t * (b[1] - a[1]) + Fraction(1, 2)) == y
+
+# Crossings round to the nearest grid point
+segments = array(
+    [[(0, 0), (10, 10)], [(0, 10), (10, 0)], [(0, 3), (10, 4)]], dtype=int64
+)
+i, j, xy = grid_crossings(segments)
+assert list(zip(i.tolist(), j.tolist())) == [(0, 1), (0, 2), (1, 2)]
+assert xy.tolist() == [[5, 5], [3, 3], [6, 4]]
+
+# Pixels are half open, so a segment through the corner of a pixel only
+# passes through the pixels on the closed side
+p, q = array([(0, 0)] * 4), array([(1, 1)] * 4)
+centers = array([(0, 0), (1, 1), (1, 0), (0, 1)])
+assert pixel_hits(p, q, centers).tolist() == [True, True, False, False]
+p, q = array([(0, 0)] * 3), array([(4, 0)] * 3)
+assert pixel_hits(p, q, array([(2, 0), (2, 1), (5, 0)])).tolist() == [
+    True,
+    False,
+    False,
+]
+
+# Lines that only cross at grid points make the same arrangement as floats
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 0), point(10, 10)),
+]
+grid, exact = GBPS(point(0, 0), point(10, 10)), BPS(point(0, 0), point(10, 10))
+grid.add_lines(lines)
+exact.add_lines(lines)
+assert grid.n_faces == exact.n_faces
+assert sorted(grid.point_dict) == sorted(exact.point_dict)
+for p in exact.point_dict:
+    assert sorted(map(tuple, grid.nbrs(p))) == sorted(map(tuple, exact.nbrs(p)))
+
+# Three crossings in the same pixel snap to one vertex
+lines = [
+    (point(0, 5), point(20, 5)),
+    (point(5, 0), point(5, 20)),
+    (point(0, 9), point(11, 0)),
+]
+grid, exact = GBPS(point(0, 0), point(20, 20)), BPS(point(0, 0), point(20, 20))
+grid.add_lines(lines)
+exact.add_lines(lines)
+assert exact.n_faces == 8 and grid.n_faces == 7
+assert len(list(grid.nbrs(point(5, 5)))) == 6
+for i, j in ((0, 1), (0, 2), (1, 2)):
+    assert grid.crossing(i, j).tolist() == [5, 5, 1]
+
+# Random lines at a few resolutions
+for resolution in (1, 4):
+    lines = [
+        (point(0, a), point(20, b)) if side else (point(a, 0), point(b, 20))
+        for side, a, b in zip(
+            rng.integers(0, 2, 15), *rng.uniform(0, 20, (2, 15)).tolist()
+        )
+    ]
+    grid = GBPS(point(0, 0), point(20, 20), resolution)
+    for line in lines[:5]:
+        grid.add_line(line)
+    grid.add_lines(lines[5:])
+    assert len(grid.lines) == 15
+
+    exact = BPS(point(0, 0), point(20, 20))
+    exact.add_lines(grid.lines)
+    assert len(grid.vertices) <= len(exact.vertices)
+
+    # Every vertex is on the grid
+    coords = grid.vertices.coords[: len(grid.vertices)] * resolution
+    assert (coords == coords.round()).all()
+
+    # The faces still tile the box, and Euler's formula holds
+    half_edges, _, _, _, _ = grid._half_edge_columns()
+    for h in half_edges:
+        assert h.face == h.link.face and h.twin.twin is h
+    metrics = grid.face_metrics()
+    assert abs(metrics.area.sum() - 400) < 1e-9 and (metrics.area > 0).all()
+    assert len(grid.vertices) - len(half_edges) // 2 + grid.n_faces == 2
+
+    # Each face can be found again by a point in it
+    for f, centroid in zip(metrics.face.tolist(), metrics.centroid):
+        if point(*centroid) in grid.face(f).polygon:
+            assert grid.locate(point(*centroid)).face == f
+
+# The crossing of these lines rounds to (8, 3), which bends the face above
+# them so it isn't convex. Polygons from HalfEdges test containment the same
+# way as the faces they're in, even for points on the boundary.
+grid = GBPS(point(0, 0), point(10, 10))
+grid.add_lines([(point(0, 7), point(10, 1)), (point(10, 0), point(0, 10))])
+f = grid.locate(point(9, 5)).face
+assert not Polygon(list(grid.face(f).polygon)).is_convex()
+samples = mgrid[0:10.5:0.5, 0:10.5:0.5].reshape(2, -1).T
+for h in grid._half_edge_columns()[0]:
+    polygon = h.get_polygon()
+    assert not polygon.convex
+    inside = grid.face(h.face).polygon.contains_many(samples)
+    assert (polygon.contains_many(samples) == inside).all()
+
+# The box has to be a whole number of grid steps
+try:
+    GBPS(point(0, 0), point(10.5, 10))
+    assert False
+except ValueError:
+    pass
+GBPS(point(0, 0), point(10.5, 10), resolution=2)
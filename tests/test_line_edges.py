@@ -0,0 +1,139 @@
+"""
+Test class for the line of each HalfEdge, and the
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.edges_of_line`
+and
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.lines_of_face`
+queries.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.grid_subdivision import GridBoundedPolygonalSubdivision as GBPS
+from data_structures.half_edge import BOUNDARY_LINES
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from numpy.random import default_rng
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 0), point(10, 10)),
+    (point(10, 1), point(0, 9)),
+]
+
+
+def check_lines(bps):
+    """Each line is a path of edges from its first point to its second"""
+
+    half_edges, twin, _, line, _ = bps._half_edge_columns()
+    n_edges = 0
+    for i in list(range(len(bps.lines))) + list(BOUNDARY_LINES):
+        edges = bps.edges_of_line(i)
+        n_edges += len(edges)
+        for h in edges:
+            assert h.line == h.twin.line == i
+        for h, k in zip(edges, edges[1:]):
+            assert h.twin.vertex == k.vertex
+
+        if i >= 0:
+            a, b = bps.lines[i]
+            assert bps.vertices.find(*edges[0].point[:2]) == bps.vertices.find(*a[:2])
+            assert bps.vertices.find(*edges[-1].twin.point[:2]) == bps.vertices.find(
+                *b[:2]
+            )
+
+    # Every edge is on exactly one line
+    assert n_edges == len(half_edges) // 2
+    assert (line != -1).all()
+
+    # Edge k of a face goes from point k to point k + 1 of its polygon
+    for f in range(bps.n_faces):
+        ring = bps.face(f).polygon.points
+        for k, i in enumerate(bps.lines_of_face(f)):
+            p, q = ring[k], ring[(k + 1) % len(ring)]
+            assert any(
+                (h.point[:2] == p[:2]).all() and (h.twin.point[:2] == q[:2]).all()
+                for h in bps.edges_of_line(i) + [h.twin for h in bps.edges_of_line(i)]
+            )
+
+
+for cls in (BPS, ABPS):
+    # The box has one edge on each side
+    bps = cls(bottom_left, top_right)
+    assert [len(bps.edges_of_line(i)) for i in BOUNDARY_LINES] == [1, 1, 1, 1]
+    assert sorted(bps.lines_of_face(1)) == sorted(BOUNDARY_LINES)
+    assert bps.lines_of_face(0) == list(BOUNDARY_LINES)
+    check_lines(bps)
+
+    # Lines added one at a time, all at once, and some of each
+    for n_batch in (0, 4, len(lines)):
+        bps = cls(bottom_left, top_right)
+        bps.add_lines(lines[:n_batch])
+        for line in lines[n_batch:]:
+            bps.add_line(line)
+        check_lines(bps)
+
+        # Building all at once puts the same edges on each line
+        batch = cls(bottom_left, top_right)
+        batch.add_lines(lines)
+        for i in list(range(len(lines))) + list(BOUNDARY_LINES):
+            assert [h.point.tolist() for h in bps.edges_of_line(i)] == [
+                h.point.tolist() for h in batch.edges_of_line(i)
+            ]
+
+    # The diagonal is parallel to two lines and meets two others at (8, 8),
+    # so it crosses the rest at 4 vertices
+    assert len(bps.edges_of_line(6)) == 5
+    assert bps.edges_of_line(6)[-1].point[:2].tolist() == [8, 8]
+    assert {bps.lines_of_face(f).count(6) for f in range(bps.n_faces)} <= {0, 1}
+
+    # The triangle in the bottom left corner, under the diagonal
+    corner = bps.locate(point(1, 0.5)).face
+    assert sorted(bps.lines_of_face(corner)) == [-2, 2, 6]
+
+# Random lines, some of which go through the same points on the boundary
+rng = default_rng(0)
+for cls in (BPS, ABPS):
+    ends = sorted(set(map(tuple, rng.integers(0, 5, (20, 2)).tolist())))
+    bps = cls(bottom_left, top_right)
+    for a, b in ends:
+        bps.add_line((point(0, 2 * a + 1), point(10, 2 * b + 1)))
+        bps.add_line((point(2 * a + 1, 0), point(2 * b + 1, 10)))
+    check_lines(bps)
+
+# On a grid, the sides of the box and every face still have their lines
+grid = GBPS(bottom_left, top_right)
+grid.add_lines(lines)
+_, _, _, line, _ = grid._half_edge_columns()
+assert (line != -1).all()
+sides = [grid.edges_of_line(i) for i in BOUNDARY_LINES]
+assert sides[0][0].point[:2].tolist() == [0, 0]
+assert sum(map(len, sides)) == len(grid.boundary_polygon)
+for edges in sides:
+    for h, k in zip(edges, edges[1:]):
+        assert h.twin.vertex == k.vertex
+for f in range(grid.n_faces):
+    assert len(grid.lines_of_face(f)) == grid.face(f).edges
+
+# The index of the edges on each line is only built once it's needed, and is
+# kept up to date after that
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+    for line in lines[:4]:
+        bps.add_line(line)
+    assert bps._line_edges is None
+    check_lines(bps)
+    for line in lines[4:]:
+        bps.add_line(line)
+    assert bps._line_edges is not None
+    check_lines(bps)
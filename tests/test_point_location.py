@@ -0,0 +1,108 @@
+"""
+Test class for finding the face containing a point with
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.locate`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from random import Random
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+]
+
+rng = Random(0)
+samples = [point(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(200)]
+
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+
+    # With no lines, everything is in the one face
+    assert len(bps.locate(point(5, 5)).get_polygon()) == 4
+
+    for line in lines:
+        bps.add_line(line)
+
+    # The center face is the octagon from test_find_zone
+    assert len(bps.locate(point(5, 5)).get_polygon()) == 8
+    assert bps.locate(point(5, 5)).get_polygon() == bps.find_zone(
+        (point(0, 5), point(10, 5))
+    )[0]
+
+    # Every sample point should be in the face it's located in
+    for p, h in zip(samples, bps.locate_many(samples)):
+        assert p in h.get_polygon()
+
+    # Points outside the bounding box aren't in any face
+    assert bps.locate(point(-1, 5)) is None
+    assert bps.locate(point(5, 11)) is None
+
+    # Points on the boundary are in a face next to it
+    assert point(10, 10) in bps.locate(point(10, 10)).get_polygon()
+    assert point(0, 0) in bps.locate(point(0, 0)).get_polygon()
+
+    # Adding a line should update the faces points are located in
+    bps.add_line((point(0, 5), point(10, 5)))
+    assert len(bps.locate(point(5, 4)).get_polygon()) == 6
+    for p, h in zip(samples, bps.locate_many(samples)):
+        assert p in h.get_polygon()
+
+# Each batch of points only sorts the slabs it needs, so locating points one at
+# a time finds the same faces as locating them all at once
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+    bps.add_lines(
+        [
+            (point(0, rng.uniform(0, 10)), point(10, rng.uniform(0, 10)))
+            for _ in range(8)
+        ]
+    )
+    faces = [h.face for h in bps.locate_many(samples)]
+    assert faces == [bps.locate(p).face for p in samples]
+    assert faces[:50] == [h.face for h in bps.locate_many(samples[:50])]
+
+# Adding and removing lines updates the index in place, and it finds the same
+# faces as an index built from scratch
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+    bps.add_lines(lines)
+    bps.locate_many(samples)
+    locator = bps._locator
+
+    changes = [
+        (point(0, 5), point(10, 5)),
+        (point(5, 0), point(5, 10)),
+        (point(0, 1), point(7, 10)),
+        2,
+        (point(2, 0), point(10, 9)),
+        0,
+    ]
+    for change in changes:
+        if isinstance(change, int):
+            bps.remove_line(change)
+        else:
+            bps.add_line(change)
+        assert bps._locator is locator
+
+        faces = [h.face for h in bps.locate_many(samples)]
+        assert faces[:20] == [bps.locate(p).face for p in samples[:20]]
+        for p, f in zip(samples, faces):
+            assert p in bps.face(f).polygon
+
+        bps._locator = None
+        assert faces == [h.face for h in bps.locate_many(samples)]
+        bps._locator = locator
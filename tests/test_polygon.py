@@ -0,0 +1,157 @@
+"""
+Test class for convexity and containment in
+:class:`src.data_structures.polygon.Polygon`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.polygon import Polygon
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from math import cos, pi, sin
+from numpy import array, shares_memory
+from random import Random
+
+square = [point(0, 0), point(4, 0), point(4, 4), point(0, 4)]
+star = [point(cos(4 * pi * i / 5), sin(4 * pi * i / 5)) for i in range(5)]
+dent = [point(0, 0), point(4, 0), point(2, 1), point(4, 4), point(0, 4)]
+
+# Turning the same way isn't enough, a star turns around twice
+assert Polygon(square).is_convex()
+assert Polygon(square[::-1]).is_convex()
+assert not Polygon(star).is_convex()
+assert not Polygon(dent).is_convex()
+
+# Points in the middle of edges and repeated points don't matter
+assert Polygon([point(0, 0), point(2, 0)] + square[1:] + [point(0, 2)]).is_convex()
+assert Polygon([square[0]] + square).is_convex()
+assert Polygon([point(0, 0), point(1, 1), point(2, 2), point(3, 3)]).is_convex()
+
+# Convex polygons give the same answers as ray casting, in either direction,
+# with points on the boundary inside
+rng = Random(0)
+samples = [point(rng.uniform(-1, 5), rng.uniform(-1, 5)) for _ in range(200)]
+for points in (square, square[::-1]):
+    with_middle = points[:1] + [(points[0] + points[1]) / 2] + points[1:]
+    for fast in (Polygon(points, convex=True), Polygon(with_middle, convex=True)):
+        slow = Polygon(points)
+        inside = fast.contains_many(samples)
+        for p, p_inside in zip(samples, inside):
+            assert (p in fast) == (p in slow) == p_inside
+
+        for p in points + [point(2, 0), point(4, 2)]:
+            assert p in fast
+        assert fast.contains_many(points).all()
+
+# Polygons that aren't convex take points with or without z too
+queries = [point(1, 2), point(3, 0.2), point(3.5, 1.5)]
+for points in (array(queries), array(queries)[:, :2]):
+    assert Polygon(dent).contains_many(points).tolist() == [True, True, False]
+
+# Faces of a subdivision are convex, except for the outside of the box
+bps = BPS(point(0, 0), point(10, 10))
+bps.add_line((point(0, 4), point(4, 0)))
+bps.add_line((point(0, 6), point(10, 6)))
+for h in bps._half_edge_columns()[0]:
+    polygon = h.get_polygon()
+    assert polygon.convex == (h.face != 0) and polygon.is_convex()
+assert bps.face(bps.locate(point(5, 5)).face).polygon.convex
+assert not bps.face(0).polygon.convex
+assert bps.boundary_polygon.convex
+
+# is_simple allows edges next to each other to share a point, but nothing else
+bowtie = [point(0, 0), point(4, 4), point(4, 0), point(0, 4)]
+touching = [point(0, 0), point(4, 0), point(4, 4), point(2, 0), point(0, 4)]
+back = [point(0, 0), point(4, 0), point(2, 0), point(2, 4)]
+overlap = [
+    point(0, 0),
+    point(4, 0),
+    point(4, 1),
+    point(2, 1),
+    point(2, 0),
+    point(1, -1),
+]
+for points, simple in (
+    (square, True),
+    (dent, True),
+    (square[:1] + [point(2, 0)] + square[1:], True),
+    (star, False),
+    (bowtie, False),
+    (touching, False),
+    (back, False),
+    (overlap, False),
+    (square + [square[0]], False),
+):
+    assert Polygon(points).is_simple() == simple
+    assert Polygon(points)._is_simple_quadratic() == simple
+
+# The sweep agrees with checking every pair of edges
+for _ in range(500):
+    n = rng.randint(4, 12)
+    angles = sorted(rng.uniform(0, 2 * pi) for _ in range(n))
+    radii = [rng.randint(2, 6) for _ in range(n)]
+    points = [
+        point(round(r * cos(a)), round(r * sin(a))) for r, a in zip(radii, angles)
+    ]
+    for _ in range(rng.randint(0, 2)):
+        points[rng.randrange(n)] = point(rng.randint(-6, 6), rng.randint(-6, 6))
+
+    polygon = Polygon(points)
+    assert polygon.is_simple() == polygon._is_simple_quadratic()
+
+# Polygons are equal, and hash the same, if they only differ by rotation
+rotations = [Polygon(dent[i:] + dent[:i]) for i in range(len(dent))]
+assert len(set(rotations)) == 1
+assert all(p == rotations[0] for p in rotations)
+assert Polygon(dent) != Polygon(dent[::-1])
+assert Polygon(dent) != Polygon(dent[:-1])
+assert Polygon([]) == Polygon([])
+
+# The canonical form starts at the smallest point, and can't be changed
+canonical = Polygon(square[2:] + square[:2]).canonical
+assert (canonical[0] == square[0]).all()
+assert not canonical.flags.writeable
+
+# Repeated points still give one canonical form
+repeats = [point(0, 0), point(1, 0), point(0, 0), point(0, 1)]
+assert Polygon(repeats) == Polygon(repeats[2:] + repeats[:2])
+assert hash(Polygon(repeats)) == hash(Polygon(repeats[2:] + repeats[:2]))
+
+# -0.0 and 0.0 are the same
+negative_zero = Polygon([point(-0.0, 0), point(4, 0), point(4, 4)])
+zero = Polygon([point(0.0, 0), point(4, 0), point(4, 4)])
+assert negative_zero == zero and hash(negative_zero) == hash(zero)
+
+# Translation
+moved = Polygon([p + point(3, -2, z=0) for p in dent[1:] + dent[:1]])
+assert moved != Polygon(dent)
+assert moved.equal_up_to_translation(Polygon(dent))
+assert moved.translation_hash() == Polygon(dent).translation_hash()
+assert not Polygon(square).equal_up_to_translation(Polygon(dent))
+
+# Every HalfEdge of a subdivision is in one of its faces, so deduplicating
+# their polygons finds every face
+polygons = {h.get_polygon() for h in bps._half_edge_columns()[0]}
+assert len(polygons) == bps.n_faces
+
+# Polygons keep their points in one read only (n,3) array
+polygon = Polygon(dent)
+assert polygon.points.shape == (5, 3) and not polygon.points.flags.writeable
+assert (polygon[5] == polygon[0]).all() and (polygon[-1] == dent[-1]).all()
+assert all((p == q).all() for p, q in zip(polygon, dent))
+assert Polygon([(0, 0), (4, 0), (4, 4)]) == Polygon(square[:3])
+assert len(Polygon([])) == 0
+
+# An (n,3) float64 array is used without copying it
+buffer = array([p for p in square], dtype=float)
+assert shares_memory(Polygon(buffer).points, buffer)
+assert buffer.flags.writeable
+
+# Derived values are worked out once
+assert (polygon.bbox == [[0, 0], [4, 4]]).all()
+assert polygon.lowest[1] == 0 and polygon.highest[1] == 4
+assert polygon.orientation == 1
+assert Polygon(dent[::-1]).orientation == -1
+assert Polygon([point(0, 0), point(1, 1), point(2, 2)]).orientation == 0
+assert polygon.bbox is polygon.bbox
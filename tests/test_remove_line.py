@@ -0,0 +1,182 @@
+"""
+Test class for
+:func:`src.data_structures.polygonal_subdivision.BoundedPolygonalSubdivision.remove_line`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.grid_subdivision import GridBoundedPolygonalSubdivision as GBPS
+from data_structures.half_edge import BOUNDARY_LINES
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from numpy.random import default_rng
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+    (point(6, 0), point(10, 4)),
+    (point(10, 6), point(6, 10)),
+    (point(0, 0), point(10, 10)),
+    (point(10, 1), point(0, 9)),
+    (point(0, 8), point(10, 2)),
+]
+
+
+def structure(bps):
+    """Everything about a subdivision that doesn't depend on how it was built"""
+
+    half_edges, _, _, _, _ = bps._half_edge_columns()
+    for h in half_edges:
+        assert h.face == h.link.face and h.link.prev == h and h.twin.twin == h
+        assert h.line == h.twin.line
+    assert sorted({h.face for h in half_edges}) == list(range(bps.n_faces))
+    for f in range(bps.n_faces):
+        assert bps._face_handle(f).face == f
+
+    vertices = sorted(tuple(p[:2]) for p in bps.point_dict)
+    return (
+        vertices,
+        [sorted(map(tuple, bps.nbrs(point(*p)))) for p in vertices],
+        sorted(sorted(map(tuple, bps.face(f).polygon)) for f in range(bps.n_faces)),
+        [
+            [h.point.tolist() for h in bps.edges_of_line(i)]
+            for i in bps.line_ids + list(BOUNDARY_LINES)
+        ],
+    )
+
+
+def built(cls, lines):
+    bps = cls(bottom_left, top_right)
+    for line in lines:
+        bps.add_line(line)
+    return bps
+
+
+def live(bps):
+    """The lines that haven't been removed, in order"""
+
+    return [bps.lines[i] for i in bps.line_ids]
+
+
+for cls in (BPS, ABPS):
+    # Removing each line leaves the arrangement of the others, whether the
+    # lines were added one at a time or all at once
+    for i in range(len(lines)):
+        for bulk in (False, True):
+            bps = cls(bottom_left, top_right)
+            if bulk:
+                bps.add_lines(lines)
+            else:
+                for line in lines:
+                    bps.add_line(line)
+
+            version = bps.version
+            bps.remove_line(i)
+            assert bps.version > version
+            assert bps.lines == lines[:i] + [None] + lines[i + 1 :]
+            assert bps.line_ids == [j for j in range(len(lines)) if j != i]
+            rebuilt = built(cls, live(bps))
+            assert structure(bps) == structure(rebuilt)
+
+            # The removed line has an empty zone, and the others have the
+            # zones they have without it
+            zones, expected = bps.all_zones(), rebuilt.all_zones()
+            assert zones.faces[i] == zones.edges[i] == 0
+            assert (zones.faces[bps.line_ids] == expected.faces).all()
+            assert (zones.edges[bps.line_ids] == expected.edges).all()
+
+    # Lines can be added back after being removed, and removing every line
+    # leaves just the box
+    bps = built(cls, lines)
+    bps.remove_line(6)
+    bps.add_line(lines[6])
+    assert bps.line_ids[-1] == len(lines) and bps.edges_of_line(6) == []
+    assert structure(bps) == structure(built(cls, live(bps)))
+    for i in bps.line_ids:
+        bps.remove_line(i)
+    assert bps.n_faces == 2
+    assert len(bps.point_dict) == 4
+    assert structure(bps) == structure(cls(bottom_left, top_right))
+
+    # Crossings of the removed line are forgotten, and the other lines keep
+    # their ids
+    bps = built(cls, lines)
+    assert (bps.vertices.lines == 3).any()
+    bps.remove_line(3)
+    assert not (bps.vertices.lines[: len(bps.vertices)] == 3).any()
+    assert bps.crossing(6, 7) is bps.vertices.point(bps.vertices.find(5, 5))
+    assert {h.line for h in bps.edges_of_line(6)} == {6}
+
+    # Points that were only on the removed line aren't vertices anymore
+    bps = built(cls, lines)
+    bps.remove_line(2)
+    assert bps.vertices.find(0, 4) is None and bps.vertices.find(2, 2) is None
+    assert bps.locate(point(1, 1)).face == bps.locate(point(3, 0.5)).face
+
+    for i in (len(bps.lines), 2):
+        try:
+            bps.remove_line(i)
+            assert False
+        except IndexError:
+            pass
+
+    # Adding lines all at once keeps the ids of the lines already there
+    bps.add_lines(lines[2:3])
+    assert bps.line_ids == [j for j in range(len(lines) + 1) if j != 2]
+    assert structure(bps) == structure(built(cls, live(bps)))
+
+# Removed rows of the array backend are reused
+bps = built(ABPS, lines)
+rows = bps.store.n_half_edges
+bps.remove_line(0)
+assert bps.store.free
+bps.add_line(lines[0])
+assert bps.store.n_half_edges == rows and not bps.store.free
+
+# So are the ids of removed vertices, however many times a line comes and goes
+for cls in (BPS, ABPS):
+    bps = built(cls, lines)
+    n_vertices = len(bps.vertices)
+    for _ in range(20):
+        i = bps.line_ids[0]
+        line = bps.lines[i]
+        bps.remove_line(i)
+        bps.add_line(line)
+    assert len(bps.vertices) == n_vertices
+    assert len(bps.point_dict) + len(bps.vertices.free) == n_vertices
+
+# Random lines, adding and removing them in a random order
+rng = default_rng(0)
+for cls in (BPS, ABPS):
+    pool = [
+        (point(0, a), point(10, b)) for a, b in rng.uniform(0, 10, (6, 2)).tolist()
+    ] + [(point(a, 0), point(b, 10)) for a, b in rng.integers(0, 11, (6, 2)).tolist()]
+    bps = cls(bottom_left, top_right)
+    bps.add_lines(pool[:6])
+    for _ in range(12):
+        if bps.line_ids and rng.random() < 0.5:
+            bps.remove_line(bps.line_ids[int(rng.integers(len(bps.line_ids)))])
+        else:
+            unused = [line for line in pool if not any(line is l for l in bps.lines)]
+            if unused:
+                bps.add_line(unused[0])
+        assert structure(bps) == structure(built(cls, live(bps)))
+
+# On a grid, removing a line rebuilds the others
+grid = GBPS(bottom_left, top_right)
+grid.add_lines(lines)
+grid.remove_line(0)
+rebuilt = GBPS(bottom_left, top_right)
+rebuilt.add_lines(lines[1:])
+assert grid.n_faces == rebuilt.n_faces
+assert sorted(grid.point_dict) == sorted(rebuilt.point_dict)
+assert grid.line_ids == list(range(1, len(lines))) and grid.edges_of_line(0) == []
+assert {h.line for h in grid.edges_of_line(1)} == {1}
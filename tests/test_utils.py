@@ -0,0 +1,110 @@
+"""
+Test class for the geometric predicates in
+:mod:`src.data_structures.utils`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.utils import (
+    orient,
+    orient2d,
+    orient_many,
+    orient_counts,
+    PRECISION,
+)
+from data_structures.utils import line_meet, line_through
+from data_structures.utils import segment_intersection, segment_intersections
+from data_structures.point import point
+from numpy import allclose, array, isnan, sign
+from numpy.linalg import det
+from numpy.random import default_rng
+
+rng = default_rng(0)
+
+# The closed form should always agree with the determinant
+for _ in range(1000):
+    a, b, c = (point(*rng.integers(-10, 10, 2)) for _ in range(3))
+    expected = sign(round(det(array((a, b, c))), PRECISION))
+
+    assert orient2d(a, b, c) == expected
+    assert orient(a, b, c) == expected
+
+# Points at infinity still use the full determinant
+a, b = point(0, 0), point(1, 0)
+assert orient2d(a, b, point(0, 1, z=0)) == 1
+assert orient2d(a, b, point(0, -1, z=0)) == -1
+assert orient2d(a, b, point(1, 0, z=0)) == 0
+
+# Batched orientation matches orienting one point at a time
+pts = array([point(*rng.uniform(-10, 10, 2)) for _ in range(100)])
+pts[:5, 1] = 0  # some points on the line itself
+expected = [orient2d(a, b, p) for p in pts]
+assert list(orient_many(a, b, pts)) == expected
+assert list(orient_many(a, b, [point(0, 1, z=0)])) == [1]
+
+# Batched intersection matches intersecting one edge at a time
+a, b = point(0, 0), point(10, 10)
+edges = [
+    (point(0, 10), point(10, 0)),  # proper crossing at (5, 5)
+    (point(0, 1), point(1, 0)),  # proper crossing at (0.5, 0.5)
+    (point(10, 10), point(10, 0)),  # touches b
+    (point(0, 0), point(0, 10)),  # touches a
+    (point(0, 1), point(9, 10)),  # parallel
+    (point(6, 0), point(10, 4)),  # misses
+    (point(2, 2), point(4, 4)),  # colinear overlap
+]
+for _ in range(50):
+    edges.append(tuple(point(*rng.uniform(-1, 11, 2)) for _ in range(2)))
+
+mask, crosses = segment_intersections(a, b, array(edges))
+assert list(mask[:7]) == [True, True, True, True, False, False, False]
+
+for i, (c, d) in enumerate(edges):
+    expected = segment_intersection(a, b, c, d)
+
+    assert mask[i] == (expected is not None)
+    if expected is None:
+        assert all(isnan(crosses[i]))
+    else:
+        assert allclose(crosses[i], expected)
+
+# Near the rounding threshold, the float determinant depends on the order of
+# the points, but orient2d checks those with exact arithmetic and agrees
+orient_counts.reset()
+for _ in range(2000):
+    a, b = point(*rng.uniform(1e3, 2e3, 2)), point(*rng.uniform(1e3, 2e3, 2))
+    c = a + (b - a) * rng.uniform(-2, 3) + point(0, rng.uniform(-1e-12, 1e-12), z=0)
+    c[2] = 1
+
+    forward = [orient2d(a, b, c), orient2d(b, c, a), orient2d(c, a, b)]
+    backward = [-orient2d(b, a, c), -orient2d(a, c, b), -orient2d(c, b, a)]
+    assert len(set(forward + backward)) == 1
+    assert orient_many(a, b, [c])[0] == forward[0]
+
+assert orient_counts.exact > 0 and orient_counts.fast > 0
+orient_counts.reset()
+assert orient_counts.fast == orient_counts.exact == 0
+
+# Easy cases never need exact arithmetic
+orient2d(point(0, 0), point(1, 0), point(0, 1))
+orient2d(point(0, 0), point(1, 0), point(2, 0))
+orient_many(point(0, 0), point(1, 0), [point(0, 1), point(0, -1, z=0)])
+assert (orient_counts.fast, orient_counts.exact) == (4, 0)
+
+# A line is the cross product of two of its points, and lines meet at the
+# cross product of their coefficients
+l = line_through(point(0, 1), point(2, 3))
+assert l.tolist() == [-2, 2, -2]
+assert l.dot(point(5, 6)) == 0
+m = line_through(point(0, 3), point(3, 0))
+assert line_meet(l, m).tolist() == [1, 2, 1]
+assert line_meet(l, line_through(point(0, 0), point(1, 1))) is None
+
+# Vectorized lines match one at a time
+ends = rng.uniform(-10, 10, (20, 2, 3))
+ends[..., 2] = 1
+lines = line_through(ends[:, 0], ends[:, 1])
+for (a, b), l in zip(ends, lines):
+    assert l.tolist() == line_through(a, b).tolist()
+    assert abs(l.dot(a)) < 1e-9 and abs(l.dot(b)) < 1e-9
@@ -0,0 +1,77 @@
+"""
+Test class for giving vertices ids with
+:class:`src.data_structures.vertex_index.VertexIndex`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.utils import EPSILON
+from data_structures.vertex_index import VertexIndex
+from numpy import array
+
+vertices = VertexIndex(capacity=1)
+
+# New points get new ids in order
+assert vertices.add(0, 0) == 0
+assert vertices.add(1, 2) == 1
+assert vertices.add(3, 4) == 2
+assert len(vertices) == 3
+
+# Points within EPSILON are the same vertex, even across grid cells
+assert vertices.add(1 + EPSILON / 2, 2 - EPSILON / 2) == 1
+assert vertices.find(3 - EPSILON / 2, 4 + EPSILON / 2) == 2
+assert vertices.find(1 + 2 * EPSILON, 2) is None
+assert len(vertices) == 3
+
+# Vertices keep the coordinates they were first added with
+assert all(vertices.point(1) == array([1, 2, 1]))
+assert (vertices.coords[: len(vertices)] == array([(0, 0), (1, 2), (3, 4)])).all()
+
+# Indexes of known points can be looked up and added to
+vertices = VertexIndex.from_coords(array([(0, 0), (0.5, 0.25)]))
+assert vertices.find(0.5, 0.25) == 1
+assert vertices.find(0.25, 0.5) is None
+assert vertices.add(0.25, 0.5) == 2
+
+# Vertices can be tagged with the lines that cross there, and keep the first
+# pair
+vertices = VertexIndex(capacity=1)
+v = vertices.add(1, 1)
+vertices.tag(v, 3, 1)
+vertices.tag(v, 1, 2)
+assert vertices.lines[v].tolist() == [1, 3]
+vertices.untag(v, 2, 1)
+assert vertices.lines[v].tolist() == [1, 3]
+vertices.untag(v, 3, 1)
+assert vertices.lines[v].tolist() == [-1, -1]
+vertices.tag(v, 3, 1)
+
+# Growing keeps the tags, and new vertices aren't tagged
+assert vertices.add(2, 2) == 1
+assert vertices.lines[: len(vertices)].tolist() == [[1, 3], [-1, -1]]
+
+# Known tags are kept smallest first
+vertices = VertexIndex.from_coords(
+    array([(0, 0), (0.5, 0.25)]), array([(-1, -1), (4, 2)])
+)
+assert vertices.lines.tolist() == [[-1, -1], [2, 4]]
+
+# Removed vertices can't be found, and their ids go to the next new vertices
+vertices.remove(1)
+assert vertices.find(0.5, 0.25) is None and vertices.lines[1].tolist() == [-1, -1]
+assert vertices.add(3, 3) == 1 and vertices.add(4, 4) == 2
+assert vertices.find(3, 3) == 1 and vertices.lines[1].tolist() == [-1, -1]
+assert len(vertices) == 3
+
+# The hash table grows as vertices are added, and removed vertices stay out of
+# it when it's rebuilt
+vertices = VertexIndex()
+points = [(i / 7, i * EPSILON) for i in range(100)]
+assert [vertices.add(x, y) for x, y in points] == list(range(100))
+for v in range(0, 100, 2):
+    vertices.remove(v)
+assert [vertices.add(x, y) for x, y in points[1::2]] == list(range(1, 100, 2))
+assert [vertices.add(x + 1, y) for x, y in points[::2]] == list(range(98, -1, -2))
+assert [vertices.find(x, y) for x, y in points[::2]] == [None] * 50
+assert vertices.nbytes() > 0
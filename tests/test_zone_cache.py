@@ -0,0 +1,86 @@
+"""
+Test class for caching zone queries with
+:class:`src.data_structures.zone_cache.ZoneCache`.
+
+:Authors:
+    - Drew Hughlett (arhughle)
+"""
+
+from data_structures.array_subdivision import ArrayBoundedPolygonalSubdivision as ABPS
+from data_structures.polygonal_subdivision import BoundedPolygonalSubdivision as BPS
+from data_structures.point import point
+from data_structures.zone_cache import ZoneCache
+
+# Constants to use for bounding the Polygon Subdivision
+bottom_left = point(0, 0)
+top_right = point(10, 10)
+
+lines = [
+    (point(0, 8), point(10, 8)),
+    (point(0, 6), point(4, 10)),
+    (point(0, 4), point(4, 0)),
+    (point(0, 3), point(10, 3)),
+]
+zone_line = (point(0, 5), point(10, 5))
+
+for cls in (BPS, ABPS):
+    bps = cls(bottom_left, top_right)
+    for line in lines:
+        bps.add_line(line)
+    assert bps.version == len(lines)
+
+    # The second time is a hit, and gives the same answer
+    zone = bps.find_zone(zone_line)
+    assert (bps.zone_cache.hits, bps.zone_cache.misses) == (0, 1)
+    assert bps.find_zone(zone_line) == zone
+    assert (bps.zone_cache.hits, bps.zone_cache.misses) == (1, 1)
+
+    # Rounding error in the zone line doesn't matter
+    nudged = (point(1e-12, 5), point(10, 5 - 1e-12))
+    assert bps.find_zone(nudged) == zone
+    assert bps.zone_cache.hits == 2
+
+    # Changing a result doesn't change the cache
+    complexity = bps.zone_complexity(zone_line)
+    complexity.faces += 100
+    assert bps.zone_complexity(zone_line).faces == len(zone)
+    bps.find_zone(zone_line).clear()
+    assert bps.find_zone(zone_line) == zone
+
+    # Adding a line makes the old results stale
+    bps.add_line((point(5, 0), point(5, 10)))
+    assert bps.version == len(lines) + 1
+    misses = bps.zone_cache.misses
+    assert len(bps.find_zone(zone_line)) == len(zone) + 1
+    assert bps.zone_cache.misses == misses + 1
+
+    # add_lines changes the version too
+    version = bps.version
+    bps.add_lines([(point(0, 1), point(10, 9))])
+    assert bps.version == version + 1
+
+    # A size of 0 turns the cache off
+    bps.zone_cache.maxsize = 0
+    assert len(bps.zone_cache) == 0
+    hits = bps.zone_cache.hits
+    bps.find_zone(zone_line)
+    bps.find_zone(zone_line)
+    assert bps.zone_cache.hits == hits
+
+# The least recently used entry is evicted first
+cache = ZoneCache(maxsize=2)
+keys = [
+    ZoneCache.key("find_zone", (point(0, y), point(10, y)), False, 0) for y in range(3)
+]
+cache.put(keys[0], 0)
+cache.put(keys[1], 1)
+assert cache.get(keys[0]) == 0
+cache.put(keys[2], 2)
+assert cache.get(keys[1]) is None
+assert cache.get(keys[0]) == 0 and cache.get(keys[2]) == 2
+assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+# The version is part of the key
+assert ZoneCache.key("find_zone", zone_line, False, 0) != ZoneCache.key(
+    "find_zone", zone_line, False, 1
+)